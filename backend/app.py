@@ -1,14 +1,26 @@
 import json
-import mimetypes
 import os
 import re
 import uuid
 from zipfile import ZipFile
 
 from requests import Response
-from common_functions import convert_text_to_speech
-from flask import Flask, request, jsonify, send_from_directory, make_response, send_file, Response, stream_with_context
+from audio_processing import render_track, rerender_track_ranges
+from common_functions import (AUDIO_DELIVERABLES, HLS_MASTER_PLAYLIST, convert_texts_to_speech,
+                              mux_description_track, probe_media)
+from export_jobs import ExportJobs
+from export_manifest import MANIFEST_FILE, TRACK_FILE, build_manifest, changed_ranges, load_manifest, same_inputs, save_manifest
+from tts_cache import CACHE_FILE_PREFIX, get_audio_durations
+from tts_engines import get_tts_engine
+from workspaces import WorkspaceManager, file_lock
+from artifacts import send_artifact
+from config import ARTIFACT_X_SENDFILE, PROCESS_MAX_WORKERS, TTS_ENGINE
+from job_queue import JobQueue, WorkerPool
+from uploads import OffsetMismatch, UploadSessions
+from upload_store import UploadStore, parse_sha256
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 import shutil
 import openAI_images.video_to_frames as vtf
 import openAI_images.detect_scene_changes as dsc
@@ -17,7 +29,6 @@ import openAI_images.get_return_values as grv
 from openAI_images.vidToDesGemini import describe_with_gemini_whole_video, get_video_duration
 import openAI_images.scenes_to_description_optimized_gemini as sg
 import openAI_images.newGemini as ng
-import subprocess
 import tempfile
 from gtts import gTTS
 import os
@@ -31,6 +42,7 @@ from uuid import uuid4
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 30 * 1024 * 1024
+app.config['USE_X_SENDFILE'] = ARTIFACT_X_SENDFILE  # Let the front proxy send artifact files
 CORS(app)
 
 UPLOAD_FOLDER = "./uploads"
@@ -41,30 +53,57 @@ AUDIO_FOLDER = "./audio"
 WAVEFORM_FOLDER = "./waveforms"
 TRIMMED_FOLDER = "./trimmed"
 SRT_FOLDER = "srt"  # Folder to store SRT files
+EXPORTS_FOLDER = "./exports"  # Last export's description track and manifest, per video
+WORKSPACES_FOLDER = "./workspaces"  # Private scene clips and intermediate files, per request
+JOBS_DB = "./jobs.sqlite3"  # Durable queue of /process-video jobs
+UPLOAD_SESSIONS_FOLDER = "./upload_sessions"  # Partial chunked uploads (/uploads)
+PROXIES_FOLDER = "./uploads/proxies"  # Low-resolution analysis proxies of chunked uploads
 
 # Ensure directories exist
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 os.makedirs(AUDIO_FOLDER, exist_ok=True)
 os.makedirs(TRIMMED_FOLDER, exist_ok=True)
 os.makedirs(SRT_FOLDER, exist_ok=True)
+os.makedirs(EXPORTS_FOLDER, exist_ok=True)
+
+export_jobs = ExportJobs()
+workspaces = WorkspaceManager(WORKSPACES_FOLDER)
+video_store = UploadStore(UPLOAD_FOLDER)
+uploads = UploadSessions(UPLOAD_SESSIONS_FOLDER, video_store, PROXIES_FOLDER)
+process_jobs = JobQueue(JOBS_DB)
+# Job kinds and the handlers the worker processes run them with
+JOB_HANDLERS = {"process-video": "video_pipeline:process_video"}
+job_workers = WorkerPool(JOBS_DB, JOB_HANDLERS, PROCESS_MAX_WORKERS)  # Started by start_job_workers
+
+# Optional export outputs besides the video and its SRT files
+EXPORT_DELIVERABLES = ("vtt", "hls", *AUDIO_DELIVERABLES)
+HLS_MIMETYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+    ".vtt": "text/vtt",
+}
 
 def setup():
     """
     Setup required directories for video processing.
 
-    This function ensures that the upload folder exists and recreates the frames, scenes, 
-    and waveform folders by deleting any existing ones and creating new directories.
+    This function ensures that the upload and waveform folders exist. Scene clips and other
+    intermediate files live in per-request workspaces, so nothing shared is deleted here.
     """
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    if os.path.exists(FRAMES_FOLDER):
-        shutil.rmtree(FRAMES_FOLDER)
-    os.makedirs(FRAMES_FOLDER, exist_ok=True)
-
-    if os.path.exists(SCENES_FOLDER):
-        shutil.rmtree(SCENES_FOLDER)
-    os.makedirs(SCENES_FOLDER, exist_ok=True)
     os.makedirs(WAVEFORM_FOLDER, exist_ok=True)
 
+@app.before_request
+def start_job_workers():
+    """
+    Start the job worker processes when this process serves its first request.
+
+    The workers are not started on import, because spawned workers import this module again
+    and the debug reloader imports it in a process that does not serve requests.
+    """
+    job_workers.start()
+
 @app.route("/")
 def hello_geek():
     """
@@ -78,39 +117,39 @@ def hello_geek():
 @app.route("/scene_files/<path:filename>", methods=["GET"])
 def get_scene_files(filename):
     """
-    Serve a scene file from the scenes results folder.
+    Serve a scene file from a request workspace or the scenes results folder.
 
     Args:
-        filename (str): The name of the scene file.
+        filename (str): The name of the scene file, as "<workspace_id>/<name>" for scenes
+            cut by /process-video.
 
     Returns:
-        Response: The file served from the SCENES_FOLDER.
+        Response: The file served from the workspace, or from the SCENES_FOLDER. Scene files
+            have unique names, so they are cacheable for good.
     """
-    return send_from_directory(SCENES_FOLDER, filename)
+    workspace_id, _, name = filename.partition("/")
+    workspace = workspaces.get(workspace_id) if name else None
+    if workspace:
+        return send_artifact(workspace.scenes_dir, name, immutable=True)
+    return send_artifact(SCENES_FOLDER, filename, immutable=True)
 
 @app.route("/audio/<path:filename>", methods=["GET"])
 def get_audio_files(filename):
     """
     Serve an audio file from the audio folder.
 
+    Text-to-speech cache files are named after their cache key, so they are cacheable for
+    good; other audio files are revalidated with their ETag.
+
     Args:
         filename (str): The name of the audio file.
 
     Returns:
-        Response: The requested audio file or an error response if not found.
+        Response: The requested audio file, or a 404 response if not found.
     """
-    try:
-        filepath = os.path.join(AUDIO_FOLDER, filename)
-        print(filepath)
-        mimetype, _ = mimetypes.guess_type(filepath)
-        return send_file(
-            filepath,
-            mimetype=mimetype,
-            as_attachment=False,
-            download_name=filename
-        )
-    except Exception as e:
-        return Response(str(e), status=404)
+    return send_artifact(
+        AUDIO_FOLDER, filename, immutable=os.path.basename(filename).startswith(CACHE_FILE_PREFIX)
+    )
 
 @app.route("/regenerate-audio", methods=["POST"])
 def regenerate_audio():
@@ -128,42 +167,44 @@ def regenerate_audio():
             data = request.get_json()
             scenes = data.get("scenes", [])
             video_name = data.get("video_name")
+            engine = data.get("engine")
 
             if not scenes or not video_name:
                 yield json.dumps({"error": "Missing required data (scenes or video_name)"}) + "\n"
                 return
 
+            get_tts_engine(engine)  # Fail early on an unknown engine
+
             video_path = os.path.join(UPLOAD_FOLDER, video_name)
             if not os.path.exists(video_path):
                 yield json.dumps({"error": "Video file not found"}) + "\n"
                 return
 
-            audio_files = []
             total_scenes = len(scenes)
-
-            for index, scene in enumerate(scenes):
-                start = scene["start"]
-                end = scene["end"]
-                description = scene.get("description", "")
-
-                # Generate audio for the description
-                unique_id = str(uuid.uuid4())
-                audio_file_path = convert_text_to_speech(description, AUDIO_FOLDER, f"audio_description_{unique_id}")
-
+            audio_files = [None] * total_scenes
+            descriptions = [scene.get("description", "") for scene in scenes]
+            # Fit every clip to its scene so no speed-up is needed at encode time
+            max_durations = [(scene["end"] - scene["start"]) / 1000 for scene in scenes]
+
+            # Synthesize on the TTS pool and report each scene as soon as it finishes
+            for completed, (index, audio_file_path) in enumerate(
+                convert_texts_to_speech(descriptions, AUDIO_FOLDER, max_durations=max_durations, engine=engine),
+                start=1
+            ):
                 audio_file_path = audio_file_path.strip()[2:]  # Clean up the path
 
-                audio_files.append({
-                    "start": start,
-                    "end": end,
+                audio_files[index] = {
+                    "start": scenes[index]["start"],
+                    "end": scenes[index]["end"],
                     "audio_file": audio_file_path
-                })
+                }
 
                 # Yield progress update
-                progress = int(((index + 1) / total_scenes) * 100)
+                progress = int((completed / total_scenes) * 100)
                 yield json.dumps({
                     "progress": progress,
-                    "message": f"Generated audio for scene {index + 1}/{total_scenes}",
-                    "audio_files": audio_files
+                    "message": f"Generated audio for scene {index + 1} ({completed}/{total_scenes})",
+                    "audio_files": [audio for audio in audio_files if audio]
                 }) + "\n"
 
             # Final completion message
@@ -192,11 +233,13 @@ def regenerate_descriptions():
         Response: A streaming response in NDJSON format with progress updates and final description data.
     """
     def generate():
+        workspace = None
         try:
             # Initial setup and validation
             data = request.get_json()
             scenes = data.get("scenes", [])
             video_name = data.get("video_name")
+            engine = data.get("engine")
             
             yield json.dumps({
                 "progress": 10,
@@ -238,9 +281,10 @@ def regenerate_descriptions():
                 "type": "NO_TALKING"
             } for scene in scenes]
 
-            # Use existing function to cut video
+            # Use existing function to cut video into a private workspace
+            workspace = workspaces.create("regenerate-descriptions", video=video_name)
             scene_numbers, scene_ids = rg.cut_video_by_no_talking(
-                video_path, segments, SCENES_FOLDER
+                video_path, segments, workspace.scenes_dir
             )
 
             # Generate descriptions using existing function
@@ -250,7 +294,8 @@ def regenerate_descriptions():
             }) + "\n"
 
             descriptions = rg.describe_existing_segments(
-                SCENES_FOLDER, (scene_numbers, scene_ids), AUDIO_FOLDER, video_summary
+                workspace.scenes_dir, (scene_numbers, scene_ids), segments, AUDIO_FOLDER,
+                video_summary, tts_engine=engine
             )
 
             # Format response using existing function
@@ -261,12 +306,6 @@ def regenerate_descriptions():
 
             response_data = rg.format_response_data(segments, descriptions)
 
-            # Clean up temporary scene files
-            for scene_id in scene_ids:
-                scene_file = os.path.join(SCENES_FOLDER, f"scene_{scene_id}.mp4")
-                if os.path.exists(scene_file):
-                    os.remove(scene_file)
-
             yield json.dumps({
                 "progress": 100,
                 "data": response_data,
@@ -280,6 +319,10 @@ def regenerate_descriptions():
                 "error": error_msg,
                 "progress": -1
             }) + "\n"
+        finally:
+            # The scene clips are only needed while describing them
+            if workspace:
+                workspace.remove()
 
     return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
@@ -299,26 +342,28 @@ def text_to_speech():
         if not data or not isinstance(data, list):
             return jsonify({"error": "Descriptions must be provided as a list."}), 400
 
-        audio_files = []
-        for item in data:
-            description = item.get("description")
-            timestamps = item.get("timestamps")
-            scene_id = item.get("scene_id")
+        engine = request.args.get("engine")
+        try:
+            get_tts_engine(engine)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-            if not description or not timestamps or not scene_id:
+        for item in data:
+            if not item.get("description") or not item.get("timestamps") or not item.get("scene_id"):
                 return jsonify({"error": "Each item must have description, timestamps, and scene_id."}), 400
 
-            # Generate audio for the description
-            unique_id = str(uuid.uuid4())
-            audio_file_path = convert_text_to_speech(description, AUDIO_FOLDER, f"audio_description_{unique_id}")
-
-            audio_file_path = audio_file_path.strip()[2:]  # Clean up the path
-
-            audio_files.append({
-                "timestamps": timestamps,
-                "description": description,
-                "audio_file": audio_file_path
-            })
+        # Generate audio for all descriptions on the TTS pool, keeping the input order
+        audio_files = [None] * len(data)
+        descriptions = [item["description"] for item in data]
+        max_durations = [_timestamps_to_duration(item["timestamps"]) for item in data]
+        for index, audio_file_path in convert_texts_to_speech(
+            descriptions, AUDIO_FOLDER, max_durations=max_durations, engine=engine
+        ):
+            audio_files[index] = {
+                "timestamps": data[index]["timestamps"],
+                "description": data[index]["description"],
+                "audio_file": audio_file_path.strip()[2:]  # Clean up the path
+            }
 
         return jsonify({"audio_files": audio_files}), 200
 
@@ -326,6 +371,22 @@ def text_to_speech():
         print("Error generating audio:", traceback.format_exc())
         return jsonify({"error": f"Failed to generate audio: {str(e)}"}), 500
 
+def _timestamps_to_duration(timestamps):
+    """
+    Get the duration of a [start, end] pair of millisecond timestamps.
+
+    Args:
+        timestamps (list): A [start, end] pair in milliseconds.
+
+    Returns:
+        float or None: The duration in seconds, or None if the timestamps are not numeric.
+    """
+    try:
+        start, end = timestamps
+        return (float(end) - float(start)) / 1000
+    except (TypeError, ValueError):
+        return None
+
 @app.route("/analyze-timestamps", methods=["POST"])
 def analyze_timestamps():
     """
@@ -344,6 +405,7 @@ def analyze_timestamps():
         video_name = data.get("video_name")
         old_data = data.get("old_data", [])
         new_timestamps = data.get("new_timestamps", [])
+        engine = data.get("engine")
 
         if not video_name:
             return jsonify({"error": "No video name provided"}), 400
@@ -371,13 +433,18 @@ def analyze_timestamps():
             # Generate video summary
             video_summary = rg.get_video_summary_with_gemini(video_path)
             
-            # Cut video and generate descriptions
-            scenes = rg.cut_video_by_no_talking(
-                video_path, changed_segments, SCENES_FOLDER
-            )
-            descriptions = rg.describe_existing_segments(
-                SCENES_FOLDER, scenes, AUDIO_FOLDER, video_summary
-            )
+            # Cut video and generate descriptions in a private workspace
+            workspace = workspaces.create("analyze-timestamps", video=video_name)
+            try:
+                scenes = rg.cut_video_by_no_talking(
+                    video_path, changed_segments, workspace.scenes_dir
+                )
+                descriptions = rg.describe_existing_segments(
+                    workspace.scenes_dir, scenes, changed_segments, AUDIO_FOLDER, video_summary,
+                    tts_engine=engine
+                )
+            finally:
+                workspace.remove()
             response = rg.format_response_data(changed_segments, descriptions)
 
         # Merge with old descriptions
@@ -431,19 +498,198 @@ def milliseconds_to_srt_time(ms):
     hours, minutes = divmod(minutes, 60)
     return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
 
-def _create_temp_file(content_list):
+def _format_subtitles(segments, vtt=False):
+    """
+    Format segment descriptions as SRT or WebVTT subtitles.
+
+    Args:
+        segments (list): Segments as dicts with "start", "end" (milliseconds) and "description".
+        vtt (bool, optional): Write WebVTT instead of SRT. Defaults to False.
+
+    Returns:
+        str: The subtitle file content.
+    """
+    cues = []
+    for i, seg in enumerate(segments, 1):
+        start = milliseconds_to_srt_time(seg["start"])
+        end = milliseconds_to_srt_time(seg["end"])
+        if vtt:
+            start, end = start.replace(",", "."), end.replace(",", ".")
+        cues.append(f"{i}\n{start} --> {end}\n{seg['description']}\n")
+    content = "\n".join(cues)
+    return f"WEBVTT\n\n{content}" if vtt else content
+
+def _validate_export_request(data):
+    """
+    Check an export payload for missing fields.
+
+    Args:
+        data (dict): The JSON payload of an export request.
+
+    Returns:
+        str or None: An error message, or None if the payload is complete.
     """
-    Create a temporary SRT file with the provided content.
+    if not isinstance(data, dict):
+        return "Invalid JSON payload"
+    required_fields = ["descriptions", "timestamps", "audioFiles", "videoFileName"]
+    for field in required_fields:
+        if field not in data or not data[field]:
+            return f"Missing {field}"
+    unknown = set(data.get("deliverables", [])) - set(EXPORT_DELIVERABLES)
+    if unknown:
+        return f"Unknown deliverables: {', '.join(sorted(unknown))}. Available: {', '.join(EXPORT_DELIVERABLES)}"
+    return None
+
+def _export_video(data, progress_callback=None):
+    """
+    Export a video with its audio description track and subtitles.
+
+    The original video and audio streams are copied without re-encoding whenever MP4 can hold them;
+    "streamCopy": false in the payload forces a full re-encode.
+
+    The rendered description track and a manifest of the inputs are kept per video. When the
+    same video is exported again, only the time ranges of changed description clips are
+    re-rendered before remuxing, and if nothing changed the previous outputs are returned as is.
+
+    Optional "deliverables" in the payload add WebVTT subtitles ("vtt") and audio-only files
+    (the AUDIO_DELIVERABLES names: description track as M4A or Opus, description mixed with the
+    original audio) and an HLS package with CMAF segments ("hls"). The audio files and the HLS
+    package are encoded by the same ffmpeg run as the video, and subtitles are written straight
+    to SRT_FOLDER. The HLS playlist URL is reported with the "Encoding video..." progress
+    event, so players can start while the package is still being written.
 
     Args:
-        content_list (list): A list of strings representing the lines of the SRT file.
+        data (dict): The export payload (descriptions, timestamps, audioFiles, videoFileName, streamCopy,
+            deliverables).
+        progress_callback (callable, optional): Called as progress_callback(percent, message=None, **fields)
+            while the export runs. Defaults to None.
 
     Returns:
-        str: The path to the created temporary SRT file.
+        dict: Download URLs for the processed video, SRT file, talking SRT file and each requested
+            deliverable ("<name>_url", plus "talking_vtt_url" for "vtt").
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".srt", mode="w") as temp_file:
-        temp_file.write("\n".join(content_list))
-        return temp_file.name
+    progress_callback = progress_callback or (lambda progress, message=None, **fields: None)
+
+    filtered_segments = []
+    combined_segments = []
+    audio_index = 0
+    for i, (desc, (start, end)) in enumerate(
+        zip(data["descriptions"], data["timestamps"])
+    ):
+        segment = {"start": start, "end": end, "description": desc}
+        if desc.strip().upper() == "TALKING":
+            combined_segments.append(segment)
+        else:
+            audio_file = data["audioFiles"][audio_index]
+            audio_index += 1
+            segment["audio"] = audio_file
+            filtered_segments.append(segment)
+            combined_segments.append(segment)
+
+    deliverables = set(data.get("deliverables", []))
+    subtitles = {
+        "srt": _format_subtitles(filtered_segments),
+        "talking_srt": _format_subtitles(combined_segments),
+    }
+    if "vtt" in deliverables:
+        subtitles["vtt"] = _format_subtitles(filtered_segments, vtt=True)
+        subtitles["talking_vtt"] = _format_subtitles(combined_segments, vtt=True)
+
+    # Audio processing with millisecond precision
+    audio_clips = [seg["audio"] for seg in filtered_segments]
+    start_times = [seg["start"] / 1000 for seg in filtered_segments]  # Convert ms to seconds
+    # Clips longer than their segment are trimmed and time-stretched while mixing
+    max_durations = [(seg["end"] - seg["start"]) / 1000 for seg in filtered_segments]
+
+    output_filename = f"processed_{data['videoFileName']}"
+    output_path = os.path.join(PROCESSED_FOLDER, output_filename)
+    video_path = os.path.join(UPLOAD_FOLDER, data["videoFileName"])
+
+    # Exports of the same video share their export directory and output files, so they run
+    # one at a time (across threads and processes); exports of different videos run in parallel
+    export_dir = os.path.join(EXPORTS_FOLDER, data["videoFileName"])
+    with file_lock(f"{export_dir}.lock"):
+        # Return the previous export if none of its inputs changed
+        manifest = build_manifest(
+            video_path, filtered_segments, subtitles, data.get("streamCopy", True), deliverables
+        )
+        previous = load_manifest(export_dir)
+        if previous and same_inputs(previous, manifest) and all(map(os.path.exists, previous["outputs"])):
+            return previous["result"]
+
+        # The track is about to change; never leave a manifest that does not describe it
+        if previous:
+            os.remove(os.path.join(export_dir, MANIFEST_FILE))
+        os.makedirs(export_dir, exist_ok=True)
+
+        # Create mixed audio, re-rendering only the changed time ranges of the last export's track
+        progress_callback(5, "Rendering audio description track...")
+        media = probe_media(video_path)
+        mixed_audio_path = os.path.join(export_dir, TRACK_FILE)
+        updated = False
+        if previous and previous["video"] == manifest["video"] and os.path.exists(mixed_audio_path):
+            ranges = changed_ranges(previous["clips"], manifest["clips"])
+            updated = rerender_track_ranges(
+                mixed_audio_path,
+                zip(audio_clips, start_times),
+                [(start / 1000, end / 1000) for start, end in ranges],
+                max_durations,
+            )
+        if not updated:
+            _create_mixed_audio(audio_clips, start_times, max_durations, output=mixed_audio_path,
+                                duration=media["duration"])
+
+        # Write the subtitle files to their final location; the SRT is also muxed into the video
+        unique_id = str(uuid.uuid4())[:8]
+        video_name = os.path.splitext(data["videoFileName"])[0]
+        subtitle_paths = {}
+        for name, content in subtitles.items():
+            extension = name.rpartition("_")[2]
+            subtitle_paths[name] = os.path.join(SRT_FOLDER, f"{name}_{video_name}_{unique_id}.{extension}")
+            with open(subtitle_paths[name], "w") as f:
+                f.write(content)
+
+        audio_outputs = {
+            name: os.path.join(PROCESSED_FOLDER, AUDIO_DELIVERABLES[name]["file"].format(video_name))
+            for name in sorted(deliverables & set(AUDIO_DELIVERABLES))
+        }
+
+        # The HLS package is rewritten from scratch; its playlist can be played from the first segment on
+        hls_dir = None
+        urls = {}
+        if "hls" in deliverables:
+            hls_dir = os.path.join(export_dir, "hls")
+            shutil.rmtree(hls_dir, ignore_errors=True)
+            os.makedirs(hls_dir)
+            urls["hls_url"] = f"/hls/{data['videoFileName']}/{HLS_MASTER_PLAYLIST}"
+
+        # Include original audio and mixed audio as separate tracks, copying the original
+        # streams unless the container or codecs require re-encoding. The audio-only
+        # deliverables and the HLS package are encoded by the same run
+        progress_callback(20, "Encoding video...", **urls)
+        mux_description_track(
+            video_path,
+            mixed_audio_path,
+            subtitle_paths["srt"],
+            output_path,
+            stream_copy=manifest["stream_copy"],
+            media=media,
+            progress_callback=lambda fraction: progress_callback(20 + 75 * fraction),
+            audio_outputs=audio_outputs,
+            hls_dir=hls_dir,
+        )
+
+        result = {"video_url": f"/download_video/{os.path.basename(output_path)}", **urls}
+        for name, path in subtitle_paths.items():
+            result[f"{name}_url"] = f"/download_srt/{os.path.basename(path)}"
+        for name, path in audio_outputs.items():
+            result[f"{name}_url"] = f"/download_audio/{os.path.basename(path)}"
+        manifest["outputs"] = [output_path, *subtitle_paths.values(), *audio_outputs.values()]
+        if hls_dir:
+            manifest["outputs"].append(os.path.join(hls_dir, HLS_MASTER_PLAYLIST))
+        manifest["result"] = result
+        save_manifest(export_dir, manifest)
+        return result
 
 @app.route("/encode-video-with-subtitles", methods=["POST"])
 def encode_video_with_subtitles():
@@ -451,136 +697,113 @@ def encode_video_with_subtitles():
     Encode a video by merging audio tracks and embedding subtitles.
 
     This endpoint processes the provided video, audio files, and subtitle data to generate a final
-    processed video file with embedded subtitles. It returns URLs for the processed video and SRT files.
+    processed video file with embedded subtitles (see _export_video). It returns URLs for the
+    processed video and SRT files once the export has finished; use /export-jobs to run long
+    exports in the background instead.
 
     Returns:
         Response: A JSON response containing download URLs for the processed video, SRT file, and talking SRT file.
     """
     try:
         data = request.get_json()
-        required_fields = ["descriptions", "timestamps", "audioFiles", "videoFileName"]
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({"error": f"Missing {field}"}), 400
-
-        filtered_segments = []
-        combined_segments = []
-        audio_index = 0
-        for i, (desc, (start, end)) in enumerate(
-            zip(data["descriptions"], data["timestamps"])
-        ):
-            segment = {"start": start, "end": end, "description": desc}
-            if desc.strip().upper() == "TALKING":
-                combined_segments.append(segment)
-            else:
-                audio_file = data["audioFiles"][audio_index]
-                audio_index += 1
-                segment["audio"] = audio_file
-                filtered_segments.append(segment)
-                combined_segments.append(segment)
-
-        srt_content = []
-        for i, seg in enumerate(filtered_segments, 1):
-            start_srt = milliseconds_to_srt_time(seg["start"])
-            end_srt = milliseconds_to_srt_time(seg["end"])
-            srt_content.append(f"{i}\n{start_srt} --> {end_srt}\n{seg['description']}\n")
-
-        talking_srt_content = []
-        for i, seg in enumerate(combined_segments, 1):
-            start_srt = milliseconds_to_srt_time(seg["start"])
-            end_srt = milliseconds_to_srt_time(seg["end"])
-            talking_srt_content.append(
-                f"{i}\n{start_srt} --> {end_srt}\n{seg['description']}\n"
-            )
-
-        # Audio processing with millisecond precision
-        audio_clips = []
-        start_times = []
-        for seg in filtered_segments:
-            # Handle audio duration matching
-            duration_ms = seg["end"] - seg["start"]
-            original_duration = get_audio_duration(seg["audio"]) * 1000
-
-            if original_duration > duration_ms:
-                speed_factor = original_duration / duration_ms
-                with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as f:
-                    temp_path = f.name
-                speed_up_audio(seg["audio"], speed_factor, temp_path)
-                audio_clips.append(temp_path)
-            else:
-                audio_clips.append(seg["audio"])
-
-            start_times.append(seg["start"] / 1000)  # Convert ms to seconds
-
-        output_filename = f"processed_{data['videoFileName']}"
-        output_path = os.path.join(PROCESSED_FOLDER, output_filename)
-
-        # Create mixed audio and subtitle files
-        mixed_audio_path = _create_mixed_audio(audio_clips, start_times)
-        srt_file_path = _create_temp_file(srt_content)
-        talking_srt_file_path = _create_temp_file(talking_srt_content)
-
-        # FFmpeg command to include original audio and mixed audio as separate tracks
-        subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                os.path.join(UPLOAD_FOLDER, data["videoFileName"]),  # Original video
-                "-i",
-                mixed_audio_path,  # Mixed audio
-                "-i",
-                srt_file_path,  # Subtitles
-                "-map",
-                "0:v:0",  # Video from the first input
-                "-map",
-                "0:a:0",  # Original audio from the first input
-                "-map",
-                "1:a:0",  # Mixed audio from the second input
-                "-map",
-                "2:s:0",  # Subtitles from the third input
-                "-c:v",
-                "libx264",
-                "-c:a",
-                "aac",
-                "-c:s",
-                "mov_text",  # Use mov_text for subtitles in MP4
-                output_path,
-            ],
-            check=True,
-        )
-
-        unique_id = str(uuid.uuid4())[:8]
-        video_name = os.path.splitext(data["videoFileName"])[0]
-        srt_filename = f"srt_{video_name}_{unique_id}.srt"
-        talking_srt_filename = f"talking_srt_{video_name}_{unique_id}.srt"
-        srt_filepath = os.path.join(SRT_FOLDER, srt_filename)
-        talking_srt_filepath = os.path.join(SRT_FOLDER, talking_srt_filename)
-
-        with open(srt_file_path, "r") as temp_srt_file:
-            srt_content = temp_srt_file.read()
-        with open(srt_filepath, "w") as f:
-            f.write(srt_content)
-
-        with open(talking_srt_file_path, "r") as temp_talking_srt_file:
-            talking_srt_content = temp_talking_srt_file.read()
-        with open(talking_srt_filepath, "w") as f:
-            f.write(talking_srt_content)
-
-        video_url = f"/download_video/{os.path.basename(output_path)}"
-        srt_url = f"/download_srt/{os.path.basename(srt_filepath)}"
-        talking_srt_url = f"/download_srt/{os.path.basename(talking_srt_filepath)}"
-
-        return jsonify(
-            {
-                "video_url": video_url,
-                "srt_url": srt_url,
-                "talking_srt_url": talking_srt_url,
-            }
-        )
+        error = _validate_export_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+        return jsonify(_export_video(data))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/export-jobs", methods=["POST"])
+def create_export_job():
+    """
+    Start an export in the background.
+
+    Accepts the same JSON payload as /encode-video-with-subtitles and returns at once with the
+    id of the job. Its progress and, once finished, its result URLs are available from
+    /export-jobs/<job_id> and /export-jobs/<job_id>/events.
+
+    Returns:
+        Response: A JSON response with the job id and its status and events URLs (HTTP 202).
+    """
+    data = request.get_json(silent=True)
+    error = _validate_export_request(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    job_id = export_jobs.submit(_export_video, data)
+    return jsonify({
+        "job_id": job_id,
+        "status_url": f"/export-jobs/{job_id}",
+        "events_url": f"/export-jobs/{job_id}/events",
+    }), 202
+
+@app.route("/export-jobs/<job_id>", methods=["GET"])
+def get_export_job(job_id):
+    """
+    Get the current state of an export job.
+
+    Args:
+        job_id (str): The job id.
+
+    Returns:
+        Response: A JSON response with the status ("queued", "running", "done" or "error"),
+                  the progress percentage, and the result URLs or error once finished.
+    """
+    status = export_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
+
+@app.route("/export-jobs/<job_id>/events", methods=["GET"])
+def stream_export_job(job_id):
+    """
+    Stream the progress events of an export job until it has finished (see _stream_job_events).
+
+    Args:
+        job_id (str): The job id.
+
+    Returns:
+        Response: A streaming response with one event per progress update.
+    """
+    return _stream_job_events(export_jobs, job_id)
+
+def _stream_job_events(jobs, job_id):
+    """
+    Stream the events of a job from an ExportJobs or JobQueue registry.
+
+    Events are sent as NDJSON by default, or as Server-Sent Events when the client accepts
+    text/event-stream (or passes ?format=sse). SSE clients that reconnect resume after the
+    last event they received (Last-Event-ID); ?since=<index> does the same for NDJSON.
+
+    Args:
+        jobs (ExportJobs or JobQueue): The job registry.
+        job_id (str): The job id.
+
+    Returns:
+        Response: A streaming response with one event per progress update, or a 404 response.
+    """
+    if jobs.status(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    use_sse = request.args.get("format") == "sse" or "text/event-stream" in request.headers.get("Accept", "")
+    last_event_id = request.headers.get("Last-Event-ID")
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else request.args.get("since", 0, type=int)
+
+    def generate():
+        for event in jobs.events(job_id, start=start):
+            if use_sse:
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"id: {event['index']}\nevent: {event['status']}\ndata: {json.dumps(event)}\n\n"
+            elif event is not None:
+                yield json.dumps(event) + "\n"
+
+    if use_sse:
+        return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
 @app.route("/download_video/<filename>")
 def download_video(filename):
     """
@@ -592,12 +815,41 @@ def download_video(filename):
     Returns:
         Response: A Flask response for downloading the video file.
     """
-    filepath = os.path.join(PROCESSED_FOLDER, filename)
-    if not os.path.exists(filepath):
+    if not os.path.isfile(os.path.join(PROCESSED_FOLDER, filename)):
         return "Video file not found", 404
-    response = make_response(send_from_directory(PROCESSED_FOLDER, filename, as_attachment=True, mimetype='video/mp4'))
-    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+    return send_artifact(PROCESSED_FOLDER, filename, mimetype="video/mp4", as_attachment=True)
+
+@app.route("/hls/<video_name>/<path:filename>")
+def get_hls_file(video_name, filename):
+    """
+    Serve a playlist or segment of a video's HLS export.
+
+    Everything is revalidated with its ETag: playlists grow while the export is running, and
+    a new export of the video rewrites the segments.
+
+    Args:
+        video_name (str): The exported video's file name.
+        filename (str): Path of the playlist or segment inside the HLS package.
+
+    Returns:
+        Response: The playlist or segment.
+    """
+    hls_dir = os.path.join(EXPORTS_FOLDER, video_name, "hls")
+    return send_artifact(hls_dir, filename, mimetype=HLS_MIMETYPES.get(os.path.splitext(filename)[1]))
+
+@app.route("/download_audio/<filename>")
+def download_audio(filename):
+    """
+    Download an audio-only export deliverable (description track or mix).
+
+    Args:
+        filename (str): The name of the audio file.
+
+    Returns:
+        Response: A Flask response for downloading the audio file.
+    """
+    mimetype = "audio/ogg" if filename.endswith(".opus") else "audio/mp4"
+    return send_artifact(PROCESSED_FOLDER, filename, mimetype=mimetype, as_attachment=True)
 
 @app.route("/download_srt/<filename>")
 def download_srt(filename):
@@ -608,51 +860,53 @@ def download_srt(filename):
         filename (str): The name of the SRT file.
 
     Returns:
-        Response: A Flask response for downloading the SRT file.
+        Response: A Flask response for downloading the SRT file. Every export writes subtitle
+            files under new names, so they are cacheable for good.
     """
-    response = make_response(send_from_directory(SRT_FOLDER, filename, as_attachment=True))
-    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+    return send_artifact(SRT_FOLDER, filename, as_attachment=True, immutable=True)
 
-def _create_mixed_audio(audio_files, start_times):
+def _create_mixed_audio(audio_files, start_times, max_durations=None, output=None, duration=None):
     """
-    Mix multiple audio clips with specified start delays using FFmpeg.
+    Render multiple audio clips at their start times into one audio description track.
+
+    The clips are decoded once, fitted to their time slot and summed into a PCM buffer
+    (see audio_processing.render_track). The track length is computed up front from the
+    cached clip durations, so the buffer is allocated once. The track is written as WAV,
+    so the final mux is the only lossy encode.
 
     Args:
         audio_files (list): List of audio file paths.
         start_times (list): List of start times (in seconds) for each audio clip.
+        max_durations (list, optional): Time (in seconds) available to each audio clip. Defaults to None.
+        output (str, optional): Path of the WAV file to write. Defaults to a new, uniquely named
+            WAV file in the temp folder.
+        duration (float, optional): Minimum track length in seconds, e.g. the video duration. Defaults to None.
 
     Returns:
         str: The path to the mixed audio file.
     """
-    inputs = []
-    filter_chains = []
-    
-    for i, (file, start) in enumerate(zip(audio_files, start_times)):
-        inputs.extend(["-i", file])
-        filter_chains.append(
-            f"[{i}:a]adelay={int(start*1000)}|{int(start*1000)}[a{i}];"
-        )
-    
-    filter_complex = "".join(filter_chains)
-    filter_complex += f"{''.join([f'[a{i}]' for i in range(len(audio_files))])}amix=inputs={len(audio_files)}[aout]"
-    
-    output = os.path.join(tempfile.gettempdir(), "mixed_audio.mp3")
-    subprocess.run([
-        "ffmpeg", "-y",
-        *inputs,
-        "-filter_complex", filter_complex,
-        "-map", "[aout]",
-        output
-    ], check=True)
-    return output
+    durations = get_audio_durations(audio_files)
+    slots = max_durations or [None] * len(audio_files)
+    track_duration = max(
+        (start + min(clip_duration, slot or clip_duration)
+         for start, clip_duration, slot in zip(start_times, durations, slots) if clip_duration is not None),
+        default=duration,
+    )
+    if duration:
+        track_duration = max(track_duration, duration)
+
+    if output is None:
+        fd, output = tempfile.mkstemp(prefix="mixed_audio_", suffix=".wav")
+        os.close(fd)
+    return render_track(zip(audio_files, start_times), output, duration=track_duration, max_durations=max_durations)
 
 @app.route("/get-video", methods=["GET"])
 def get_video():
     """
     Retrieve a video file for download.
 
-    This endpoint returns the specified video file from the uploads folder.
+    This endpoint returns the specified video file from the uploads folder. A new upload under
+    the same name changes its ETag, so clients revalidate instead of re-downloading it.
 
     Returns:
         Response: A Flask response for downloading the video file.
@@ -665,33 +919,32 @@ def get_video():
     if not os.path.exists(video_path):
         return jsonify({"error": "Video not found"}), 404
 
-    try:
-        mimetype, _ = mimetypes.guess_type(video_path)
-        response = make_response(send_file(
-            video_path,
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=video_name
-        ))
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-        return response
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return send_artifact(UPLOAD_FOLDER, video_name, as_attachment=True)
 
 
 @app.route("/check-video", methods=["GET"])
 def check_video():
     """
-    Check if a video file exists on the server.
+    Check if a video file exists on the server, by its name or by the SHA-256 of its content.
+
+    Checking the hash before uploading lets clients skip uploading videos the server has already.
 
     Returns:
-        JSON: A JSON response indicating whether the video exists.
+        JSON: A JSON response indicating whether the video exists and, when looked up by hash,
+              its "video_name" in the upload store.
     """
+    if request.args.get("sha256"):
+        sha256 = parse_sha256(request.args["sha256"])
+        if sha256 is None:
+            return jsonify({"error": "sha256 must be a hex SHA-256 digest"}), 400
+        video_name = video_store.find(sha256)
+        if video_name is None:
+            return jsonify({"exists": False}), 404
+        return jsonify({"exists": True, "video_name": video_name}), 200
+
     video_name = request.args.get("videoName")
     if not video_name:
-        return jsonify({"error": "Video name is required"}), 400
+        return jsonify({"error": "Video name or sha256 is required"}), 400
 
     video_path = os.path.join(UPLOAD_FOLDER, video_name)
     if os.path.exists(video_path):
@@ -699,33 +952,156 @@ def check_video():
     else:
         return jsonify({"exists": False}), 404
     
+@app.route("/uploads", methods=["POST"])
+def create_upload():
+    """
+    Start a chunked, resumable video upload.
+
+    Expects a JSON payload with the file name ("filename") and its size in bytes ("size"). The
+    chunks are then sent in order with PATCH /uploads/<upload_id>, each at most
+    MAX_CONTENT_LENGTH bytes. Videos larger than MAX_CONTENT_LENGTH can only be uploaded this way.
+
+    Returns:
+        Response: A JSON response with the upload status (see get_upload) and its "upload_url"
+                  (HTTP 201), or an error if the payload is invalid.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        status = uploads.create(data.get("filename"), data.get("size"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({**status, "upload_url": f"/uploads/{status['upload_id']}"}), 201
+
+@app.route("/uploads/<upload_id>", methods=["GET"])
+def get_upload(upload_id):
+    """
+    Get the state of a chunked upload, e.g. to find where to resume after a broken connection.
+
+    Args:
+        upload_id (str): The upload id.
+
+    Returns:
+        Response: A JSON response with the bytes received so far ("offset"), the total "size",
+                  "complete", the probed "media" codecs and duration (known once the container
+                  headers have arrived) and, once complete, its "sha256" and "video_name" (to pass
+                  to /process-video) and the "status" and, once written, "path" of its analysis
+                  "proxy".
+    """
+    status = uploads.status(upload_id)
+    if status is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(status)
+
+@app.route("/uploads/<upload_id>", methods=["PATCH"])
+def append_upload(upload_id):
+    """
+    Append a chunk to a chunked upload.
+
+    The request body is the chunk and the Upload-Offset header its position in the file, which
+    must be the current "offset" of the upload. The chunk is streamed to disk while the upload
+    is hashed and probed; once the probe succeeds, the analysis proxy is encoded from the
+    partial file in the background, so none of these waits for the whole video and the
+    chunk never waits for the encoder.
+
+    Args:
+        upload_id (str): The upload id.
+
+    Returns:
+        Response: A JSON response with the upload status after the chunk (see get_upload), or an
+                  error: 404 for an unknown upload, 409 with the expected "offset" if the chunk does
+                  not start there, 413 if it goes beyond the announced size.
+    """
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+
+    try:
+        status = uploads.write(upload_id, offset, request.stream)
+    except OffsetMismatch as e:
+        return jsonify({"error": str(e), "offset": e.offset}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 413
+    if status is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(status)
+
 @app.route("/process-video", methods=["POST"])
 def process_video():
     """
     Process an uploaded video to extract scenes, generate descriptions, and produce a processed video with subtitles and mixed audio.
 
-    This endpoint handles video upload, processing, and returns progress updates via a streaming response.
+    This endpoint handles the video upload (or takes the "videoName" or "sha256" of a video uploaded
+    before, e.g. with /uploads), queues the processing as a durable job, and returns its
+    progress updates via a streaming response. The first update carries the job id and the
+    video's content name in the upload store; the job keeps running if the client disconnects,
+    and /process-jobs/<job_id>/events resumes following it. Submitting a video that has been
+    processed already replays the existing job's results without processing it again.
+
+    Besides the stage percentages, updates carry the "segments" (index, start, end and type of every
+    segment) as soon as the video is segmented, then a "segment" update (index, description,
+    scene_file and, once synthesized, audio_file) whenever a description or its audio completes,
+    so the editor can show and play the first scenes while the rest is processed. The final
+    update still carries all results.
     
     Returns:
         Response: A streaming JSON response with progress updates.
     """
     print("Processing video request received")
 
-    # Check if video file is present
-    if "video" not in request.files:
-        return jsonify({"error": "No video file provided"}), 400
-
     # Setup directories
     setup()
-    video_file = request.files["video"]
-    action = request.form.get("action")
 
-    # Save uploaded video
-    video_path = os.path.join(UPLOAD_FOLDER, video_file.filename)
-    video_file.save(video_path)
+    # The video is in the request, or was uploaded before (with /uploads or an earlier request)
+    # and is referred to by its name or by the hash of its content
+    video_file = request.files.get("video")
+    if video_file:
+        # Hashed while it is saved; a video that is stored already is not stored again
+        video_name = video_store.save(video_file.stream, secure_filename(video_file.filename or ""))
+    elif request.form.get("sha256"):
+        sha256 = parse_sha256(request.form["sha256"])
+        if sha256 is None:
+            return jsonify({"error": "sha256 must be a hex SHA-256 digest"}), 400
+        video_name = video_store.find(sha256)
+    elif request.form.get("videoName"):
+        video_name = video_store.content_name(request.form["videoName"])
+    else:
+        return jsonify({"error": "No video file provided"}), 400
+    if video_name is None:
+        return jsonify({"error": "Video not found"}), 404
+
+    action = request.form.get("action")
+    engine = request.form.get("engine")
+    video_path = os.path.join(UPLOAD_FOLDER, video_name)
 
     print(f"Processing video: {video_path} with action: {action}")
 
+    if action != "new_gemini":
+        return Response(json.dumps({"error": "Invalid action specified"}) + "\n", mimetype="application/x-ndjson")
+
+    # Processing is idempotent: a video that was processed (or is being processed) with the same
+    # engine follows that job again, as long as its scene clips are kept, instead of running the
+    # pipeline a second time. A failed job is retried and resumes from its checkpoints.
+    job_key = f"process-video:{os.path.splitext(video_name)[0]}:{engine or TTS_ENGINE}"
+    job = process_jobs.find(job_key)
+    if _is_reusable_process_job(job):
+        job_id = job["job_id"]
+        if job["status"] == "error":
+            process_jobs.retry(job_id)
+    else:
+        # Every job cuts its scenes into its own workspace, kept for WORKSPACE_RETENTION_SECONDS
+        # so the editor can keep loading the scene clips
+        workspace = workspaces.create("process-video", video=video_name)
+
+        # The pipeline runs in a job worker process (see video_pipeline.process_video), so it
+        # survives client disconnects and server restarts; this response only follows its events
+        job_id = process_jobs.submit("process-video", {
+            "video_path": video_path,
+            "workspace": workspace.path,
+            "audio_folder": AUDIO_FOLDER,
+            "engine": engine,
+        }, key=job_key)
+
     def generate():
         """
         Generator function to yield progress updates during video processing.
@@ -733,115 +1109,114 @@ def process_video():
         Yields:
             str: JSON-formatted progress updates.
         """
-        try:
-            if action != "new_gemini":
-                yield json.dumps({"error": "Invalid action specified"}) + "\n"
-                return
+        yield json.dumps({
+            "progress": 0,
+            "job_id": job_id,
+            "video_name": video_name,
+            "status_url": f"/process-jobs/{job_id}",
+            "events_url": f"/process-jobs/{job_id}/events",
+        }) + "\n"
+        for event in process_jobs.events(job_id):
+            if event is None or event["status"] == "queued":
+                continue
+            if event["status"] == "done":
+                yield json.dumps({"progress": 100, **event["result"]}) + "\n"
+            elif event["status"] == "error":
+                yield json.dumps({
+                    "error": f"Processing error: {event['error']}",
+                    "progress": -1
+                }) + "\n"
+            elif event["progress"] > 0:
+                # Segment events let the editor show each scene before the whole video is processed
+                yield json.dumps({
+                    "progress": event["progress"],
+                    "message": event.get("message"),
+                    **{field: event[field] for field in ("segments", "segment") if field in event}
+                }) + "\n"
 
-            # 1. Generate video summary (10%)
-            yield json.dumps({
-                "progress": 10,
-                "message": "Analyzing video content..."
-            }) + "\n"
-            video_summary = rg.get_video_summary_with_gemini(video_path)
+    # Return streaming response with correct mimetype
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
-            # 2. Detect scene changes (20%)
-            yield json.dumps({
-                "progress": 20,
-                "message": "Detecting scene changes..."
-            }) + "\n"
-            timestamps = rg.get_video_scenes_with_gemini(video_path)
+def _is_reusable_process_job(job):
+    """
+    Check whether a /process-video job can be followed again instead of processing its video anew.
 
-            # 3. Process timestamps (30%)
-            yield json.dumps({
-                "progress": 30,
-                "message": "Processing scene timestamps..."
-            }) + "\n"
-            combined_segments = rg.process_timestamps(timestamps)
+    Args:
+        job (dict or None): The job (see JobQueue.find).
 
-            # 4. Cut video into scenes (50%)
-            yield json.dumps({
-                "progress": 50,
-                "message": "Extracting video scenes..."
-            }) + "\n"
-            scene_output = rg.cut_video_by_no_talking(
-                video_path, combined_segments, SCENES_FOLDER
-            )
+    Returns:
+        bool: True if the job's workspace (with its scene clips) is still kept and, for a finished
+              job, all the description audio files of its result still exist.
+    """
+    if job is None or not os.path.isdir(job["payload"]["workspace"]):
+        return False
+    if job["status"] != "done":
+        return True
+    return all(os.path.exists(audio_file) for audio_file in job["result"]["data"]["audio_files"] if audio_file)
+
+@app.route("/process-jobs/<job_id>", methods=["GET"])
+def get_process_job(job_id):
+    """
+    Get the current state of a /process-video job.
 
-            # 5. Generate descriptions (70%)
-            yield json.dumps({
-                "progress": 70,
-                "message": "Generating scene descriptions..."
-            }) + "\n"
-            descriptions = rg.describe_existing_segments(
-                SCENES_FOLDER, scene_output, AUDIO_FOLDER, video_summary
-            )
+    Args:
+        job_id (str): The job id.
 
-            # 6. Format final response (90%)
-            yield json.dumps({
-                "progress": 90,
-                "message": "Finalizing results..."
-            }) + "\n"
-            response_data = rg.format_response_data(combined_segments, descriptions)
+    Returns:
+        Response: A JSON response with the status ("queued", "running", "done" or "error"),
+                  the progress percentage, and the result or error once finished.
+    """
+    status = process_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
 
-            # Completion (100%)
-            yield json.dumps({
-                "progress": 100,
-                "data": response_data,
-                "waveform_image": "./waveforms/waveform.png"
-            }) + "\n"
+@app.route("/process-jobs/<job_id>/retry", methods=["POST"])
+def retry_process_job(job_id):
+    """
+    Run a failed /process-video job again.
 
-        except Exception as e:
-            error_message = f"Processing error: {str(e)}"
-            print(f"Error: {error_message}\n{traceback.format_exc()}")
-            yield json.dumps({
-                "error": error_message,
-                "progress": -1
-            }) + "\n"
+    The pipeline resumes from its checkpoints (see video_pipeline.process_video), so finished
+    stages and scene descriptions are not redone.
 
-    # Return streaming response with correct mimetype
-    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    Args:
+        job_id (str): The job id.
 
-def speed_up_audio(input_path, speed_factor, output_path):
+    Returns:
+        Response: A JSON response with the job id and its status and events URLs (HTTP 202),
+                  or an error if the job does not exist or has not failed.
+    """
+    if process_jobs.status(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    if not process_jobs.retry(job_id):
+        return jsonify({"error": "Only failed jobs can be retried"}), 409
+    return jsonify({
+        "job_id": job_id,
+        "status_url": f"/process-jobs/{job_id}",
+        "events_url": f"/process-jobs/{job_id}/events",
+    }), 202
+
+@app.route("/process-jobs/<job_id>/events", methods=["GET"])
+def stream_process_job(job_id):
     """
-    Speed up an audio file using FFmpeg's atempo filter with chaining for factors > 2.0.
+    Stream the progress events of a /process-video job until it has finished (see _stream_job_events).
+
+    Clients that lost the /process-video response reconnect here.
 
     Args:
-        input_path (str): Path to the input audio file.
-        speed_factor (float): The factor by which to speed up the audio.
-        output_path (str): The path where the output audio file will be saved.
+        job_id (str): The job id.
 
     Returns:
-        None
+        Response: A streaming response with one event per progress update.
     """
-    if speed_factor < 1.0:
-        raise ValueError("Speed factor must be >= 1.0")
-    
-    atempo_filters = []
-    while speed_factor > 2.0:
-        atempo_filters.append("atempo=2.0")
-        speed_factor /= 2.0
-    if speed_factor != 1.0:
-        atempo_filters.append(f"atempo={speed_factor}")
-    
-    if not atempo_filters:
-        # No speed change needed, copy the file
-        subprocess.run(["ffmpeg", "-y", "-i", input_path, "-c", "copy", output_path], check=True)
-        return
-
-    filter_str = ",".join(atempo_filters)
-    subprocess.run([
-        "ffmpeg", "-y",
-        "-i", input_path,
-        "-filter:a", filter_str,
-        "-c:a", "libmp3lame",
-        "-q:a", "2",
-        output_path
-    ], check=True)
+    return _stream_job_events(process_jobs, job_id)
 
 def get_audio_duration(file_path):
     """
-    Get the duration of an audio file in seconds using ffprobe.
+    Get the duration of an audio file in seconds.
+
+    WAV and MP3 headers are parsed in-process and the result is cached against the file's
+    TTS cache entry; other formats are probed with FFmpeg (see tts_cache.get_audio_durations).
 
     Args:
         file_path (str): Path to the audio file.
@@ -849,17 +1224,10 @@ def get_audio_duration(file_path):
     Returns:
         float: Duration of the audio in seconds.
     """
-    cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        file_path
-    ]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to get audio duration: {result.stderr}")
-    return float(result.stdout.strip())
+    duration = get_audio_durations([file_path])[0]
+    if duration is None:
+        raise RuntimeError(f"Failed to get audio duration: {file_path}")
+    return duration
 
 
 def timestamp_to_seconds(ms):
@@ -909,7 +1277,7 @@ def cleanup_temp_files(paths):
 
 def combine_audio_with_delays(audio_files, seconds_list, output_file):
     """
-    Combine multiple audio files with specified delay offsets using FFmpeg.
+    Combine multiple audio files with specified delay offsets into one audio file.
 
     Args:
         audio_files (list): List of audio file paths.
@@ -922,21 +1290,7 @@ def combine_audio_with_delays(audio_files, seconds_list, output_file):
     if len(audio_files) != len(seconds_list):
         raise ValueError("The number of audio files must match the number of delay values.")
 
-    filter_complex = ""
-    inputs = []
-    for i, (audio_file, delay) in enumerate(zip(audio_files, seconds_list)):
-        inputs.extend(["-i", audio_file])
-        filter_complex += f"[{i}:a]adelay={int(delay * 1000)}|{int(delay * 1000)}[a{i}];"
-
-    filter_complex += "".join([f"[a{i}]" for i in range(len(audio_files))]) + f"amix=inputs={len(audio_files)}:duration=longest[aout]"
-
-    subprocess.run([
-        "ffmpeg",
-        *inputs,
-        "-filter_complex", filter_complex,
-        "-map", "[aout]",
-        output_file
-    ], check=True)
+    render_track(zip(audio_files, seconds_list), output_file)
 
 def generate_srt_file(descriptions, timestamps):
     """
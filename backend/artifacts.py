@@ -0,0 +1,171 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import safe_join
+
+from config import ARTIFACT_HASH_CACHE_SIZE
+from upload_store import SHA256_PATTERN
+
+# Cache lifetime of artifacts whose URL never points to different content
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+HASH_BLOCK_SIZE = 1024 * 1024
+INLINE_HASH_MAX_BYTES = 4 * 1024 * 1024  # Larger files are hashed in the background
+
+
+class ContentHashes:
+    """
+    Memoized SHA-256 hashes of artifact files, computed in the background.
+
+    A hash is reused as long as the file keeps its inode, size and modification time, so
+    each file is read once per change instead of on every request. Small files are hashed
+    when first requested; larger ones on a background thread, so a request never waits
+    for a large file to be read.
+    """
+
+    def __init__(self, max_entries=ARTIFACT_HASH_CACHE_SIZE, inline_max_bytes=INLINE_HASH_MAX_BYTES):
+        """
+        Initialize the hash cache.
+
+        Args:
+            max_entries (int, optional): Number of files whose hash is remembered (least
+                recently used first out). Defaults to ARTIFACT_HASH_CACHE_SIZE.
+            inline_max_bytes (int, optional): Largest file hashed while the request waits.
+                Defaults to INLINE_HASH_MAX_BYTES.
+        """
+        self.max_entries = max_entries
+        self.inline_max_bytes = inline_max_bytes
+        self._hashes = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def get(self, path, stat):
+        """
+        Return the hash of a file's content if it is known, starting to compute it otherwise.
+
+        Args:
+            path (str): Path to the file.
+            stat (os.stat_result): The file's current status.
+
+        Returns:
+            str or None: The hex SHA-256 digest, or None while it is being computed.
+        """
+        key = (path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._hashes:
+                self._hashes.move_to_end(key)
+                return self._hashes[key]
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+
+        if stat.st_size <= self.inline_max_bytes:
+            return self._compute(key)
+        threading.Thread(target=self._compute, args=(key,), daemon=True).start()
+        return None
+
+    def _compute(self, key):
+        """
+        Hash a file and remember the result.
+
+        Args:
+            key (tuple): The file's path, inode, size and modification time.
+
+        Returns:
+            str or None: The hex SHA-256 digest, or None if the file could not be read.
+        """
+        path = key[0]
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                    digest.update(block)
+        except OSError:
+            with self._lock:
+                self._pending.discard(key)
+            return None
+
+        content_hash = digest.hexdigest()
+        with self._lock:
+            self._pending.discard(key)
+            self._hashes[key] = content_hash
+            while len(self._hashes) > self.max_entries:
+                self._hashes.popitem(last=False)
+        return content_hash
+
+
+CONTENT_HASHES = ContentHashes()
+
+
+def artifact_etag(path):
+    """
+    Return a strong ETag for a file without reading it on the request path.
+
+    Files of the upload store are named after the SHA-256 of their content, so the hash is
+    taken from the (symlink-resolved) name. Other files are tagged with their content hash
+    once it is known, and with their inode, size and modification time until then.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: The ETag.
+    """
+    real_path = os.path.realpath(path)
+    content_name = os.path.splitext(os.path.basename(real_path))[0]
+    if SHA256_PATTERN.match(content_name):
+        return content_name
+
+    stat = os.stat(real_path)
+    content_hash = CONTENT_HASHES.get(real_path, stat)
+    if content_hash is not None:
+        return content_hash
+    return f"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def send_artifact(directory, filename, mimetype=None, as_attachment=False, download_name=None,
+                  immutable=False):
+    """
+    Serve a file with validators, byte-range support and cache headers.
+
+    The response carries a strong ETag of the file (see artifact_etag), and answers conditional
+    (If-None-Match) and Range/If-Range requests, so seeking in a video or fetching a file
+    again only transfers the missing bytes. The body is sent through the WSGI server's
+    file wrapper (sendfile where the server supports it), or left to the front proxy when
+    USE_X_SENDFILE is enabled.
+
+    Args:
+        directory (str): Directory the artifact is served from.
+        filename (str): Path of the artifact relative to directory; paths leaving it are rejected.
+        mimetype (str, optional): The content type. Defaults to a guess from the file name.
+        as_attachment (bool, optional): Serve as a download. Defaults to False.
+        download_name (str, optional): File name for downloads. Defaults to the file's name.
+        immutable (bool, optional): Whether the URL always refers to the same content (e.g.
+            content-addressed or uniquely named files), so clients may cache it for good.
+            Other artifacts must be revalidated with their ETag. Defaults to False.
+
+    Returns:
+        Response: The file response.
+
+    Raises:
+        NotFound: If the file does not exist or lies outside directory.
+    """
+    path = safe_join(os.path.abspath(directory), filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=artifact_etag(path),
+        max_age=IMMUTABLE_MAX_AGE if immutable else None,  # Without max_age: "no-cache"
+    )
+    if immutable:
+        response.cache_control.immutable = True
+    return response
@@ -0,0 +1,681 @@
+import os
+import re
+import subprocess
+import tempfile
+import wave
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import AUDIO_MAX_WORKERS
+
+DEFAULT_SAMPLE_RATE = 24000  # Native rate of gTTS output
+SILENCE_THRESHOLD_DB = -40.0  # RMS level (relative to full scale) treated as silence
+SILENCE_WINDOW = 0.01  # Seconds per RMS window when detecting silence
+SILENCE_PADDING = 0.02  # Seconds of silence kept before and after the speech
+MEMMAP_TRACK_SECONDS = 600.0  # Tracks longer than this are rendered into a memory-mapped buffer
+WRITE_BLOCK_SECONDS = 30.0  # Seconds of audio converted and written per block when encoding
+STRETCH_FRAME = 0.03  # Seconds per WSOLA frame
+STRETCH_TOLERANCE = 0.01  # Seconds a WSOLA frame may shift to find the best-aligned waveform
+STRETCH_DECIMATION = 4  # Subsampling of the coarse WSOLA alignment search
+PROBE_BATCH_SIZE = 64  # Files probed per FFmpeg invocation when headers cannot be parsed
+
+# MPEG audio frame header tables, indexed by the header's version and layer bits
+MP3_VERSIONS = {0: 2.5, 2: 2, 3: 1}  # 1 is reserved
+MP3_LAYERS = {1: 3, 2: 2, 3: 1}  # 0 is reserved
+MP3_BITRATES = {  # kbit/s by (version 1 or 2/2.5, layer)
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+
+def read_audio(path, sample_rate=None):
+    """
+    Decode an audio file into mono float32 samples in the range [-1, 1].
+
+    16-bit PCM WAV files are read in-process with the wave module. Every other format
+    (e.g. the MP3 files written by gTTS) is decoded once through an ffmpeg pipe.
+
+    Args:
+        path (str): Path to the audio file.
+        sample_rate (int, optional): Sample rate to decode to. WAV files keep their own rate
+            when None; other formats default to DEFAULT_SAMPLE_RATE.
+
+    Returns:
+        tuple: (samples, sample_rate), where samples is a 1-D numpy.ndarray of float32.
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file.
+    """
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as f:
+                if f.getsampwidth() == 2 and sample_rate in (None, f.getframerate()):
+                    channels = f.getnchannels()
+                    rate = f.getframerate()
+                    data = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+                    samples = data.reshape(-1, channels).mean(axis=1) / 32768.0
+                    return samples.astype(np.float32), rate
+        except wave.Error:
+            pass  # Not a plain PCM WAV file, let ffmpeg handle it
+
+    rate = sample_rate or DEFAULT_SAMPLE_RATE
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-acodec", "pcm_s16le",
+         "-ac", "1", "-ar", str(rate), "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg decode error: {result.stderr.decode()}")
+    samples = np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0
+    return samples, rate
+
+
+def _to_pcm16(samples):
+    """
+    Convert float samples in the range [-1, 1] to little-endian 16-bit PCM bytes.
+
+    Args:
+        samples (numpy.ndarray): The samples; values outside [-1, 1] are clipped.
+
+    Returns:
+        bytes: The PCM data.
+    """
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def write_wav(path, samples, sample_rate):
+    """
+    Write mono float samples to a 16-bit PCM WAV file.
+
+    Args:
+        path (str): Path of the WAV file to write.
+        samples (numpy.ndarray): Mono samples in the range [-1, 1].
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        None
+    """
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(_to_pcm16(samples))
+
+
+def trim_silence(samples, sample_rate, threshold_db=SILENCE_THRESHOLD_DB, padding=SILENCE_PADDING):
+    """
+    Remove leading and trailing silence from mono samples.
+
+    The signal is split into short windows and every window whose RMS level is below
+    the threshold counts as silence. A little padding is kept around the speech so
+    that word onsets and releases are not clipped.
+
+    Args:
+        samples (numpy.ndarray): Mono samples in the range [-1, 1].
+        sample_rate (int): Sample rate in Hz.
+        threshold_db (float, optional): Silence threshold in dBFS. Defaults to SILENCE_THRESHOLD_DB.
+        padding (float, optional): Seconds of silence to keep at each end. Defaults to SILENCE_PADDING.
+
+    Returns:
+        numpy.ndarray: The trimmed samples (a view of the input), empty if everything is silent.
+    """
+    window = max(1, int(sample_rate * SILENCE_WINDOW))
+    usable = len(samples) // window * window
+    if usable == 0:
+        return samples
+
+    rms = np.sqrt(np.mean(np.square(samples[:usable].reshape(-1, window)), axis=1))
+    loud = np.flatnonzero(rms > 10 ** (threshold_db / 20))
+    if len(loud) == 0:
+        return samples[:0]
+
+    pad = int(sample_rate * padding)
+    start = max(0, loud[0] * window - pad)
+    end = min(len(samples), (loud[-1] + 1) * window + pad)
+    return samples[start:end]
+
+
+def time_stretch(samples, sample_rate, speed_factor):
+    """
+    Speed up mono samples without changing their pitch.
+
+    Uses WSOLA (waveform similarity overlap-add): Hann-windowed frames are taken from the
+    input at speed_factor times the output hop and overlap-added. Each frame is shifted by up
+    to STRETCH_TOLERANCE so that it continues the waveform of the previous frame, which avoids
+    the phasing artifacts of plain overlap-add. The alignment is searched on a decimated signal
+    and refined at full rate, so the cost is a few small dot products per 15 ms of output.
+
+    Args:
+        samples (numpy.ndarray): Mono samples in the range [-1, 1].
+        sample_rate (int): Sample rate in Hz.
+        speed_factor (float): The factor by which to speed up the audio (>= 1.0).
+
+    Returns:
+        numpy.ndarray: The time-stretched samples (float32), len(samples) / speed_factor long.
+
+    Raises:
+        ValueError: If speed_factor is below 1.0.
+    """
+    if speed_factor < 1.0:
+        raise ValueError("Speed factor must be >= 1.0")
+    if speed_factor == 1.0:
+        return samples
+
+    samples = np.asarray(samples, dtype=np.float32)
+    output_length = int(round(len(samples) / speed_factor))
+    frame = int(sample_rate * STRETCH_FRAME) // 2 * 2
+    synthesis_hop = frame // 2
+    tolerance = int(sample_rate * STRETCH_TOLERANCE)
+    if len(samples) < 2 * frame:
+        # Too short to stretch; resampling a few milliseconds has no audible pitch change
+        positions = np.linspace(0, len(samples) - 1, output_length)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+    # Pad so every candidate frame (including the tolerance search) is in range
+    padded = np.concatenate([
+        np.zeros(tolerance, dtype=np.float32), samples,
+        np.zeros(frame + 2 * tolerance + synthesis_hop, dtype=np.float32),
+    ])
+    window = np.hanning(frame).astype(np.float32)
+    step = STRETCH_DECIMATION
+    frame_count = output_length // synthesis_hop + 1
+    output = np.zeros(frame_count * synthesis_hop + frame, dtype=np.float32)
+    weights = np.zeros_like(output)
+
+    position = tolerance  # Start of the current frame in padded
+    for index in range(frame_count):
+        out_start = index * synthesis_hop
+        output[out_start:out_start + frame] += padded[position:position + frame] * window
+        weights[out_start:out_start + frame] += window
+
+        # The natural continuation of this frame is what the next frame should match
+        target = padded[position + synthesis_hop:position + synthesis_hop + frame]
+        ideal = tolerance + int(round((index + 1) * synthesis_hop * speed_factor))
+        if ideal + tolerance + frame > len(padded):
+            break
+        region = padded[ideal - tolerance:ideal + tolerance + frame]
+        candidates = sliding_window_view(region, frame)
+        coarse = candidates[::step, ::step] @ target[::step]
+        best = int(np.argmax(coarse)) * step
+        low, high = max(0, best - step + 1), min(len(candidates), best + step)
+        fine = candidates[low:high] @ target
+        position = ideal - tolerance + low + int(np.argmax(fine))
+
+    weights[weights < 1e-3] = 1.0
+    return (output / weights)[:output_length]
+
+
+def fit_to_duration(samples, sample_rate, max_duration):
+    """
+    Speed up samples just enough to fit into max_duration seconds.
+
+    Args:
+        samples (numpy.ndarray): Mono samples in the range [-1, 1].
+        sample_rate (int): Sample rate in Hz.
+        max_duration (float): The available time in seconds.
+
+    Returns:
+        numpy.ndarray: The samples, time-stretched if they were too long.
+    """
+    duration = len(samples) / sample_rate
+    if max_duration <= 0 or duration <= max_duration:
+        return samples
+    fitted = time_stretch(samples, sample_rate, duration / max_duration)
+    return fitted[:int(max_duration * sample_rate)]
+
+
+def get_wav_duration(path):
+    """
+    Read the duration of a PCM WAV file from its header.
+
+    Args:
+        path (str): Path to the WAV file.
+
+    Returns:
+        float: Duration in seconds.
+    """
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+class _TrackBuffer:
+    """
+    Growable float32 mix buffer, held in memory or memory-mapped from a temporary file.
+    """
+
+    def __init__(self, length, memmap_threshold):
+        """
+        Allocate a silent buffer.
+
+        Args:
+            length (int): Initial length in samples.
+            memmap_threshold (int): Length in samples above which the buffer lives on disk.
+        """
+        self.length = 0
+        self._memmap_threshold = memmap_threshold
+        self._file = None
+        self._data = np.zeros(0, dtype=np.float32)
+        self._reserve(length)
+
+    def _reserve(self, length):
+        """
+        Grow the buffer to hold at least length samples, keeping its contents.
+
+        Args:
+            length (int): The required length in samples.
+
+        Returns:
+            None
+        """
+        if length <= len(self._data):
+            return
+        capacity = max(length, int(len(self._data) * 1.5))
+        if self._file is None and capacity > self._memmap_threshold:
+            self._file = tempfile.TemporaryFile(prefix="track_")
+            self._file.write(self._data.tobytes())
+        if self._file is None:
+            data = np.zeros(capacity, dtype=np.float32)
+            data[:len(self._data)] = self._data
+            self._data = data
+        else:
+            # Extending the file zero-fills the new region
+            self._data = None
+            self._file.truncate(capacity * 4)
+            self._data = np.memmap(self._file, dtype=np.float32, mode="r+", shape=(capacity,))
+
+    def mix(self, samples, offset):
+        """
+        Add samples to the buffer starting at offset, growing it if needed.
+
+        Args:
+            samples (numpy.ndarray): Mono samples in the range [-1, 1].
+            offset (int): Position of the first sample.
+
+        Returns:
+            None
+        """
+        end = offset + len(samples)
+        self._reserve(end)
+        self._data[offset:end] += samples
+        self.length = max(self.length, end)
+
+    def pad(self, length):
+        """
+        Extend the rendered length with silence to at least length samples.
+
+        Args:
+            length (int): The minimum length in samples.
+
+        Returns:
+            None
+        """
+        self._reserve(length)
+        self.length = max(self.length, length)
+
+    def blocks(self, block_size):
+        """
+        Yield the rendered samples in consecutive blocks.
+
+        Args:
+            block_size (int): Samples per block.
+
+        Yields:
+            numpy.ndarray: Views of the buffer.
+        """
+        for start in range(0, self.length, block_size):
+            yield self._data[start:min(start + block_size, self.length)]
+
+    def close(self):
+        """
+        Release the buffer and its backing file.
+
+        Returns:
+            None
+        """
+        self._data = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def decode_clip(audio_path, sample_rate=DEFAULT_SAMPLE_RATE, max_duration=None):
+    """
+    Decode a speech clip and make sure it fits into max_duration seconds.
+
+    Clips that are too long have their leading and trailing silence trimmed and are then
+    time-stretched in-process just enough to fit.
+
+    Args:
+        audio_path (str): Path to the audio clip.
+        sample_rate (int, optional): Sample rate to decode to. Defaults to DEFAULT_SAMPLE_RATE.
+        max_duration (float, optional): The available time in seconds. Defaults to None (no limit).
+
+    Returns:
+        numpy.ndarray: The mono samples.
+    """
+    samples, _ = read_audio(audio_path, sample_rate=sample_rate)
+    if max_duration and len(samples) > max_duration * sample_rate:
+        samples = fit_to_duration(trim_silence(samples, sample_rate), sample_rate, max_duration)
+    return samples
+
+
+def _decode_clips(clips, max_durations, sample_rate, max_workers):
+    """
+    Decode and fit clips on a worker pool, keeping only a bounded number in flight.
+
+    Args:
+        clips (iterable): (audio_path, start_seconds) pairs.
+        max_durations (list or None): Time in seconds available to each clip, in the order of clips.
+        sample_rate (int): Sample rate to decode to.
+        max_workers (int): Maximum number of clips decoded concurrently.
+
+    Yields:
+        tuple: (start_seconds, samples) in completion order.
+    """
+    clips = list(clips)
+    jobs = iter(zip(clips, max_durations or [None] * len(clips)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit_next():
+            for (audio_path, start), max_duration in jobs:
+                pending[executor.submit(decode_clip, audio_path, sample_rate, max_duration)] = start
+                return
+
+        # Keep a bounded number of clips in flight so memory does not grow with the video
+        for _ in range(2 * max_workers):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                start = pending.pop(future)
+                yield start, future.result()
+                submit_next()
+
+
+def render_track(clips, output_path, sample_rate=DEFAULT_SAMPLE_RATE, duration=None, max_durations=None,
+                 max_workers=AUDIO_MAX_WORKERS):
+    """
+    Render audio clips at their start times into a single audio track.
+
+    Each clip is decoded to PCM once (and fitted to its max_duration, see decode_clip) on a
+    worker pool, then added at its sample-accurate offset to a preallocated buffer, so the cost
+    grows linearly with the total audio length instead of with the size of an FFmpeg filter
+    graph. Overlapping clips are summed at their original volume (no 1/N scaling as with amix).
+    Tracks longer than MEMMAP_TRACK_SECONDS are rendered into a memory-mapped temporary file
+    instead of RAM, and only a few decoded clips are held in memory at a time.
+
+    The track is written directly when output_path is a .wav file, and otherwise encoded once
+    by piping the PCM through FFmpeg.
+
+    Args:
+        clips (iterable): (audio_path, start_seconds) pairs.
+        output_path (str): Path of the audio file to write.
+        sample_rate (int, optional): Sample rate of the track. Defaults to DEFAULT_SAMPLE_RATE.
+        duration (float, optional): Minimum track length in seconds, e.g. the video duration.
+            The track always extends to the end of the last clip. Defaults to None.
+        max_durations (list, optional): Time in seconds available to each clip, in the order of
+            clips. Defaults to None (clips are used as they are).
+        max_workers (int, optional): Maximum number of clips decoded concurrently.
+            Defaults to AUDIO_MAX_WORKERS.
+
+    Returns:
+        str: output_path.
+
+    Raises:
+        RuntimeError: If FFmpeg fails to decode a clip or encode the track.
+    """
+    min_length = int(round((duration or 0) * sample_rate))
+    buffer = _TrackBuffer(min_length, int(MEMMAP_TRACK_SECONDS * sample_rate))
+    try:
+        for start, samples in _decode_clips(clips, max_durations, sample_rate, max_workers):
+            buffer.mix(samples, int(round(start * sample_rate)))
+        buffer.pad(min_length)
+
+        block_size = int(WRITE_BLOCK_SECONDS * sample_rate)
+
+        if output_path.lower().endswith(".wav"):
+            with wave.open(output_path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(sample_rate)
+                for block in buffer.blocks(block_size):
+                    f.writeframes(_to_pcm16(block))
+            return output_path
+
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                ["ffmpeg", "-y", "-v", "error", "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1",
+                 "-ar", str(sample_rate), "-i", "-", output_path],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr,
+            )
+            try:
+                for block in buffer.blocks(block_size):
+                    process.stdin.write(_to_pcm16(block))
+            except BrokenPipeError:
+                pass  # FFmpeg exited early; its error is reported below
+            finally:
+                process.stdin.close()
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"FFmpeg encode error: {stderr.read().decode()}")
+        return output_path
+    finally:
+        buffer.close()
+
+
+def rerender_track_ranges(track_path, clips, ranges, max_durations=None, max_workers=AUDIO_MAX_WORKERS):
+    """
+    Re-render time ranges of a WAV track written by render_track, in place.
+
+    Every range is cleared and the clips starting inside it are mixed in again; the rest of
+    the track is left untouched, so the cost depends only on the length of the ranges.
+    Callers must choose ranges such that every clip overlapping a range lies completely
+    inside it.
+
+    Args:
+        track_path (str): Path to the 16-bit mono PCM WAV track.
+        clips (iterable): (audio_path, start_seconds) pairs of all clips of the new track.
+        ranges (list): (start_seconds, end_seconds) ranges to re-render.
+        max_durations (list, optional): Time in seconds available to each clip, in the order of
+            clips. Defaults to None.
+        max_workers (int, optional): Maximum number of clips decoded concurrently.
+            Defaults to AUDIO_MAX_WORKERS.
+
+    Returns:
+        bool: True if the track was updated, False if it cannot be updated in place (not a
+            16-bit mono WAV, or a range extends past its end). The file is unchanged then.
+    """
+    try:
+        with wave.open(track_path, "rb") as f:
+            if f.getnchannels() != 1 or f.getsampwidth() != 2:
+                return False
+            sample_rate, length = f.getframerate(), f.getnframes()
+    except (OSError, EOFError, wave.Error):
+        return False
+
+    spans = [(int(round(start * sample_rate)), int(round(end * sample_rate))) for start, end in ranges]
+    if any(end > length for _, end in spans):
+        return False
+
+    clips = list(clips)
+    max_durations = max_durations or [None] * len(clips)
+    selected = [index for index, (_, start) in enumerate(clips)
+                if any(a <= int(round(start * sample_rate)) < b for a, b in spans)]
+    buffers = [np.zeros(b - a, dtype=np.float32) for a, b in spans]
+    for start, samples in _decode_clips([clips[i] for i in selected], [max_durations[i] for i in selected],
+                                        sample_rate, max_workers):
+        offset = int(round(start * sample_rate))
+        for (a, b), buffer in zip(spans, buffers):
+            if a <= offset < b:
+                samples = samples[:b - offset]
+                buffer[offset - a:offset - a + len(samples)] += samples
+
+    # render_track writes the data chunk last, right after the header
+    pcm = np.memmap(track_path, dtype="<i2", mode="r+", offset=os.path.getsize(track_path) - length * 2,
+                    shape=(length,))
+    try:
+        for (a, b), buffer in zip(spans, buffers):
+            pcm[a:b] = np.frombuffer(_to_pcm16(buffer), dtype="<i2")
+        pcm.flush()
+    finally:
+        del pcm
+    return True
+
+
+def _parse_mp3_frame_header(data, offset):
+    """
+    Parse the MPEG audio frame header at offset.
+
+    Args:
+        data (bytes): The file contents.
+        offset (int): Position of the candidate header.
+
+    Returns:
+        tuple or None: (frame_length, samples_per_frame, sample_rate, version, channel_mode),
+            or None if there is no valid header at offset.
+    """
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = MP3_VERSIONS.get((data[offset + 1] >> 3) & 0x3)
+    layer = MP3_LAYERS.get((data[offset + 1] >> 1) & 0x3)
+    bitrate_index = data[offset + 2] >> 4
+    sample_rate_index = (data[offset + 2] >> 2) & 0x3
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # Reserved values, or free format which cannot be measured from headers
+
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (data[offset + 2] >> 1) & 0x1
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 576 if layer == 3 and version != 1 else 1152
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return frame_length, samples_per_frame, sample_rate, version, data[offset + 3] >> 6
+
+
+def get_mp3_duration(path):
+    """
+    Read the duration of an MP3 file without decoding it.
+
+    The duration is taken from a Xing/Info or VBRI header when the encoder wrote one, and
+    otherwise computed by walking the frame headers (the gTTS output has no such header).
+
+    Args:
+        path (str): Path to the MP3 file.
+
+    Returns:
+        float or None: Duration in seconds, or None if the file is not a parseable MP3.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    offset = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        # Skip the ID3v2 tag; its size is a 28-bit syncsafe integer
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        offset = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    # Find the first frame (some encoders leave junk before it)
+    header = None
+    for offset in range(offset, min(len(data), offset + 4096)):
+        header = _parse_mp3_frame_header(data, offset)
+        # Require another frame right after this one to rule out false sync words
+        if header and (offset + header[0] == len(data) or _parse_mp3_frame_header(data, offset + header[0])):
+            break
+        header = None
+    if header is None:
+        return None
+
+    frame_length, samples_per_frame, sample_rate, version, channel_mode = header
+    side_info = (17 if channel_mode == 3 else 32) if version == 1 else (9 if channel_mode == 3 else 17)
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info") and int.from_bytes(data[xing + 4:xing + 8], "big") & 0x1:
+        frames = int.from_bytes(data[xing + 8:xing + 12], "big")
+        return frames * samples_per_frame / sample_rate
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = int.from_bytes(data[vbri + 14:vbri + 18], "big")
+        return frames * samples_per_frame / sample_rate
+
+    samples = 0
+    while header:
+        samples += header[1]
+        offset += header[0]
+        header = _parse_mp3_frame_header(data, offset)
+    return samples / sample_rate
+
+
+def read_audio_duration(path):
+    """
+    Read the duration of a WAV or MP3 file from its headers, without decoding or subprocesses.
+
+    Args:
+        path (str): Path to the audio file.
+
+    Returns:
+        float or None: Duration in seconds, or None for other or unparseable formats.
+    """
+    extension = path.lower().rsplit(".", 1)[-1]
+    try:
+        if extension == "wav":
+            return get_wav_duration(path)
+        if extension == "mp3":
+            return get_mp3_duration(path)
+    except (OSError, EOFError, wave.Error):
+        pass
+    return None
+
+
+def probe_audio_durations(paths):
+    """
+    Get the durations of several audio files.
+
+    WAV and MP3 files are measured in-process from their headers. All remaining files are
+    probed together: FFmpeg is started once per PROBE_BATCH_SIZE files, with every file as an
+    input, and the durations are read from the input descriptions it prints.
+
+    Args:
+        paths (list): Paths to the audio files.
+
+    Returns:
+        list: Durations in seconds, in the order of paths; None where none could be determined.
+    """
+    durations = [read_audio_duration(path) for path in paths]
+    unknown = [index for index, duration in enumerate(durations) if duration is None]
+
+    while unknown:
+        batch, unknown = unknown[:PROBE_BATCH_SIZE], unknown[PROBE_BATCH_SIZE:]
+        command = ["ffmpeg", "-hide_banner", "-nostdin"]
+        for index in batch:
+            command.extend(["-i", paths[index]])
+        # Without an output file FFmpeg exits with an error after describing all inputs
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+        input_number = None
+        described = set()
+        for line in result.stderr.splitlines():
+            match = re.match(r"Input #(\d+)", line)
+            if match:
+                input_number = int(match.group(1))
+                described.add(input_number)
+                continue
+            match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", line)
+            if match and input_number is not None and input_number < len(batch):
+                hours, minutes, seconds = match.groups()
+                durations[batch[input_number]] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+        # FFmpeg stops at the first input it cannot open; probe the inputs after it again
+        failed = next((number for number in range(len(batch)) if number not in described), None)
+        if failed is not None:
+            unknown = batch[failed + 1:] + unknown
+    return durations
@@ -0,0 +1,342 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import traceback
+
+from benchmarks.synthetic_videos import RESOLUTIONS, generate_corpus
+
+DEFAULT_TOLERANCE = 0.5  # Seconds between a detected and a ground-truth transition
+
+
+def match_events(predicted, truth, tolerance=DEFAULT_TOLERANCE):
+    """
+    Greedily match predicted event times to ground-truth event times.
+
+    Each ground-truth event can be matched by at most one prediction, and a prediction
+    only matches when it lies within the tolerance of the event.
+
+    Args:
+        predicted (list): Predicted event times in seconds.
+        truth (list): Ground-truth event times in seconds.
+        tolerance (float, optional): Maximum distance in seconds for a match.
+                                     Defaults to DEFAULT_TOLERANCE.
+
+    Returns:
+        tuple: The number of true positives, false positives and false negatives.
+    """
+    unmatched = sorted(truth)
+    true_positives = 0
+
+    for time_s in sorted(predicted):
+        best = None
+        for candidate in unmatched:
+            distance = abs(candidate - time_s)
+            if distance <= tolerance and (best is None or distance < abs(best - time_s)):
+                best = candidate
+        if best is not None:
+            unmatched.remove(best)
+            true_positives += 1
+
+    return true_positives, len(predicted) - true_positives, len(unmatched)
+
+
+def precision_recall(true_positives, false_positives, false_negatives):
+    """
+    Compute precision and recall, treating empty prediction or truth sets as perfect.
+
+    Args:
+        true_positives (int): Number of matched predictions.
+        false_positives (int): Number of unmatched predictions.
+        false_negatives (int): Number of unmatched ground-truth events.
+
+    Returns:
+        tuple: Precision and recall as floats between 0 and 1.
+    """
+    predicted = true_positives + false_positives
+    relevant = true_positives + false_negatives
+    precision = true_positives / predicted if predicted else 1.0
+    recall = true_positives / relevant if relevant else 1.0
+    return precision, recall
+
+
+def _timecode_to_seconds(timecode):
+    """
+    Convert a "HH:MM:SS[.fff]" timecode string to seconds.
+
+    Args:
+        timecode (str): Timecode string.
+
+    Returns:
+        float: The timecode in seconds.
+    """
+    hours, minutes, seconds = timecode.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def run_ssim_histogram(video_path, fps, frames_per_second=2, ssim_threshold=0.3,
+                       hist_threshold=0.4):
+    """
+    Run the frame extraction plus SSIM/histogram detector on a video.
+
+    The default parameters match the ones used by the original frame-based pipeline.
+
+    Args:
+        video_path (str): Path to the video file.
+        fps (float): Frame rate of the video, used to convert frame numbers to seconds.
+        frames_per_second (int, optional): Sampling rate for frame extraction. Defaults to 2.
+        ssim_threshold (float, optional): SSIM threshold. Defaults to 0.3.
+        hist_threshold (float, optional): Histogram correlation threshold. Defaults to 0.4.
+
+    Returns:
+        list: Detected transition times in seconds.
+    """
+    import openAI_images.video_to_frames as vtf
+    import openAI_images.detect_scene_changes as dsc
+
+    frames_dir = tempfile.mkdtemp(prefix="bench_frames_")
+    try:
+        vtf.extract_frames_from_video(video_path, frames_dir, frames_per_second)
+        scene_changes = dsc.detect_scene_changes(frames_dir, ssim_threshold, hist_threshold)
+    finally:
+        shutil.rmtree(frames_dir, ignore_errors=True)
+
+    # The first entry is always the first frame and is not a transition.
+    return [dsc.numeric_sort_key(frame) / fps for frame in scene_changes[1:]]
+
+
+def run_pyscenedetect(video_path, fps):
+    """
+    Run the PySceneDetect ContentDetector pipeline used by detect_scenes.
+
+    Args:
+        video_path (str): Path to the video file.
+        fps (float): Frame rate of the video (unused, kept for a uniform signature).
+
+    Returns:
+        list: Detected transition times in seconds.
+    """
+    import openAI_images.scenes_to_description_optimized_gemini as sg
+
+    scenes = sg.detect_scenes(video_path)
+    return [_timecode_to_seconds(start) for start, _ in scenes[1:]]
+
+
+def run_pyscenedetect_fast(video_path, fps):
+    """
+    Run detect_scenes in fast mode (automatic downscaling and frame skipping).
+
+    Args:
+        video_path (str): Path to the video file.
+        fps (float): Frame rate of the video (unused, kept for a uniform signature).
+
+    Returns:
+        list: Detected transition times in seconds.
+    """
+    import openAI_images.scenes_to_description_optimized_gemini as sg
+
+    scenes = sg.detect_scenes(video_path, fast=True)
+    return [_timecode_to_seconds(start) for start, _ in scenes[1:]]
+
+
+def run_gemini_segmentation(video_path, fps):
+    """
+    Run the Gemini talking/non-talking segmentation on a video.
+
+    Segment boundaries are compared against the boundaries of the speech intervals,
+    since that is what the segmentation is meant to find.
+
+    Args:
+        video_path (str): Path to the video file.
+        fps (float): Frame rate of the video (unused, kept for a uniform signature).
+
+    Returns:
+        list: Detected segment boundaries in seconds, excluding the start of the video.
+    """
+    import openAI_images.revisedGemini as rg
+
+    segments = rg.process_timestamps(rg.get_video_scenes_with_gemini(video_path))
+    boundaries = set()
+    for segment in segments:
+        boundaries.add(segment["start"] / 1000)
+        boundaries.add(segment["end"] / 1000)
+    return sorted(b for b in boundaries if b > 0)
+
+
+# name -> (runner, ground truth the detector is scored against)
+DETECTORS = {
+    "ssim_histogram": (run_ssim_histogram, "transitions"),
+    "pyscenedetect": (run_pyscenedetect, "transitions"),
+    "pyscenedetect_fast": (run_pyscenedetect_fast, "transitions"),
+    "gemini": (run_gemini_segmentation, "speech"),
+}
+
+
+def _truth_times(entry, kind):
+    """
+    Extract the ground-truth event times a detector is scored against.
+
+    For speech, the start and end of every interval are events, except boundaries that
+    coincide with the start or end of the video.
+
+    Args:
+        entry (dict): Ground truth entry of a single video.
+        kind (str): Either "transitions" or "speech".
+
+    Returns:
+        list: Ground-truth event times in seconds.
+    """
+    if kind == "transitions":
+        return [t["time"] for t in entry["transitions"]]
+
+    times = []
+    for interval in entry["speech"]:
+        times.extend([interval["start"], interval["end"]])
+    return [t for t in times if 0 < t < entry["duration"]]
+
+
+def benchmark(corpus_dir, detectors, tolerance=DEFAULT_TOLERANCE):
+    """
+    Run the selected detectors over every video of a synthetic corpus.
+
+    Args:
+        corpus_dir (str): Directory containing the videos and ground_truth.json.
+        detectors (list): Names of the detectors to run (keys of DETECTORS).
+        tolerance (float, optional): Matching tolerance in seconds.
+                                     Defaults to DEFAULT_TOLERANCE.
+
+    Returns:
+        list: One result dictionary per (detector, video) pair.
+    """
+    with open(os.path.join(corpus_dir, "ground_truth.json")) as f:
+        manifest = json.load(f)
+
+    results = []
+    for name in detectors:
+        runner, truth_kind = DETECTORS[name]
+        for entry in manifest:
+            video_path = os.path.join(corpus_dir, entry["video"])
+            frames = round(entry["duration"] * entry["fps"])
+            result = {
+                "detector": name,
+                "video": entry["video"],
+                "resolution": f"{entry['width']}x{entry['height']}",
+                "frames": frames,
+            }
+
+            started = time.perf_counter()
+            try:
+                predicted = runner(video_path, entry["fps"])
+            except Exception as e:
+                result["error"] = str(e)
+                print(f"{name} failed on {entry['video']}:\n{traceback.format_exc()}")
+                results.append(result)
+                continue
+            elapsed = time.perf_counter() - started
+
+            counts = match_events(predicted, _truth_times(entry, truth_kind), tolerance)
+            precision, recall = precision_recall(*counts)
+            result.update({
+                "seconds": round(elapsed, 3),
+                "fps": round(frames / elapsed, 1) if elapsed else None,
+                "precision": round(precision, 3),
+                "recall": round(recall, 3),
+                "predicted": [round(t, 3) for t in predicted],
+            })
+            results.append(result)
+
+    return results
+
+
+def summarize(results):
+    """
+    Aggregate per-video results into one row per detector and resolution.
+
+    Args:
+        results (list): Result dictionaries as returned by benchmark.
+
+    Returns:
+        list: Rows with the keys "detector", "resolution", "videos", "fps",
+              "precision", "recall" and "errors".
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault((result["detector"], result["resolution"]), []).append(result)
+
+    def _resolution_key(resolution):
+        return [int(n) for n in re.findall(r"\d+", resolution)]
+
+    rows = []
+    for (detector, resolution), group in sorted(
+        groups.items(), key=lambda item: (item[0][0], _resolution_key(item[0][1]))
+    ):
+        ok = [r for r in group if "error" not in r]
+        frames = sum(r["frames"] for r in ok)
+        seconds = sum(r["seconds"] for r in ok)
+        rows.append({
+            "detector": detector,
+            "resolution": resolution,
+            "videos": len(group),
+            "fps": round(frames / seconds, 1) if seconds else None,
+            "precision": round(sum(r["precision"] for r in ok) / len(ok), 3) if ok else None,
+            "recall": round(sum(r["recall"] for r in ok) / len(ok), 3) if ok else None,
+            "errors": len(group) - len(ok),
+        })
+    return rows
+
+
+def print_table(rows):
+    """
+    Print summary rows as a plain-text table.
+
+    Args:
+        rows (list): Rows as returned by summarize.
+
+    Returns:
+        None
+    """
+    header = f"{'detector':<20}{'resolution':<12}{'videos':>7}{'fps':>10}{'precision':>11}{'recall':>8}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        def _fmt(value, spec):
+            return "n/a" if value is None else format(value, spec)
+        print(
+            f"{row['detector']:<20}{row['resolution']:<12}{row['videos']:>7}"
+            f"{_fmt(row['fps'], '.1f'):>10}{_fmt(row['precision'], '.3f'):>11}"
+            f"{_fmt(row['recall'], '.3f'):>8}{row['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare speed and accuracy of the scene detectors on a synthetic corpus."
+    )
+    parser.add_argument("corpus_dir", nargs="?", default="./benchmark_corpus")
+    parser.add_argument(
+        "--detectors", nargs="+", choices=list(DETECTORS),
+        default=["ssim_histogram", "pyscenedetect", "pyscenedetect_fast"],
+        help="Detectors to run. Gemini is opt-in because it needs GEMINI_API_KEY and quota."
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--heights", type=int, nargs="+", default=[h for _, h in RESOLUTIONS],
+        help="Resolutions to generate when the corpus does not exist yet."
+    )
+    parser.add_argument("--output", help="Optional path for the raw per-video results (JSON).")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.corpus_dir, "ground_truth.json")):
+        generate_corpus(
+            args.corpus_dir, resolutions=[(h * 16 // 9 // 2 * 2, h) for h in args.heights]
+        )
+
+    results = benchmark(args.corpus_dir, args.detectors, tolerance=args.tolerance)
+    print_table(summarize(results))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import subprocess
+
+# lavfi video sources used for the individual shots. Consecutive shots always use
+# different sources so that every transition is a genuine content change.
+SHOT_SOURCES = [
+    "testsrc2=size={size}:rate={fps}",
+    "smptebars=size={size}:rate={fps}",
+    "mandelbrot=size={size}:rate={fps}",
+    "color=c=navy:size={size}:rate={fps}",
+    "rgbtestsrc=size={size}:rate={fps}",
+    "cellauto=size={size}:rate={fps}:rule=110",
+    "color=c=orange:size={size}:rate={fps}",
+    "life=size={size}:rate={fps}:mold=10:life_color=#00ff00:death_color=#aa0000",
+]
+
+RESOLUTIONS = [(320, 180), (640, 360), (1280, 720)]
+
+# Default corpus layout: (name, shots, speech intervals). Each shot is
+# (duration, transition into the next shot, fade duration). The transition of the
+# last shot is ignored.
+DEFAULT_CORPUS = [
+    (
+        "hard_cuts",
+        [(4.0, "cut", 0.0), (3.0, "cut", 0.0), (5.0, "cut", 0.0), (4.0, "cut", 0.0)],
+        [(1.0, 2.5), (8.0, 10.0)],
+    ),
+    (
+        "soft_fades",
+        [(4.0, "fade", 1.0), (4.0, "dissolve", 0.5), (5.0, "fade", 1.5), (4.0, "cut", 0.0)],
+        [(0.5, 3.0), (9.0, 9.8), (12.0, 14.5)],
+    ),
+    (
+        "mixed",
+        [(3.0, "cut", 0.0), (6.0, "fade", 1.0), (2.0, "cut", 0.0), (4.0, "wipeleft", 0.75),
+         (5.0, "cut", 0.0)],
+        [(2.0, 4.0), (10.5, 11.0), (14.0, 17.5)],
+    ),
+    (
+        "no_speech",
+        [(5.0, "cut", 0.0), (5.0, "fade", 1.0), (5.0, "cut", 0.0)],
+        [],
+    ),
+]
+
+
+def _shot_timeline(shots):
+    """
+    Compute the ground-truth transitions for a sequence of shots.
+
+    Hard cuts are placed at the first frame of the next shot. Soft transitions are
+    placed at the midpoint of the cross-fade, which is where a detector is expected to
+    report them.
+
+    Args:
+        shots (list): List of (duration, transition, fade_duration) tuples.
+
+    Returns:
+        tuple: The list of xfade offsets (None for hard cuts), the list of transition
+               dictionaries and the total duration in seconds.
+    """
+    offsets = []
+    transitions = []
+    elapsed = shots[0][0]
+
+    for (_, transition, fade), (next_duration, _, _) in zip(shots, shots[1:]):
+        if transition == "cut":
+            offsets.append(None)
+            transitions.append({"time": round(elapsed, 3), "kind": "hard", "transition": "cut"})
+            elapsed += next_duration
+        else:
+            offset = elapsed - fade
+            offsets.append(offset)
+            transitions.append({
+                "time": round(offset + fade / 2, 3),
+                "kind": "soft",
+                "transition": transition,
+                "start": round(offset, 3),
+                "end": round(elapsed, 3),
+            })
+            elapsed += next_duration - fade
+
+    return offsets, transitions, elapsed
+
+
+def _tone_expression(speech_intervals, frequency=440):
+    """
+    Build an aevalsrc expression producing tone bursts during the given intervals.
+
+    Args:
+        speech_intervals (list): List of (start, end) tuples in seconds.
+        frequency (int, optional): Tone frequency in Hz. Defaults to 440.
+
+    Returns:
+        str: An aevalsrc expression that is silent outside of the intervals.
+    """
+    if not speech_intervals:
+        return "0"
+    gate = "+".join(f"between(t\\,{start}\\,{end})" for start, end in speech_intervals)
+    return f"0.5*sin(2*PI*{frequency}*t)*({gate})"
+
+
+def generate_synthetic_video(output_path, shots, speech_intervals, width=640, height=360,
+                             fps=25):
+    """
+    Render a synthetic video with known scene transitions and tone bursts using ffmpeg.
+
+    Every shot is rendered from a different lavfi source. Hard cuts are joined with the
+    concat filter, soft transitions with xfade. The audio track is silent except for a
+    sine tone during each speech interval.
+
+    Args:
+        output_path (str): Path of the MP4 file to write.
+        shots (list): List of (duration, transition, fade_duration) tuples. The
+                      transition is "cut" or any xfade transition name (e.g. "fade").
+        speech_intervals (list): List of (start, end) tuples in seconds.
+        width (int, optional): Frame width. Defaults to 640.
+        height (int, optional): Frame height. Defaults to 360.
+        fps (int, optional): Frame rate. Defaults to 25.
+
+    Returns:
+        dict: Ground truth with the keys "video", "width", "height", "fps", "duration",
+              "transitions" and "speech".
+    """
+    offsets, transitions, duration = _shot_timeline(shots)
+    size = f"{width}x{height}"
+
+    inputs = []
+    filters = []
+    for i, (shot_duration, _, _) in enumerate(shots):
+        source = SHOT_SOURCES[i % len(SHOT_SOURCES)].format(size=size, fps=fps)
+        inputs.extend(["-f", "lavfi", "-t", str(shot_duration), "-i", source])
+        filters.append(f"[{i}:v]format=yuv420p,fps={fps},settb=AVTB,setsar=1[s{i}]")
+
+    current = "s0"
+    for i, offset in enumerate(offsets, start=1):
+        label = f"v{i}"
+        if offset is None:
+            filters.append(f"[{current}][s{i}]concat=n=2:v=1:a=0,settb=AVTB[{label}]")
+        else:
+            _, transition, fade = shots[i - 1]
+            filters.append(
+                f"[{current}][s{i}]xfade=transition={transition}:duration={fade}"
+                f":offset={offset:.3f}[{label}]"
+            )
+        current = label
+
+    inputs.extend([
+        "-f", "lavfi", "-i",
+        f"aevalsrc=exprs='{_tone_expression(speech_intervals)}':s=44100:d={duration:.3f}",
+    ])
+
+    subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        *inputs,
+        "-filter_complex", ";".join(filters),
+        "-map", f"[{current}]",
+        "-map", f"{len(shots)}:a",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-t", f"{duration:.3f}",
+        output_path,
+    ], check=True)
+
+    return {
+        "video": os.path.basename(output_path),
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "duration": round(duration, 3),
+        "transitions": transitions,
+        "speech": [{"start": start, "end": end} for start, end in speech_intervals],
+    }
+
+
+def generate_corpus(output_dir, resolutions=RESOLUTIONS, fps=25, corpus=DEFAULT_CORPUS):
+    """
+    Generate the synthetic benchmark corpus and write its ground truth manifest.
+
+    Args:
+        output_dir (str): Directory where the videos and ground_truth.json are written.
+        resolutions (list, optional): List of (width, height) tuples to render every
+                                      video at. Defaults to RESOLUTIONS.
+        fps (int, optional): Frame rate of the generated videos. Defaults to 25.
+        corpus (list, optional): List of (name, shots, speech intervals) tuples.
+                                 Defaults to DEFAULT_CORPUS.
+
+    Returns:
+        list: The ground truth entries, one per generated video.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = []
+
+    for width, height in resolutions:
+        for name, shots, speech_intervals in corpus:
+            output_path = os.path.join(output_dir, f"{name}_{height}p.mp4")
+            print(f"Generating {output_path}")
+            entry = generate_synthetic_video(
+                output_path, shots, speech_intervals, width=width, height=height, fps=fps
+            )
+            entry["name"] = name
+            manifest.append(entry)
+
+    with open(os.path.join(output_dir, "ground_truth.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic videos with known scene cuts and speech intervals."
+    )
+    parser.add_argument("output_dir", nargs="?", default="./benchmark_corpus")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument(
+        "--heights", type=int, nargs="+", default=[h for _, h in RESOLUTIONS],
+        help="Vertical resolutions to render (16:9 aspect ratio)."
+    )
+    args = parser.parse_args()
+
+    generate_corpus(
+        args.output_dir,
+        resolutions=[(h * 16 // 9 // 2 * 2, h) for h in args.heights],
+        fps=args.fps,
+    )
@@ -0,0 +1,161 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import traceback
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_engines import TTS_ENGINES
+
+# Typical one-sentence audio descriptions, as produced by describe_existing_segments.
+SAMPLE_SENTENCES = [
+    "A woman in a red coat walks briskly across a snowy park.",
+    "Two children laugh as they chase a small brown dog along the beach.",
+    "The camera pans over a quiet city skyline at dusk.",
+    "A chef carefully slices fresh vegetables on a wooden board.",
+    "An old man sits alone on a bench, feeding pigeons.",
+    "Rain streaks down the window of a crowded train carriage.",
+    "A cyclist speeds downhill past rows of blooming cherry trees.",
+    "The team gathers around a whiteboard covered in colorful notes.",
+    "A cat watches intently as a butterfly lands on the windowsill.",
+    "Fireworks burst over the harbor while the crowd cheers below.",
+]
+
+
+def audio_duration(path):
+    """
+    Get the duration of a synthesized audio file in seconds.
+
+    WAV files are read with the wave module. Other formats are probed with ffprobe;
+    None is returned when ffprobe is not available.
+
+    Args:
+        path (str): Path to the audio file.
+
+    Returns:
+        float or None: The duration in seconds, or None if it cannot be determined.
+    """
+    if path.endswith(".wav"):
+        with wave.open(path, "rb") as f:
+            return f.getnframes() / f.getframerate()
+    if not shutil.which("ffprobe"):
+        return None
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    return float(result.stdout.strip()) if result.returncode == 0 else None
+
+
+def _percentile(values, fraction):
+    """
+    Return the given percentile of a list of values (nearest-rank method).
+
+    Args:
+        values (list): The values.
+        fraction (float): The percentile as a fraction between 0 and 1.
+
+    Returns:
+        float: The percentile value.
+    """
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def benchmark_engine(engine, sentences, output_dir, concurrency=1):
+    """
+    Synthesize every sentence with an engine and measure latency and throughput.
+
+    Args:
+        engine (TTSEngine): The engine to benchmark.
+        sentences (list): The sentences to synthesize.
+        output_dir (str): Directory for the generated audio files.
+        concurrency (int, optional): Number of concurrent syntheses. Defaults to 1.
+
+    Returns:
+        dict: Latency statistics in milliseconds, sentences per second, and the
+              real-time factor (seconds of audio produced per second of wall time).
+    """
+    def synthesize(item):
+        index, sentence = item
+        path = os.path.join(output_dir, f"{engine.name}_{concurrency}_{index}.{engine.extension}")
+        started = time.perf_counter()
+        engine.synthesize(sentence, path)
+        return time.perf_counter() - started, path
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(synthesize, enumerate(sentences)))
+    wall_time = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _ in results]
+    durations = [audio_duration(path) for _, path in results]
+    audio_seconds = sum(d for d in durations if d) if all(durations) else None
+
+    return {
+        "engine": engine.name,
+        "concurrency": concurrency,
+        "sentences": len(sentences),
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": _percentile(latencies, 0.5),
+        "p95_ms": _percentile(latencies, 0.95),
+        "sentences_per_sec": len(sentences) / wall_time,
+        "realtime_factor": audio_seconds / wall_time if audio_seconds else None,
+    }
+
+
+def print_table(rows):
+    """
+    Print benchmark rows as a plain-text table.
+
+    Args:
+        rows (list): Rows as returned by benchmark_engine.
+
+    Returns:
+        None
+    """
+    header = f"{'engine':<10}{'workers':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'sent/s':>9}{'x realtime':>12}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        realtime = "n/a" if row["realtime_factor"] is None else f"{row['realtime_factor']:.1f}"
+        print(
+            f"{row['engine']:<10}{row['concurrency']:>8}{row['mean_ms']:>10.1f}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['sentences_per_sec']:>9.2f}{realtime:>12}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare per-sentence latency and throughput of the TTS engines."
+    )
+    parser.add_argument("--engines", nargs="+", choices=list(TTS_ENGINES), default=list(TTS_ENGINES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=2, help="How often to repeat the sample sentences.")
+    args = parser.parse_args()
+
+    # Make every sentence unique so that no engine can benefit from upstream caching.
+    sentences = [
+        f"{sentence} Take {round_number + 1}."
+        for round_number in range(args.repeat) for sentence in SAMPLE_SENTENCES
+    ]
+
+    output_dir = tempfile.mkdtemp(prefix="bench_tts_")
+    rows = []
+    try:
+        for name in args.engines:
+            for concurrency in args.concurrency:
+                try:
+                    rows.append(benchmark_engine(TTS_ENGINES[name], sentences, output_dir, concurrency))
+                except Exception:
+                    print(f"{name} failed:\n{traceback.format_exc()}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print_table(rows)
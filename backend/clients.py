@@ -0,0 +1,99 @@
+import os
+import threading
+
+import google.generativeai as genai
+import httpx
+import requests
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from config import GTTS_CHUNK_WORKERS, LLM_MAX_WORKERS, TTS_MAX_WORKERS
+
+load_dotenv()
+
+# Largest number of requests that can be in flight to a single host at once
+HTTP_POOL_SIZE = max(LLM_MAX_WORKERS, TTS_MAX_WORKERS * GTTS_CHUNK_WORKERS)
+
+_lock = threading.Lock()
+_http_session = None
+_openai_client = None
+_gemini_configured = False
+_gemini_models = {}
+
+
+def get_http_session():
+    """
+    Return the shared requests session used for plain HTTP calls (e.g. gTTS).
+
+    The session keeps TLS connections alive between requests, with a pool per host large
+    enough for every configured worker to have its own connection. Sending prepared
+    requests through it is safe from multiple threads.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def get_openai_client():
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    The client is backed by a single httpx connection pool sized to LLM_MAX_WORKERS and is
+    safe to use from multiple threads.
+
+    Returns:
+        openai.OpenAI: The shared client.
+    """
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            limits = httpx.Limits(max_connections=LLM_MAX_WORKERS, max_keepalive_connections=LLM_MAX_WORKERS)
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=httpx.Client(limits=limits, timeout=httpx.Timeout(600.0, connect=10.0)),
+            )
+        return _openai_client
+
+
+def _configure_gemini():
+    """
+    Configure the Gemini SDK with the API key once per process.
+
+    Must be called with _lock held.
+
+    Returns:
+        None
+    """
+    global _gemini_configured
+    if not _gemini_configured:
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _gemini_configured = True
+
+
+def get_gemini_model(model_name):
+    """
+    Return the shared Gemini model for a model name, creating it on first use.
+
+    All models share the SDK's default generative client and its gRPC channel, so
+    descriptions reuse one connection instead of building a model object per request.
+
+    Args:
+        model_name (str): The Gemini model name (e.g. "gemini-1.5-flash").
+
+    Returns:
+        google.generativeai.GenerativeModel: The shared model.
+    """
+    with _lock:
+        if model_name not in _gemini_models:
+            _configure_gemini()
+            _gemini_models[model_name] = genai.GenerativeModel(model_name=model_name)
+        return _gemini_models[model_name]
@@ -1,34 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+import json
 import subprocess
-from gtts import gTTS
+import uuid
 import os
+from audio_processing import fit_to_duration, read_audio, trim_silence, write_wav
+from config import TTS_MAX_WORKERS
+from tts_cache import get_tts_cache, make_cache_key
+from tts_engines import SPEECH_RATES, get_tts_engine
 
-def convert_text_to_speech(text, output_folder, output_file_name):
+# Containers and codecs that can be stream-copied into an MP4 export without re-encoding
+MP4_CONTAINERS = {".mp4", ".m4v", ".mov"}
+MP4_VIDEO_CODECS = {"h264", "hevc", "mpeg4", "av1", "vp9"}
+MP4_AUDIO_CODECS = {"aac", "mp3", "ac3", "eac3", "alac"}
+
+# Audio-only export deliverables: output file name pattern (filled with the video name), encoder
+# options, and whether the description track is mixed with the original audio
+AUDIO_DELIVERABLES = {
+    "description_m4a": {"file": "description_{}.m4a", "codec": ["-c:a", "aac", "-b:a", "128k"], "mix": False},
+    "description_opus": {"file": "description_{}.opus", "codec": ["-c:a", "libopus", "-b:a", "64k"], "mix": False},
+    "mixed_m4a": {"file": "mixed_{}.m4a", "codec": ["-c:a", "aac", "-b:a", "192k"], "mix": True},
+}
+
+# Adaptive streaming export: CMAF (fragmented MP4) segment length and the master playlist name
+HLS_SEGMENT_SECONDS = 6
+HLS_MASTER_PLAYLIST = "master.m3u8"
+
+def convert_text_to_speech(text, output_folder, output_file_name, lang="en", tld="com", use_cache=True,
+                           engine=None, max_duration=None, parallel_chunks=False):
     """
-    Convert the given text to speech and save it as an MP3 file.
+    Convert the given text to speech and save it as an audio file.
+
+    This function uses the selected text-to-speech engine (see tts_engines) to convert text into
+    speech. The default gTTS engine writes MP3 files, while the offline eSpeak NG engine runs on
+    the local CPU and writes WAV files. The audio is saved in the specified output folder.
+
+    With caching enabled the audio is content-addressed: the file is named after a hash of the
+    normalized text, language, voice and engine, and an existing file is returned without
+    synthesizing again. output_file_name is only used when caching is disabled.
+
+    When max_duration is given, the speech is fitted to that window and saved as a WAV file:
+    engines that support it synthesize at a speaking rate predicted to fit, leading and trailing
+    silence is trimmed, and any remaining overrun is removed by time-stretching. The result can
+    be mixed at encode time without measuring or speeding it up again.
 
-    This function uses the gTTS library to convert text into speech. The generated speech is sped up 
-    by setting the rate (note that gTTS rate modification may not be officially supported), and the 
-    resulting audio is saved as an MP3 file in the specified output folder with the given file name.
+    With parallel_chunks, engines that split long texts into chunks (gTTS) fetch all chunks
+    concurrently over pooled connections instead of one after another, which cuts the latency
+    of long descriptions and narrations. The audio, and therefore the cache entry, is the same.
 
     Args:
         text (str): The text to convert to speech.
-        output_folder (str): The directory where the MP3 file will be saved.
-        output_file_name (str): The base name for the output MP3 file (without extension).
+        output_folder (str): The directory where the audio file will be saved.
+        output_file_name (str): The base name for the output audio file (without extension).
+        lang (str, optional): The language of the speech. Defaults to "en".
+        tld (str, optional): The gTTS top-level domain selecting the accent. Defaults to "com".
+        use_cache (bool, optional): Whether to use the TTS cache. Defaults to True.
+        engine (str, optional): The name of the TTS engine. Defaults to the TTS_ENGINE setting.
+        max_duration (float, optional): Duration in seconds the speech has to fit into. Defaults to None.
+        parallel_chunks (bool, optional): Fetch the chunks of long texts concurrently. Defaults to False.
 
     Returns:
-        str: The path to the saved MP3 file if successful, or an error message if an exception occurs.
+        str: The path to the saved audio file if successful, or an error message if an exception occurs.
     """
     try:
-        tts = gTTS(text=text, lang="en")
-        # Speed up the speech by setting the rate (this parameter is not officially supported in gTTS)
-        tts.rate = 100
-        audio_file_path = os.path.join(output_folder, f"{output_file_name}.mp3")
-        tts.save(audio_file_path)
+        tts_engine = get_tts_engine(engine)
+        cache = get_tts_cache(output_folder) if use_cache else None
+
+        def synthesize(audio_file_path, speed=1.0):
+            tts_engine.synthesize(text, audio_file_path, lang=lang, tld=tld, speed=speed,
+                                  parallel_chunks=parallel_chunks)
+
+        def synthesize_fitted(audio_file_path):
+            speed = 1.0
+            if tts_engine.supports_speed:
+                predicted = SPEECH_RATES.predict_duration(tts_engine, text)
+                speed = max(1.0, predicted / max_duration)
+
+            if cache and speed == 1.0:
+                # Keep the unfitted synthesis cached so a changed window needs no new synthesis
+                raw_key = make_cache_key(text, lang, tld, tts_engine.name)
+                raw_path = cache.get_or_create(raw_key, synthesize, extension=tts_engine.extension, publish=False)
+                samples, sample_rate = read_audio(raw_path)
+            else:
+                raw_path = f"{audio_file_path}.raw.{tts_engine.extension}"
+                try:
+                    synthesize(raw_path, speed=speed)
+                    samples, sample_rate = read_audio(raw_path)
+                finally:
+                    if os.path.exists(raw_path):
+                        os.remove(raw_path)
+
+            samples = trim_silence(samples, sample_rate)
+            SPEECH_RATES.update(tts_engine, text, len(samples) / sample_rate, speed=speed)
+            write_wav(audio_file_path, fit_to_duration(samples, sample_rate, max_duration), sample_rate)
+
+        if max_duration:
+            if cache:
+                key = make_cache_key(text, lang, tld, tts_engine.name, variant=f"fit:{int(max_duration * 1000)}")
+                return cache.get_or_create(key, synthesize_fitted, extension="wav")
+
+            audio_file_path = os.path.join(output_folder, f"{output_file_name}.wav")
+            synthesize_fitted(audio_file_path)
+            return audio_file_path
+
+        if cache:
+            key = make_cache_key(text, lang, tld, tts_engine.name)
+            return cache.get_or_create(key, synthesize, extension=tts_engine.extension)
+
+        audio_file_path = os.path.join(output_folder, f"{output_file_name}.{tts_engine.extension}")
+        synthesize(audio_file_path)
         return audio_file_path  # Return the file path of the generated audio
     except Exception as e:
         return str(e)  # Return the error message if something goes wrong
 
+
+def convert_texts_to_speech(texts, output_folder, max_workers=TTS_MAX_WORKERS, max_durations=None, **tts_options):
+    """
+    Convert several texts to speech concurrently on a bounded worker pool.
+
+    Results are yielded as soon as each synthesis finishes, so callers can stream progress
+    in completion order and use the index to keep their own results in input order.
+
+    Args:
+        texts (list): The texts to convert to speech.
+        output_folder (str): The directory where the audio files will be saved.
+        max_workers (int, optional): Maximum number of concurrent syntheses. Defaults to TTS_MAX_WORKERS.
+        max_durations (list, optional): Per-text durations in seconds to fit the speech into
+            (see convert_text_to_speech). Defaults to None.
+        **tts_options: Additional keyword arguments passed to convert_text_to_speech.
+
+    Yields:
+        tuple: (index, audio_file_path) for each text, in completion order.
+    """
+    if max_durations is None:
+        max_durations = [None] * len(texts)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        future_to_index = {
+            executor.submit(
+                convert_text_to_speech, text, output_folder, f"audio_description_{uuid.uuid4()}",
+                max_duration=max_duration, **tts_options
+            ): index
+            for index, (text, max_duration) in enumerate(zip(texts, max_durations))
+        }
+        for future in as_completed(future_to_index):
+            yield future_to_index[future], future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
 def time_to_seconds(time_str):
     """
     Convert a time string in the format 'HH:MM:SS.%f' to total seconds.
@@ -79,4 +199,271 @@ def seconds_to_time(seconds):
     minutes = int((seconds % 3600) // 60)
     seconds = seconds % 60
     milliseconds = int((seconds % 1) * 100)
-    return f'{hours:02}:{minutes:02}:{int(seconds):02}.{milliseconds:02}'
\ No newline at end of file
+    return f'{hours:02}:{minutes:02}:{int(seconds):02}.{milliseconds:02}'
+
+def create_analysis_proxy(video_path, output_path, height=360):
+    """
+    Create a low-resolution, video-only proxy of a video for analysis steps.
+
+    The proxy keeps the frame rate and timeline of the original video, so timestamps
+    detected on it map one-to-one onto the original. It is meant to be created once
+    per upload and shared by all local analysis steps (e.g. scene detection).
+
+    Args:
+        video_path (str): The path to the input video file.
+        output_path (str): The output path for the proxy MP4 file.
+        height (int, optional): The height of the proxy in pixels. Defaults to 360.
+
+    Returns:
+        str: The path to the created proxy file.
+    """
+    subprocess.run([
+        "ffmpeg", "-y",
+        "-i", video_path,
+        "-an",
+        "-vf", f"scale=-2:'min({height},ih)'",
+        "-c:v", "libx264",
+        "-preset", "ultrafast",
+        "-crf", "28",
+        output_path
+    ], check=True)
+    return output_path
+
+
+def start_analysis_proxy(output_path, height=360):
+    """
+    Start creating an analysis proxy (see create_analysis_proxy) from a video that is fed in chunks.
+
+    The video bytes are written to the returned process's stdin as they arrive, e.g. while
+    the video is being uploaded. This only works for streamable files (MP4 with its index
+    at the start, fragmented MP4, Matroska/WebM); for other files ffmpeg exits early and
+    create_analysis_proxy has to be used once the whole file is available.
+
+    Args:
+        output_path (str): The output path for the proxy MP4 file.
+        height (int, optional): The height of the proxy in pixels. Defaults to 360.
+
+    Returns:
+        subprocess.Popen: The ffmpeg process; close its stdin after the last chunk and wait for it.
+    """
+    return subprocess.Popen([
+        "ffmpeg", "-y", "-v", "error",
+        "-i", "pipe:0",
+        "-an",
+        "-vf", f"scale=-2:'min({height},ih)'",
+        "-c:v", "libx264",
+        "-preset", "ultrafast",
+        "-crf", "28",
+        output_path
+    ], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def probe_media(video_path):
+    """
+    Get the duration and the codecs of the first video and audio streams of a media file using ffprobe.
+
+    Args:
+        video_path (str): The path to the media file.
+
+    Returns:
+        dict: {"video": codec name or None, "audio": codec name or None, "duration": seconds or None}.
+
+    Raises:
+        RuntimeError: If ffprobe fails.
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name:format=duration",
+        "-of", "json",
+        video_path
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe error: {result.stderr}")
+
+    probe = json.loads(result.stdout)
+    media = {"video": None, "audio": None, "duration": None}
+    for stream in probe.get("streams", []):
+        codec_type = stream.get("codec_type")
+        if codec_type in ("video", "audio") and media[codec_type] is None:
+            media[codec_type] = stream.get("codec_name")
+    duration = probe.get("format", {}).get("duration")
+    if duration not in (None, "N/A"):
+        media["duration"] = float(duration)
+    return media
+
+def run_ffmpeg(command, duration=None, progress_callback=None):
+    """
+    Run an ffmpeg command, optionally reporting its progress.
+
+    With a progress callback, ffmpeg is asked to write machine-readable progress
+    (-progress pipe:1), and the callback receives the fraction of the output written so far.
+
+    Args:
+        command (list): The ffmpeg command, starting with "ffmpeg".
+        duration (float, optional): Duration of the output in seconds, used to compute the fraction.
+            Defaults to None (no fractions are reported).
+        progress_callback (callable, optional): Called as progress_callback(fraction) with values
+            between 0 and 1. Defaults to None.
+
+    Returns:
+        int: The exit code of ffmpeg.
+    """
+    if progress_callback is None:
+        return subprocess.run(command).returncode
+
+    process = subprocess.Popen(
+        [command[0], "-progress", "pipe:1", "-nostats", *command[1:]],
+        stdout=subprocess.PIPE, text=True,
+    )
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        if key == "out_time_us" and duration and value.isdigit():
+            progress_callback(min(1.0, int(value) / 1e6 / duration))
+        elif key == "progress" and value == "end":
+            progress_callback(1.0)
+    return process.wait()
+
+def mux_description_track(video_path, description_audio_path, subtitle_path, output_path, stream_copy=True,
+                          media=None, progress_callback=None, audio_outputs=None, hls_dir=None):
+    """
+    Add an audio description track and a subtitle stream to a video.
+
+    In stream-copy mode the original video and audio streams are copied as they are and only
+    the description track is encoded (AAC), so the export takes seconds instead of a full
+    re-encode. A stream is only re-encoded (H.264 video, AAC audio) when the output container
+    is not MP4-based or its codec cannot be stored in MP4. If the remux fails anyway, the
+    export is retried with everything re-encoded.
+
+    Audio-only deliverables (see AUDIO_DELIVERABLES) are written by the same ffmpeg run as
+    additional outputs, so every input is read and decoded once for all files. The mixed
+    deliverable sums the original audio and the description track into stereo.
+
+    With hls_dir, the same run also packages the video for adaptive streaming (see
+    _hls_output_args), so playback can start while the export is still running.
+
+    Args:
+        video_path (str): The path to the original video.
+        description_audio_path (str): The path to the rendered audio description track.
+        subtitle_path (str): The path to the SRT subtitles.
+        output_path (str): The path of the MP4 file to write.
+        stream_copy (bool, optional): Copy compatible streams instead of re-encoding them. Defaults to True.
+        media (dict, optional): The result of probe_media for video_path, if already known. Defaults to None.
+        progress_callback (callable, optional): Called with the fraction of the video written so far
+            (see run_ffmpeg). Defaults to None.
+        audio_outputs (dict, optional): Output paths of audio-only deliverables, keyed by their
+            AUDIO_DELIVERABLES name. Defaults to None.
+        hls_dir (str, optional): Directory to write the HLS/CMAF package to. Defaults to None.
+
+    Returns:
+        bool: True if the video stream was copied, False if it was re-encoded.
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails to re-encode the video.
+    """
+    codecs = media or probe_media(video_path)
+    container_ok = os.path.splitext(output_path)[1].lower() in MP4_CONTAINERS
+    copy_video = stream_copy and container_ok and codecs["video"] in MP4_VIDEO_CODECS
+    copy_audio = stream_copy and container_ok and codecs["audio"] in MP4_AUDIO_CODECS
+
+    command = [
+        "ffmpeg", "-y",
+        "-i", video_path,  # Original video
+        "-i", description_audio_path,  # Audio description track
+        "-i", subtitle_path,  # Subtitles
+    ]
+    # Every output that needs the mix (original audio plus description track) gets its own copy
+    # of one filter graph, so the decoded inputs are mixed once
+    audio_outputs = audio_outputs or {}
+    mixes = [f"[mix{i}]" for i in range(
+        sum(AUDIO_DELIVERABLES[name]["mix"] for name in audio_outputs) + (hls_dir is not None))]
+    if mixes:
+        mix = "[0:a:0][1:a:0]amix=inputs=2:duration=longest:normalize=0," if codecs["audio"] else "[1:a:0]"
+        command += ["-filter_complex", f"{mix}aformat=channel_layouts=stereo,asplit={len(mixes)}{''.join(mixes)}"]
+    command += ["-map", "0:v:0"]  # Video from the first input
+    if codecs["audio"]:
+        command += ["-map", "0:a:0"]  # Original audio from the first input
+    command += [
+        "-map", "1:a:0",  # Description track from the second input
+        "-map", "2:s:0",  # Subtitles from the third input
+        "-c:v", "copy" if copy_video else "libx264",
+        "-c:a", "aac",
+        "-c:s", "mov_text",  # Use mov_text for subtitles in MP4
+    ]
+    if copy_video and codecs["video"] == "hevc":
+        command += ["-tag:v", "hvc1"]  # Playable by QuickTime/Safari
+    if copy_audio:
+        command += ["-c:a:0", "copy"]
+    command.append(output_path)
+
+    # Audio-only deliverables, as further outputs of the same run
+    for name, path in audio_outputs.items():
+        deliverable = AUDIO_DELIVERABLES[name]
+        command += ["-map", mixes.pop() if deliverable["mix"] else "1:a:0", *deliverable["codec"], path]
+    if hls_dir is not None:
+        command += _hls_output_args(hls_dir, codecs, copy_video, copy_audio, mixes.pop())
+
+    returncode = run_ffmpeg(command, codecs["duration"], progress_callback)
+    if not (copy_video or copy_audio):
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command)
+        return False
+
+    if returncode != 0:
+        print(f"Stream copy failed for {video_path}, re-encoding")
+        return mux_description_track(video_path, description_audio_path, subtitle_path, output_path,
+                                     stream_copy=False, media=codecs, progress_callback=progress_callback,
+                                     audio_outputs=audio_outputs, hls_dir=hls_dir)
+    return copy_video
+
+def _hls_output_args(hls_dir, codecs, copy_video, copy_audio, mix):
+    """
+    Build the ffmpeg output options for an HLS package with CMAF segments.
+
+    The video is one rendition that references an audio group with two alternate renditions,
+    the original audio (default) and the original audio mixed with the description track,
+    and a subtitle group with the WebVTT subtitles. Every rendition gets its own media
+    playlist and segments in a subdirectory named after it. The playlists are written as
+    "event" playlists, so players can start while later segments are still being packaged.
+
+    Args:
+        hls_dir (str): Directory to write the package to; the entry point is HLS_MASTER_PLAYLIST.
+        codecs (dict): The result of probe_media for the original video.
+        copy_video (bool): Copy the video stream instead of encoding it as H.264.
+        copy_audio (bool): Copy the original audio stream instead of encoding it as AAC.
+        mix (str): Filter graph output label of the mixed description audio.
+
+    Returns:
+        list: The ffmpeg arguments of the output, ending with its path.
+    """
+    command = ["-map", "0:v:0"]
+    stream_map = ["v:0,agroup:audio,sgroup:subtitles,name:video"]
+    if codecs["audio"]:
+        command += ["-map", "0:a:0"]
+        stream_map.append("a:0,agroup:audio,name:original,default:yes")
+        stream_map.append("a:1,agroup:audio,name:description,default:no")
+    else:
+        stream_map.append("a:0,agroup:audio,name:description,default:yes")
+    command += ["-map", mix, "-map", "2:s:0"]
+    stream_map.append("s:0,sgroup:subtitles,name:subtitles")
+
+    command += [
+        "-c:v", "copy" if copy_video else "libx264",
+        "-c:a", "aac",
+        "-c:s", "webvtt",
+    ]
+    if copy_video and codecs["video"] == "hevc":
+        command += ["-tag:v", "hvc1"]
+    if copy_audio:
+        command += ["-c:a:0", "copy"]
+    command += [
+        "-f", "hls",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", "event",
+        "-hls_segment_type", "fmp4",
+        "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", os.path.join(hls_dir, "%v", "segment_%05d.m4s"),
+        "-master_pl_name", HLS_MASTER_PLAYLIST,
+        "-var_stream_map", " ".join(stream_map),
+        os.path.join(hls_dir, "%v", "index.m3u8"),
+    ]
+    return command
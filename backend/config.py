@@ -0,0 +1,46 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Disk budget for the content-addressed TTS cache, in bytes (default: 1 GiB).
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+
+# Concurrency limits. LLM calls (Gemini uploads and generation) and text-to-speech
+# synthesis are pooled separately so that one kind of work cannot starve the other.
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", 4))
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", 8))
+
+# Default text-to-speech engine ("gtts" or the offline "espeak"); requests can override it.
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")
+
+# Number of text chunks of one long text that gTTS fetches concurrently when parallel
+# chunk fetching is enabled (convert_text_to_speech(parallel_chunks=True)).
+GTTS_CHUNK_WORKERS = int(os.getenv("GTTS_CHUNK_WORKERS", 4))
+
+# Worker threads for CPU-bound audio work (decoding and time-stretching clips for mixing).
+AUDIO_MAX_WORKERS = int(os.getenv("AUDIO_MAX_WORKERS", os.cpu_count() or 4))
+
+# Background export jobs (/export-jobs): concurrent exports, and how long finished jobs are kept.
+EXPORT_MAX_WORKERS = int(os.getenv("EXPORT_MAX_WORKERS", 2))
+EXPORT_JOB_RETENTION_SECONDS = int(os.getenv("EXPORT_JOB_RETENTION_SECONDS", 3600))
+
+# Per-request workspaces (scene clips, intermediate files): how long they are kept after creation.
+WORKSPACE_RETENTION_SECONDS = int(os.getenv("WORKSPACE_RETENTION_SECONDS", 24 * 3600))
+
+# Artifact serving: number of file content hashes (ETags) kept in memory, and whether file
+# bodies are handed to the front proxy with X-Sendfile instead of being sent by the app.
+ARTIFACT_HASH_CACHE_SIZE = int(os.getenv("ARTIFACT_HASH_CACHE_SIZE", 4096))
+ARTIFACT_X_SENDFILE = os.getenv("ARTIFACT_X_SENDFILE", "false").lower() in ("1", "true", "yes")
+
+# Durable background jobs (/process-video): worker processes, seconds without a heartbeat after
+# which a running job is handed to another worker, runs per job before it is given up, and how
+# long finished jobs are kept (as long as their workspaces by default).
+PROCESS_MAX_WORKERS = int(os.getenv("PROCESS_MAX_WORKERS", 2))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 60))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", WORKSPACE_RETENTION_SECONDS))
+
+# Chunked uploads (/uploads): largest accepted video, and how long unfinished uploads can be resumed.
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 20 * 1024 * 1024 * 1024))
+UPLOAD_SESSION_RETENTION_SECONDS = int(os.getenv("UPLOAD_SESSION_RETENTION_SECONDS", 24 * 3600))
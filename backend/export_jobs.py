@@ -0,0 +1,157 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import EXPORT_JOB_RETENTION_SECONDS, EXPORT_MAX_WORKERS
+
+
+class ExportJobs:
+    """
+    Runs exports in the background and records their progress as a list of events.
+
+    Every job keeps all of its events, so any number of clients can follow a job from the
+    start, or resume from the last event they saw. Finished jobs are forgotten after
+    EXPORT_JOB_RETENTION_SECONDS. All methods are safe to call from multiple threads.
+    """
+
+    def __init__(self, max_workers=EXPORT_MAX_WORKERS, retention_seconds=EXPORT_JOB_RETENTION_SECONDS):
+        """
+        Initialize the job registry and its worker pool.
+
+        Args:
+            max_workers (int, optional): Maximum number of concurrent exports. Defaults to EXPORT_MAX_WORKERS.
+            retention_seconds (int, optional): How long finished jobs are kept. Defaults to
+                EXPORT_JOB_RETENTION_SECONDS.
+        """
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._condition = threading.Condition()
+        self._jobs = {}
+
+    def submit(self, export, *args):
+        """
+        Queue an export.
+
+        Args:
+            export (callable): Called as export(*args, progress_callback=...) and returns the
+                result dict. progress_callback(progress, message, **fields) records a progress
+                event; the fields (e.g. URLs available early) are added to the event.
+            *args: Positional arguments for export.
+
+        Returns:
+            str: The job id.
+        """
+        self._prune()
+        job_id = uuid.uuid4().hex
+        with self._condition:
+            self._jobs[job_id] = {"status": "queued", "events": [], "finished_at": None}
+        self._record(job_id, {"status": "queued", "progress": 0})
+        self._executor.submit(self._run, job_id, export, args)
+        return job_id
+
+    def status(self, job_id):
+        """
+        Return the current state of a job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            dict or None: The job id, status and latest event, or None for an unknown job.
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {"job_id": job_id, **job["events"][-1]}
+
+    def events(self, job_id, start=0, timeout=15.0):
+        """
+        Yield the events of a job as they happen, until the job has finished.
+
+        Args:
+            job_id (str): The job id.
+            start (int, optional): Index of the first event to yield. Defaults to 0.
+            timeout (float, optional): Seconds to wait for a new event before yielding None,
+                which lets streaming responses send keep-alives. Defaults to 15.0.
+
+        Yields:
+            dict or None: The events in order (each with its "index"), or None after a quiet period.
+        """
+        index = start
+        while True:
+            with self._condition:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                if index >= len(job["events"]):
+                    if job["finished_at"] is not None:
+                        return
+                    self._condition.wait(timeout)
+                new_events = job["events"][index:]
+            if not new_events:
+                yield None
+            for event in new_events:
+                yield {"index": index, **event}
+                index += 1
+
+    def _run(self, job_id, export, args):
+        """
+        Run an export in a worker thread and record its outcome.
+
+        Args:
+            job_id (str): The job id.
+            export (callable): The export function.
+            args (tuple): Positional arguments for export.
+
+        Returns:
+            None
+        """
+        def progress_callback(progress, message=None, **fields):
+            event = {"status": "running", "progress": round(progress, 1), **fields}
+            if message:
+                event["message"] = message
+            self._record(job_id, event)
+
+        try:
+            progress_callback(0, "Starting export...")
+            result = export(*args, progress_callback=progress_callback)
+            self._record(job_id, {"status": "done", "progress": 100, "result": result}, finished=True)
+        except Exception as e:
+            print(f"Export job {job_id} failed:\n{traceback.format_exc()}")
+            self._record(job_id, {"status": "error", "progress": -1, "error": str(e)}, finished=True)
+
+    def _record(self, job_id, event, finished=False):
+        """
+        Append an event to a job and wake up everyone following it.
+
+        Args:
+            job_id (str): The job id.
+            event (dict): The event.
+            finished (bool, optional): Whether this is the job's last event. Defaults to False.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            job = self._jobs[job_id]
+            job["status"] = event["status"]
+            job["events"].append(event)
+            if finished:
+                job["finished_at"] = time.monotonic()
+            self._condition.notify_all()
+
+    def _prune(self):
+        """
+        Forget jobs that finished more than retention_seconds ago.
+
+        Returns:
+            None
+        """
+        cutoff = time.monotonic() - self.retention_seconds
+        with self._condition:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job["finished_at"] is not None and job["finished_at"] < cutoff]:
+                del self._jobs[job_id]
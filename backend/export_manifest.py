@@ -0,0 +1,148 @@
+import json
+import os
+from collections import Counter
+
+from tts_cache import CACHE_FILE_PREFIX, record_references
+
+MANIFEST_FILE = "manifest.json"
+TRACK_FILE = "description_track.wav"
+
+
+def file_fingerprint(path):
+    """
+    Identify the content of a file without reading it.
+
+    TTS cache files are content-addressed, so their name identifies them (their modification
+    time changes whenever the cache marks them as used). Other files are identified by size
+    and modification time.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: The fingerprint, or "missing" if the file does not exist.
+    """
+    name = os.path.basename(path)
+    if name.startswith(CACHE_FILE_PREFIX):
+        return name
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_manifest(video_path, clips, subtitles, stream_copy, deliverables=()):
+    """
+    Describe the inputs of an export, so that later exports can tell what changed.
+
+    Args:
+        video_path (str): Path to the original video.
+        clips (list): Description clips as dicts with "audio" (path), "start" and "end" (milliseconds).
+        subtitles (dict): Generated subtitle file contents by name (e.g. "srt", "talking_srt").
+        stream_copy (bool): Whether the export copies the original streams.
+        deliverables (iterable, optional): Optional deliverables requested besides the video and
+            SRT files (e.g. "vtt", "description_m4a"). Defaults to none.
+
+    Returns:
+        dict: The manifest of the export inputs.
+    """
+    return {
+        "video": file_fingerprint(video_path),
+        "clips": [
+            {"audio": clip["audio"], "fingerprint": file_fingerprint(clip["audio"]),
+             "start": clip["start"], "end": clip["end"]}
+            for clip in clips
+        ],
+        "subtitles": subtitles,
+        "stream_copy": stream_copy,
+        "deliverables": sorted(deliverables),
+    }
+
+
+def load_manifest(export_dir):
+    """
+    Load the manifest of the last export of a video.
+
+    Args:
+        export_dir (str): The video's export directory.
+
+    Returns:
+        dict or None: The manifest, or None if there was no (readable) previous export.
+    """
+    try:
+        with open(os.path.join(export_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(export_dir, manifest):
+    """
+    Atomically write the manifest of an export, and keep the TTS clips it uses from being
+    evicted for as long as it exists.
+
+    Args:
+        export_dir (str): The video's export directory.
+        manifest (dict): The manifest, including the export "result".
+
+    Returns:
+        None
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, MANIFEST_FILE)
+    with open(f"{path}.part", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{path}.part", path)
+    record_references(path, [clip["audio"] for clip in manifest["clips"]])
+
+
+def same_inputs(previous, manifest):
+    """
+    Check whether two manifests describe identical export inputs.
+
+    Args:
+        previous (dict): The manifest of the previous export.
+        manifest (dict): The manifest of the new export.
+
+    Returns:
+        bool: True if the export would produce the same outputs.
+    """
+    return all(previous.get(field) == manifest[field] for field in ("video", "clips", "subtitles", "stream_copy", "deliverables"))
+
+
+def changed_ranges(previous_clips, clips):
+    """
+    Find the time ranges of the description track affected by changed clips.
+
+    A clip is unchanged if a clip with the same audio content, start and end existed before.
+    The slots of removed and added clips are merged into ranges, and every range is widened
+    until all clips overlapping it lie completely inside it, so it can be re-rendered on its own.
+
+    Args:
+        previous_clips (list): The clips of the previous manifest.
+        clips (list): The clips of the new manifest.
+
+    Returns:
+        list: Sorted, non-overlapping (start, end) ranges in milliseconds.
+    """
+    def identity(clip):
+        return clip["fingerprint"], clip["start"], clip["end"]
+
+    before = Counter(identity(clip) for clip in previous_clips)
+    after = Counter(identity(clip) for clip in clips)
+    spans = [(start, end) for _, start, end in (before - after) + (after - before)]
+
+    while True:
+        ranges = []
+        for start, end in sorted(spans):
+            if ranges and start < ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+            else:
+                ranges.append((start, end))
+        widened = [(clip["start"], clip["end"]) for clip in clips
+                   if any(clip["start"] < end and clip["end"] > start for start, end in ranges)
+                   and not any(start <= clip["start"] and clip["end"] <= end for start, end in ranges)]
+        if not widened:
+            return ranges
+        spans = ranges + widened
@@ -0,0 +1,491 @@
+import importlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import closing, contextmanager
+
+from config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETENTION_SECONDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    heartbeat_at REAL,
+    finished_at REAL,
+    key TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS events (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+class JobQueue:
+    """
+    A persistent job queue in a local SQLite database, shared by the web server and the
+    worker processes.
+
+    Jobs are claimed by workers with a lease that the worker renews while the job runs. When a
+    worker dies, its job is queued again once the lease has expired (up to JOB_MAX_ATTEMPTS
+    runs), so no job is lost to a restart. Every job keeps the list of its progress events, so
+    clients can follow it from any process and resume from the last event they saw. The
+    interface matches ExportJobs (status and events).
+    """
+
+    def __init__(self, db_path, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS,
+                 retention_seconds=JOB_RETENTION_SECONDS):
+        """
+        Open (and create if needed) the job database.
+
+        Args:
+            db_path (str): Path of the SQLite database file.
+            lease_seconds (int, optional): Seconds without a heartbeat after which a running job is
+                considered abandoned. Defaults to JOB_LEASE_SECONDS.
+            max_attempts (int, optional): How often a job is started before it is given up.
+                Defaults to JOB_MAX_ATTEMPTS.
+            retention_seconds (int, optional): How long finished jobs are kept. Defaults to
+                JOB_RETENTION_SECONDS.
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            if "key" not in [column[1] for column in db.execute("PRAGMA table_info(jobs)")]:
+                db.execute("ALTER TABLE jobs ADD COLUMN key TEXT")  # Databases created before job keys
+            db.execute("CREATE UNIQUE INDEX IF NOT EXISTS jobs_key ON jobs (key)")
+
+    def _connect(self):
+        """
+        Open a new connection to the job database.
+
+        Connections are not shared between threads or processes; SQLite's WAL journal lets
+        readers proceed while another connection writes.
+
+        Returns:
+            sqlite3.Connection: The connection, in autocommit mode.
+        """
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA foreign_keys=ON")
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Open a connection and run one write transaction on it.
+
+        Yields:
+            sqlite3.Connection: The connection (with rows as sqlite3.Row), inside an immediate transaction.
+        """
+        with closing(self._connect()) as db:
+            db.row_factory = sqlite3.Row
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def submit(self, kind, payload, key=None):
+        """
+        Queue a job.
+
+        Args:
+            kind (str): The job type, which selects the worker handler.
+            payload (dict): JSON-serializable arguments of the job.
+            key (str, optional): An idempotency key, to find the job again with find. It is moved
+                from any earlier job with the same key. Defaults to None.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        with self._transaction() as db:
+            self._prune(db)
+            if key is not None:
+                db.execute("UPDATE jobs SET key = NULL WHERE key = ?", (key,))
+            db.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, key) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), time.time(), key),
+            )
+            self._append(db, job_id, {"status": "queued", "progress": 0})
+        return job_id
+
+    def claim(self):
+        """
+        Take the oldest queued job, first re-queuing jobs whose worker has stopped sending heartbeats.
+
+        Returns:
+            dict or None: The job ("id", "kind", "payload", "attempts"), or None if none is queued.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            for row in db.execute("SELECT id, attempts FROM jobs WHERE status = 'running' AND heartbeat_at < ?",
+                                  (now - self.lease_seconds,)).fetchall():
+                if row["attempts"] >= self.max_attempts:
+                    self._finish(db, row["id"], {"status": "error", "progress": -1,
+                                                 "error": "The job was interrupted too many times"})
+                else:
+                    db.execute("UPDATE jobs SET status = 'queued' WHERE id = ?", (row["id"],))
+                    self._append(db, row["id"], {"status": "queued", "progress": 0,
+                                                 "message": "Worker stopped, job queued again"})
+
+            row = db.execute("SELECT id, kind, payload, attempts FROM jobs WHERE status = 'queued' "
+                             "ORDER BY created_at LIMIT 1").fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, heartbeat_at = ? WHERE id = ?",
+                       (now, row["id"]))
+            return {"id": row["id"], "kind": row["kind"], "payload": json.loads(row["payload"]),
+                    "attempts": row["attempts"] + 1}
+
+    def heartbeat(self, job_id):
+        """
+        Renew the lease of a running job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            None
+        """
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+
+    def record(self, job_id, event):
+        """
+        Append a progress event to a running job (and renew its lease).
+
+        Args:
+            job_id (str): The job id.
+            event (dict): The event.
+
+        Returns:
+            None
+        """
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time(), job_id))
+            self._append(db, job_id, event)
+
+    def finish(self, job_id, event):
+        """
+        Record the last event of a job and mark it as finished.
+
+        Args:
+            job_id (str): The job id.
+            event (dict): The final event; its "status" ("done" or "error") becomes the job status.
+
+        Returns:
+            None
+        """
+        with self._transaction() as db:
+            self._finish(db, job_id, event)
+
+    def retry(self, job_id):
+        """
+        Queue a failed job again, with a fresh set of attempts.
+
+        Handlers checkpoint their progress, so the new run resumes where the failed one stopped.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            bool: True if the job was queued again, False if it does not exist or has not failed.
+        """
+        with self._transaction() as db:
+            updated = db.execute("UPDATE jobs SET status = 'queued', attempts = 0, finished_at = NULL "
+                                 "WHERE id = ? AND status = 'error'", (job_id,)).rowcount
+            if updated:
+                self._append(db, job_id, {"status": "queued", "progress": 0, "message": "Retrying"})
+        return bool(updated)
+
+    def find(self, key):
+        """
+        Look up the latest job submitted with an idempotency key.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            dict or None: The job's "payload" and current state (see status), or None if no
+                job with the key is kept.
+        """
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT id, payload FROM jobs WHERE key = ?", (key,)).fetchone()
+        status = self.status(row[0]) if row is not None else None
+        if status is None:
+            return None
+        return {**status, "payload": json.loads(row[1])}
+
+    def status(self, job_id):
+        """
+        Return the current state of a job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            dict or None: The job id, status and latest event, or None for an unknown job.
+        """
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT event FROM events WHERE job_id = ? ORDER BY idx DESC LIMIT 1",
+                             (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"job_id": job_id, **json.loads(row[0])}
+
+    def events(self, job_id, start=0, timeout=15.0, poll_interval=0.5):
+        """
+        Yield the events of a job as they are recorded, until the job has finished.
+
+        The database is polled, so events recorded by other processes are picked up.
+
+        Args:
+            job_id (str): The job id.
+            start (int, optional): Index of the first event to yield. Defaults to 0.
+            timeout (float, optional): Seconds without a new event before yielding None,
+                which lets streaming responses send keep-alives. Defaults to 15.0.
+            poll_interval (float, optional): Seconds between polls. Defaults to 0.5.
+
+        Yields:
+            dict or None: The events in order (each with its "index"), or None after a quiet period.
+        """
+        index = start
+        quiet_since = time.monotonic()
+        with closing(self._connect()) as db:
+            while True:
+                job = db.execute("SELECT finished_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if job is None:
+                    return
+                rows = db.execute("SELECT idx, event FROM events WHERE job_id = ? AND idx >= ? ORDER BY idx",
+                                  (job_id, index)).fetchall()
+                for idx, event in rows:
+                    yield {"index": idx, **json.loads(event)}
+                    index = idx + 1
+                if rows:
+                    quiet_since = time.monotonic()
+                elif job[0] is not None:
+                    return
+                elif time.monotonic() - quiet_since >= timeout:
+                    yield None
+                    quiet_since = time.monotonic()
+                else:
+                    time.sleep(poll_interval)
+
+    def _append(self, db, job_id, event):
+        """
+        Append an event to a job inside an open transaction.
+
+        Args:
+            db (sqlite3.Connection): The connection.
+            job_id (str): The job id.
+            event (dict): The event.
+
+        Returns:
+            None
+        """
+        db.execute("INSERT INTO events (job_id, idx, event) "
+                   "SELECT ?, COALESCE(MAX(idx) + 1, 0), ? FROM events WHERE job_id = ?",
+                   (job_id, json.dumps(event), job_id))
+
+    def _finish(self, db, job_id, event):
+        """
+        Mark a job as finished inside an open transaction.
+
+        Args:
+            db (sqlite3.Connection): The connection.
+            job_id (str): The job id.
+            event (dict): The final event.
+
+        Returns:
+            None
+        """
+        db.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?", (event["status"], time.time(), job_id))
+        self._append(db, job_id, event)
+
+    def _prune(self, db):
+        """
+        Delete jobs that finished more than retention_seconds ago, inside an open transaction.
+
+        Args:
+            db (sqlite3.Connection): The connection.
+
+        Returns:
+            None
+        """
+        db.execute("DELETE FROM jobs WHERE finished_at < ?", (time.time() - self.retention_seconds,))
+
+
+def _load_handler(path):
+    """
+    Import a job handler from its "module:function" path.
+
+    Args:
+        path (str): The handler path.
+
+    Returns:
+        callable: The handler.
+    """
+    module_name, _, function_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def run_job(queue, job, handler):
+    """
+    Run one claimed job and record its outcome.
+
+    The handler is called as handler(payload, progress_callback, job_id=...), where
+    progress_callback(progress, message=None, **fields) records a progress event; a thread
+    renews the job's lease while the handler runs. The handler's return value is recorded
+    as the job's "result".
+
+    Args:
+        queue (JobQueue): The queue the job was claimed from.
+        job (dict): The claimed job.
+        handler (callable): The handler for the job's kind.
+
+    Returns:
+        None
+    """
+    job_id = job["id"]
+
+    def progress_callback(progress, message=None, **fields):
+        event = {"status": "running", "progress": round(progress, 1), **fields}
+        if message:
+            event["message"] = message
+        queue.record(job_id, event)
+
+    stopped = threading.Event()
+
+    def keep_alive():
+        while not stopped.wait(queue.lease_seconds / 3):
+            queue.heartbeat(job_id)
+
+    heartbeat = threading.Thread(target=keep_alive, daemon=True)
+    heartbeat.start()
+    try:
+        result = handler(job["payload"], progress_callback, job_id=job_id)
+        queue.finish(job_id, {"status": "done", "progress": 100, "result": result})
+    except Exception as e:
+        print(f"Job {job_id} failed:\n{traceback.format_exc()}")
+        queue.finish(job_id, {"status": "error", "progress": -1, "error": str(e)})
+    finally:
+        stopped.set()
+        heartbeat.join()
+
+
+def worker_main(db_path, handlers, poll_interval=1.0):
+    """
+    Worker process loop: claim queued jobs and run them, one at a time, until the parent process exits.
+
+    Args:
+        db_path (str): Path of the job database.
+        handlers (dict): Handler paths ("module:function") by job kind.
+        poll_interval (float, optional): Seconds to wait when the queue is empty. Defaults to 1.0.
+
+    Returns:
+        None
+    """
+    queue = JobQueue(db_path)
+    loaded = {}
+    parent = multiprocessing.parent_process()
+    while parent is None or parent.is_alive():  # Stop with the server (e.g. on a reloader restart)
+        job = queue.claim()
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        if job["kind"] not in loaded:
+            loaded[job["kind"]] = _load_handler(handlers[job["kind"]])
+        run_job(queue, job, loaded[job["kind"]])
+
+
+def start_workers(db_path, handlers, processes, restart_interval=5.0):
+    """
+    Start worker processes for a job queue, and keep them running.
+
+    The workers are daemon processes started with "spawn", so they do not inherit the web
+    server's threads and stop together with it. A supervisor thread replaces workers that
+    exit (e.g. after a crash); the jobs they leave unfinished are picked up again once their
+    lease expires.
+
+    Args:
+        db_path (str): Path of the job database.
+        handlers (dict): Handler paths ("module:function") by job kind.
+        processes (int): Number of worker processes.
+        restart_interval (float, optional): Seconds between checks for exited workers. Defaults to 5.0.
+
+    Returns:
+        list: The running multiprocessing.Process objects (updated when workers are replaced).
+    """
+    context = multiprocessing.get_context("spawn")
+
+    def start_worker():
+        worker = context.Process(target=worker_main, args=(os.path.abspath(db_path), handlers), daemon=True)
+        worker.start()
+        return worker
+
+    def supervise():
+        while True:
+            time.sleep(restart_interval)
+            for i, worker in enumerate(workers):
+                if not worker.is_alive():
+                    print(f"Job worker {worker.pid} exited with code {worker.exitcode}, restarting")
+                    workers[i] = start_worker()
+
+    workers = [start_worker() for _ in range(processes)]
+    if workers:
+        threading.Thread(target=supervise, daemon=True, name="job-workers").start()
+    return workers
+
+
+class WorkerPool:
+    """
+    Worker processes for a job queue that are started on demand.
+
+    Starting the workers must not happen on import: spawned workers import the parent's main
+    module again, and a debug reloader imports the app in a process that never serves requests.
+    """
+
+    def __init__(self, db_path, handlers, processes):
+        """
+        Initialize the pool without starting any process.
+
+        Args:
+            db_path (str): Path of the job database.
+            handlers (dict): Handler paths ("module:function") by job kind.
+            processes (int): Number of worker processes.
+        """
+        self.db_path = db_path
+        self.handlers = handlers
+        self.processes = processes
+        self.workers = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the workers (see start_workers) unless this pool has started them already.
+
+        Returns:
+            list: The running multiprocessing.Process objects.
+        """
+        with self._lock:
+            if self.workers is None:
+                self.workers = start_workers(self.db_path, self.handlers, self.processes)
+            return self.workers
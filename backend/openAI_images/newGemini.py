@@ -9,6 +9,7 @@ import google.generativeai as genai
 import json
 import concurrent.futures
 import random
+from clients import get_gemini_model
 from common_functions import convert_text_to_speech, extract_audio_from_video
 
 load_dotenv()
@@ -165,7 +166,7 @@ def generate_video_description_with_gemini(video_file_path, max_retries=5, initi
             Only return the sentence without any additional information or text.
             '''
 
-            model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+            model = get_gemini_model("gemini-1.5-flash")
             response = model.generate_content([video_file, prompt],
                                               request_options={"timeout": 600})
             return response.text
@@ -331,7 +332,7 @@ def get_video_scenes_with_gemini(video_file_path):
     - Millisecond precision required for all timestamps.
     '''
 
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+    model = get_gemini_model("gemini-1.5-flash")
     response = model.generate_content([video_file, prompt],
                                       request_options={"timeout": 600})
     return response.text
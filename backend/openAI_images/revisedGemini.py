@@ -8,8 +8,11 @@ import time
 import google.generativeai as genai
 import json
 import concurrent.futures
+import queue
 import random
+from clients import get_gemini_model
 from common_functions import convert_text_to_speech, extract_audio_from_video
+from config import LLM_MAX_WORKERS, TTS_MAX_WORKERS
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -81,52 +84,125 @@ def get_video_duration(video_path):
   return float(result.stdout)
 
 
-def describe_existing_segments(segments_directory, scene_data, audio_folder,
-                               video_summary):
+def iter_segment_descriptions(segments_directory, scene_data, segments,
+                              audio_folder, video_summary, tts_engine=None,
+                              descriptions=None):
   """
-  Generate descriptions for video segments using Gemini API and convert them to audio files.
+  Describe video segments and synthesize their audio as a two-stage streaming pipeline.
+
+  Descriptions are generated on a pool limited by LLM_MAX_WORKERS. Every finished
+  description is put on a queue and handed to a separate text-to-speech pool limited by
+  TTS_MAX_WORKERS, so audio synthesis starts as soon as the first description arrives and
+  a slow synthesis never holds an LLM slot (or the reverse).
+
+  Segments whose description is already known (e.g. from a checkpoint of an earlier run)
+  skip the description stage and go straight to text-to-speech.
 
   Args:
-      segments_directory (str): Directory containing video segment files.
+      segments_directory (str): Directory containing the segment files written by
+          cut_video_by_no_talking.
       scene_data (tuple): Tuple containing two lists: scene_numbers and scene_ids.
+      segments (list): The segment dictionaries the scenes were cut from (see
+          cut_video_by_no_talking); scene number n is segments[n - 1]. Their "start" and
+          "end" timestamps give the scene durations, so the clips are not probed.
       audio_folder (str): Directory where the generated audio files will be saved.
       video_summary (str): Summary of the overall video context to guide the descriptions.
+      tts_engine (str, optional): Name of the text-to-speech engine. Defaults to the configured engine.
+      descriptions (dict, optional): Known descriptions by scene id. Defaults to None.
 
-  Returns:
-      list: Sorted list of tuples in the format 
-            (scene_number, scene_id, description, segment_file, description_audio).
+  Yields:
+      tuple: Events in completion order, in the format
+             (stage, scene_number, scene_id, description, segment_file, description_audio),
+             where stage is "description" (description_audio is None) or "audio".
+
+  Raises:
+      Exception: Propagates the first exception raised by either stage.
   """
+  # The segment files are named after their scene ids (see cut_video_by_no_talking),
+  # so the directory is never scanned and may hold files of other requests
   scene_numbers, scene_ids = scene_data
-  segment_files = os.listdir(segments_directory)
-  scene_descriptions = []
+  scenes = [(scene_number, scene_id, f"scene_{scene_id}.mp4")
+            for scene_number, scene_id in zip(scene_numbers, scene_ids)]
+  events = queue.Queue()
+
+  def scene_duration(scene_number):
+    segment = segments[scene_number - 1]
+    return (segment["end"] - segment["start"]) / 1000
 
-  def process_segment(segment_file):
+  def describe_segment(scene_number, scene_id, segment_file):
     segment_path = os.path.join(segments_directory, segment_file)
-    parts = segment_file.split("_")
-    scene_id = parts[1].split(".")[0]
+    description = generate_video_description_with_gemini(
+        segment_path, video_summary,
+        duration_seconds=scene_duration(scene_number))
+    return ("description", scene_number, scene_id, description, segment_file,
+            None)
 
-    if scene_id not in scene_ids:
-      return None
+  def synthesize_segment(event):
+    _, scene_number, scene_id, description, segment_file, _ = event
 
-    description = generate_video_description_with_gemini(segment_path,
-                                                          video_summary)
     description_audio = convert_text_to_speech(
-        description, audio_folder, f"audio_description_{scene_id}")
-    scene_idx = scene_ids.index(scene_id)
-    scene_number = scene_numbers[scene_idx]
-
-    return (scene_number, scene_id, description, segment_file,
+        description, audio_folder, f"audio_description_{scene_id}",
+        engine=tts_engine, max_duration=scene_duration(scene_number))
+    return ("audio", scene_number, scene_id, description, segment_file,
             description_audio)
 
-  with concurrent.futures.ThreadPoolExecutor() as executor:
-    future_to_segment = {
-        executor.submit(process_segment, segment_file): segment_file
-        for segment_file in segment_files
-    }
-    for future in concurrent.futures.as_completed(future_to_segment):
-      result = future.result()
-      if result:
-        scene_descriptions.append(result)
+  def forward(future):
+    # Both stages report to the same queue: either the result or the exception
+    events.put(future.exception() or future.result())
+
+  llm_executor = concurrent.futures.ThreadPoolExecutor(
+      max_workers=LLM_MAX_WORKERS)
+  tts_executor = concurrent.futures.ThreadPoolExecutor(
+      max_workers=TTS_MAX_WORKERS)
+  try:
+    descriptions = descriptions or {}
+    for scene_number, scene_id, segment_file in scenes:
+      if scene_id in descriptions:
+        events.put(("description", scene_number, scene_id,
+                    descriptions[scene_id], segment_file, None))
+      else:
+        llm_executor.submit(describe_segment, scene_number, scene_id,
+                            segment_file).add_done_callback(forward)
+
+    # Every segment produces one description event and one audio event
+    for _ in range(2 * len(scenes)):
+      event = events.get()
+      if isinstance(event, BaseException):
+        raise event
+      if event[0] == "description":
+        tts_executor.submit(synthesize_segment, event).add_done_callback(
+            forward)
+      yield event
+  finally:
+    llm_executor.shutdown(wait=False, cancel_futures=True)
+    tts_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def describe_existing_segments(segments_directory, scene_data, segments,
+                               audio_folder, video_summary, tts_engine=None):
+  """
+  Generate descriptions for video segments using Gemini API and convert them to audio files.
+
+  Descriptions and audio are produced by the pipelined iter_segment_descriptions.
+
+  Args:
+      segments_directory (str): Directory containing video segment files.
+      scene_data (tuple): Tuple containing two lists: scene_numbers and scene_ids.
+      segments (list): The segment dictionaries the scenes were cut from.
+      audio_folder (str): Directory where the generated audio files will be saved.
+      video_summary (str): Summary of the overall video context to guide the descriptions.
+      tts_engine (str, optional): Name of the text-to-speech engine. Defaults to the configured engine.
+
+  Returns:
+      list: Sorted list of tuples in the format 
+            (scene_number, scene_id, description, segment_file, description_audio).
+  """
+  scene_descriptions = [
+      event[1:] for event in iter_segment_descriptions(
+          segments_directory, scene_data, segments, audio_folder,
+          video_summary, tts_engine=tts_engine)
+      if event[0] == "audio"
+  ]
 
   scene_descriptions.sort(key=lambda x: x[0])
   return scene_descriptions
@@ -171,7 +247,8 @@ def cut_video_by_no_talking(input_video_path, segments, output_folder):
 
 
 def generate_video_description_with_gemini(video_file_path, video_summary,
-                                           max_retries=5, initial_delay=1):
+                                           max_retries=5, initial_delay=1,
+                                           duration_seconds=None):
   """
   Generate a concise video description using the Gemini API based on a video context summary.
 
@@ -180,6 +257,8 @@ def generate_video_description_with_gemini(video_file_path, video_summary,
       video_summary (str): Summary of the overall video context.
       max_retries (int, optional): Maximum number of retries for the API call. Defaults to 5.
       initial_delay (float, optional): Initial delay in seconds between retries. Defaults to 1.
+      duration_seconds (float, optional): Duration of the scene, if known. Defaults to
+          probing the video file.
 
   Returns:
       str: Generated video description.
@@ -190,7 +269,8 @@ def generate_video_description_with_gemini(video_file_path, video_summary,
   for attempt in range(max_retries):
     try:
       # Get scene duration and calculate a word limit based on a 170 WPM rate.
-      duration_seconds = get_video_duration(video_file_path)
+      if duration_seconds is None:
+        duration_seconds = get_video_duration(video_file_path)
       word_limit = int((duration_seconds * 170) / 60)  # 170 WPM conversion
 
       video_file = genai.upload_file(path=video_file_path)
@@ -215,7 +295,7 @@ def generate_video_description_with_gemini(video_file_path, video_summary,
             """
       
       print("Word limit:", word_limit)
-      model = genai.GenerativeModel(model_name=modelName)
+      model = get_gemini_model(modelName)
       response = model.generate_content([video_file, prompt2],
                                         request_options={"timeout": 600})
       return response.text.strip('"')
@@ -249,7 +329,7 @@ def get_video_summary_with_gemini(video_file_path):
     - Any important context that would help someone understand individual scenes
     """
 
-  model = genai.GenerativeModel(model_name=modelName)
+  model = get_gemini_model(modelName)
   response = model.generate_content([video_file, prompt],
                                     request_options={"timeout": 600})
   return response.text
@@ -416,7 +496,7 @@ def get_video_scenes_with_gemini(video_file_path):
     - Millisecond precision required for all timestamps.
     """
 
-  model = genai.GenerativeModel(model_name=modelName)
+  model = get_gemini_model(modelName)
   response = model.generate_content([video_file, prompt],
                                     request_options={"timeout": 600})
   return response.text
@@ -1,12 +1,8 @@
-from openai import OpenAI
-from dotenv import load_dotenv
 import os
-from openai import OpenAI
 from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+from clients import get_openai_client
+from config import LLM_MAX_WORKERS
 
 
 def generate_image_description_with_openai(image_path):
@@ -23,7 +19,7 @@ def generate_image_description_with_openai(image_path):
         import base64
         image_data = base64.b64encode(image_file.read()).decode("utf-8")
 
-    response = client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o",
         messages=[
             {
@@ -59,7 +55,7 @@ def summarize_descriptions_with_openai(descriptions):
         + "\n".join([f"- {desc}" for desc in descriptions])
     )
 
-    response = client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o",
         messages=[
             {"role": "system", "content": "You are an assistant that creates short, clear, and concise audio descriptions."},
@@ -122,7 +118,7 @@ def describe_scenes_with_openai(scene_changes, frames_dir):
     scene_descriptions = []
 
     for _, frames in enumerate(scene_frames):
-        with ThreadPoolExecutor() as executor:
+        with ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS) as executor:
             frame_descriptions = list(
                 executor.map(
                     generate_image_description_with_openai,
@@ -1,6 +1,6 @@
 import subprocess
 import sys
-from scenedetect import VideoManager, SceneManager
+from scenedetect import SceneManager, open_video
 from scenedetect.detectors import ContentDetector
 from dotenv import load_dotenv
 import re
@@ -9,6 +9,9 @@ import time
 import PIL.Image
 import google.generativeai as genai
 from openai import OpenAI
+
+from clients import get_gemini_model
+
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
@@ -47,7 +50,7 @@ def generate_video_description_with_gemini(video_file_path):
     '''
 
     # Choose a Gemini model.
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+    model = get_gemini_model("gemini-1.5-flash")
 
     # Make the LLM request.
     response = model.generate_content([video_file, prompt],
@@ -93,25 +96,62 @@ def describe_scenes_with_gemini_video(video_file, timestamps, output_dir):
     return scene_descriptions, tuple_timestamps, scene_files
 
 
-def detect_scenes(video_path):
+FAST_FRAME_SKIP = 1  # Frames skipped between analysed frames in fast mode
+PROGRESS_CHUNK_SECONDS = 10.0  # Seconds of video analysed between progress callbacks
+
+
+def detect_scenes(video_path, fast=False, frame_skip=None, progress_callback=None,
+                  proxy_path=None, threshold=10.0):
     """
     Detect scene changes in a video using the SceneDetect library.
 
+    By default every frame is analysed at full resolution. In fast mode the frames are
+    automatically downscaled before detection and only every (frame_skip + 1)-th frame is
+    analysed. Detection can optionally run on a low-resolution analysis proxy of the
+    same video (see common_functions.create_analysis_proxy) instead of the original file.
+
     Args:
         video_path (str): Path to the input video file.
+        fast (bool, optional): Enable automatic downscaling and frame skipping. Defaults to False.
+        frame_skip (int, optional): Number of frames to skip between analysed frames.
+            Defaults to FAST_FRAME_SKIP in fast mode and 0 otherwise.
+        progress_callback (callable, optional): Called as progress_callback(frames_done, total_frames)
+            after every PROGRESS_CHUNK_SECONDS of analysed video, e.g. to emit NDJSON progress updates.
+        proxy_path (str, optional): Path to an analysis proxy of the video. It is used instead of
+            video_path when the file exists. Defaults to None.
+        threshold (float, optional): ContentDetector threshold. Defaults to 10.0.
 
     Returns:
         list: A list of tuples, each containing the start and end timecodes (as strings) for a detected scene.
     """
-    video_manager = VideoManager([video_path])
+    if frame_skip is None:
+        frame_skip = FAST_FRAME_SKIP if fast else 0
+
+    analysis_path = proxy_path if proxy_path and os.path.exists(proxy_path) else video_path
+    video = open_video(analysis_path)
     scene_manager = SceneManager()
 
     # Add the ContentDetector algorithm (detects cuts based on content changes).
-    scene_manager.add_detector(ContentDetector(threshold=10.0))
+    scene_manager.add_detector(ContentDetector(threshold=threshold))
+
+    if fast:
+        scene_manager.auto_downscale = True
+    else:
+        scene_manager.auto_downscale = False
+        scene_manager.downscale = 1
+
+    total_frames = video.duration.frame_num if video.duration is not None else 0
 
-    # Start video manager to load the video.
-    video_manager.start()
-    scene_manager.detect_scenes(video_manager)
+    # Detect in chunks so progress can be reported while the video is being decoded.
+    while True:
+        processed = scene_manager.detect_scenes(
+            video, duration=PROGRESS_CHUNK_SECONDS, frame_skip=frame_skip
+        )
+        if progress_callback:
+            frames_done = min(video.frame_number, total_frames) if total_frames else video.frame_number
+            progress_callback(frames_done, total_frames)
+        if processed <= 0 or (total_frames and video.frame_number >= total_frames):
+            break
 
     # Obtain list of detected scenes.
     scene_list = scene_manager.get_scene_list()
@@ -165,7 +205,7 @@ def get_talking_timestamps_with_gemini(video_file_path):
     Only if there is no talking in the video, return only the text without additional informations: NO_TALKING
     '''
 
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+    model = get_gemini_model("gemini-1.5-flash")
 
     response = model.generate_content([video_file, prompt],
                                       request_options={"timeout": 600})
@@ -8,6 +8,8 @@ import PIL.Image
 import google.generativeai as genai
 from openai import OpenAI
 
+from clients import get_gemini_model
+
 
 def get_video_duration(video_path):
     """
@@ -34,8 +36,6 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
-model = genai.GenerativeModel("gemini-1.5-flash")
-
 
 def calculate_timestamp(frame, frame_rate):
     """
@@ -83,7 +83,7 @@ def generate_video_description_with_gemini(video_file_path):
 
     print(f"Completed upload: {video_file.uri}")
     prompt = "Transcribe the audio from this video. Provide visual descriptions without timestamps for any salient events in the video"
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+    model = get_gemini_model("gemini-1.5-flash")
     response = model.generate_content([video_file, prompt],
                                       request_options={"timeout": 600})
     return response.text
@@ -206,7 +206,7 @@ def describe_with_gemini_whole_video(video_path):
 Transcribe the audio and describe the video scenes starting from the given timestamp. Provide timestamps for each key event, and describe the scenes, objects, actions, and transitions briefly in English. 
 Do not include introductory phrases like "Okay, here's the transcript and video description."
     '''
-    model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+    model = get_gemini_model("gemini-1.5-flash")
     response = model.generate_content(
         [video_file, transcription_prompt], request_options={"timeout": 600})
     return response.text
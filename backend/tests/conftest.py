@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# The backend modules import each other as top-level modules (as when app.py is run from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing the app must not need real credentials or start worker processes
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("PROCESS_MAX_WORKERS", "0")
+
+# The app creates its folders and job database relative to the working directory on import
+os.chdir(tempfile.mkdtemp(prefix="backend-tests-"))
@@ -0,0 +1,122 @@
+import wave
+
+import numpy as np
+import pytest
+
+import audio_processing
+from audio_processing import read_audio, render_track, write_wav
+
+RATE = 8000
+
+
+def tone(path, seconds, amplitude=0.25, frequency=440):
+    """
+    Write a sine tone WAV clip and return its path and samples.
+    """
+    t = np.arange(int(seconds * RATE)) / RATE
+    samples = (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    write_wav(str(path), samples, RATE)
+    return str(path), read_audio(str(path))[0]
+
+
+def test_render_track_places_clips_at_sample_offsets(tmp_path):
+    first, first_samples = tone(tmp_path / "a.wav", 0.5)
+    second, second_samples = tone(tmp_path / "b.wav", 0.25, frequency=880)
+    output = str(tmp_path / "track.wav")
+
+    render_track([(first, 0.0), (second, 1.0)], output, sample_rate=RATE, duration=2.0, max_workers=2)
+
+    track, rate = read_audio(output)
+    assert rate == RATE
+    assert len(track) == 2 * RATE  # Padded to the video duration
+    np.testing.assert_allclose(track[:len(first_samples)], first_samples, atol=1e-4)
+    np.testing.assert_allclose(track[RATE:RATE + len(second_samples)], second_samples, atol=1e-4)
+    assert not track[len(first_samples):RATE].any()
+
+
+def test_render_track_sums_overlapping_clips_without_scaling(tmp_path):
+    clip, samples = tone(tmp_path / "a.wav", 0.5)
+    output = str(tmp_path / "track.wav")
+
+    render_track([(clip, 0.0), (clip, 0.0)], output, sample_rate=RATE)
+
+    np.testing.assert_allclose(read_audio(output)[0], 2 * samples, atol=1e-4)
+
+
+def test_render_track_extends_past_the_duration_and_fits_clips(tmp_path):
+    clip, _ = tone(tmp_path / "a.wav", 1.0)
+    output = str(tmp_path / "track.wav")
+
+    render_track([(clip, 0.5), (clip, 2.0)], output, sample_rate=RATE, duration=1.0, max_durations=[0.5, None])
+
+    with wave.open(output, "rb") as f:
+        assert f.getnframes() == 3 * RATE  # Up to the end of the last clip
+    track = read_audio(output)[0]
+    assert not track[RATE:2 * RATE].any()  # The first clip was fitted into its 0.5 s slot
+
+
+def test_memory_mapped_render_matches_in_memory_render(tmp_path, monkeypatch):
+    clip, _ = tone(tmp_path / "a.wav", 0.5)
+    clips = [(clip, start) for start in (0.0, 0.75, 3.0)]
+    render_track(clips, str(tmp_path / "memory.wav"), sample_rate=RATE)
+
+    monkeypatch.setattr(audio_processing, "MEMMAP_TRACK_SECONDS", 0.1)
+    render_track(clips, str(tmp_path / "mapped.wav"), sample_rate=RATE)
+
+    np.testing.assert_array_equal(read_audio(str(tmp_path / "memory.wav"))[0],
+                                  read_audio(str(tmp_path / "mapped.wav"))[0])
+
+
+def test_render_track_reports_decode_errors(tmp_path):
+    broken = tmp_path / "broken.mp3"
+    broken.write_bytes(b"not audio")
+
+    with pytest.raises((RuntimeError, OSError)):
+        render_track([(str(broken), 0.0)], str(tmp_path / "track.wav"), sample_rate=RATE)
+
+
+def mp3_frames(header, frame_length, count, body=b""):
+    """
+    Build an MP3 stream of count frames with the given 4-byte header.
+    """
+    frame = header + body
+    return (frame + b"\0" * (frame_length - len(frame))) * count
+
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, stereo: 417-byte frames of 1152 samples
+MPEG1_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+# MPEG-2 Layer III, 32 kbit/s, 24 kHz, mono (the gTTS format): 96-byte frames of 576 samples
+MPEG2_HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+
+
+def test_mp3_duration_is_counted_from_frame_headers(tmp_path):
+    path = tmp_path / "speech.mp3"
+    path.write_bytes(mp3_frames(MPEG2_HEADER, 96, 50))
+
+    assert audio_processing.get_mp3_duration(str(path)) == pytest.approx(50 * 576 / 24000)
+
+
+def test_mp3_duration_skips_id3_tags_and_leading_junk(tmp_path):
+    tag = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + b"\0" * 20
+    path = tmp_path / "tagged.mp3"
+    path.write_bytes(tag + b"\xFF\x00junk" + mp3_frames(MPEG1_HEADER, 417, 100))
+
+    assert audio_processing.get_mp3_duration(str(path)) == pytest.approx(100 * 1152 / 44100)
+
+
+def test_mp3_duration_prefers_the_xing_frame_count(tmp_path):
+    # The Xing tag follows the 32 bytes of stereo MPEG-1 side information
+    xing = b"\0" * 32 + b"Xing" + (1).to_bytes(4, "big") + (500).to_bytes(4, "big")
+    path = tmp_path / "vbr.mp3"
+    path.write_bytes(mp3_frames(MPEG1_HEADER, 417, 1, body=xing) + mp3_frames(MPEG1_HEADER, 417, 3))
+
+    assert audio_processing.get_mp3_duration(str(path)) == pytest.approx(500 * 1152 / 44100)
+
+
+def test_read_audio_duration_handles_wav_and_rejects_other_files(tmp_path):
+    write_wav(str(tmp_path / "a.wav"), np.zeros(RATE * 3 // 2, dtype=np.float32), RATE)
+    (tmp_path / "b.mp3").write_bytes(b"not an mp3 file")
+
+    assert audio_processing.read_audio_duration(str(tmp_path / "a.wav")) == pytest.approx(1.5)
+    assert audio_processing.read_audio_duration(str(tmp_path / "b.mp3")) is None
+    assert audio_processing.read_audio_duration(str(tmp_path / "c.ogg")) is None
@@ -0,0 +1,89 @@
+import numpy as np
+
+from audio_processing import read_audio, render_track, rerender_track_ranges, write_wav
+from export_manifest import build_manifest, changed_ranges, load_manifest, same_inputs, save_manifest
+
+RATE = 8000
+
+
+def clip(name, start, end):
+    return {"audio": name, "fingerprint": name, "start": start, "end": end}
+
+
+def test_unchanged_clips_produce_no_ranges():
+    clips = [clip("a", 0, 1000), clip("b", 2000, 3000)]
+
+    assert changed_ranges(clips, list(reversed(clips))) == []
+
+
+def test_changed_ranges_cover_removed_and_added_slots():
+    before = [clip("a", 0, 1000), clip("b", 2000, 3000), clip("c", 5000, 6000)]
+    after = [clip("a", 0, 1000), clip("b2", 2000, 2500), clip("c", 5000, 6000), clip("d", 8000, 9000)]
+
+    assert changed_ranges(before, after) == [(2000, 3000), (8000, 9000)]
+
+
+def test_changed_ranges_widen_over_straddling_clips():
+    # The new clip overlaps the unchanged clip "b", which overlaps the unchanged clip "c"
+    before = [clip("a", 0, 1000), clip("b", 1500, 2500), clip("c", 2400, 4000)]
+    after = before + [clip("new", 1000, 1600)]
+
+    assert changed_ranges(before, after) == [(1000, 4000)]
+
+
+def test_changed_ranges_merge_overlapping_slots():
+    before = [clip("a", 0, 1000)]
+    after = [clip("a2", 500, 1500), clip("b", 1500, 2000)]
+
+    assert changed_ranges(before, after) == [(0, 1500), (1500, 2000)]
+
+
+def test_same_inputs_compares_every_input(tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    manifest = build_manifest(str(video), [], {"srt": ""}, stream_copy=True)
+
+    assert same_inputs(manifest, build_manifest(str(video), [], {"srt": ""}, stream_copy=True))
+    assert not same_inputs(manifest, build_manifest(str(video), [], {"srt": "1"}, stream_copy=True))
+    assert not same_inputs(manifest, build_manifest(str(video), [], {"srt": ""}, stream_copy=True,
+                                                    deliverables=["vtt"]))
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest = build_manifest(str(tmp_path / "missing.mp4"), [], {}, stream_copy=False)
+    save_manifest(str(tmp_path / "export"), manifest)
+
+    assert load_manifest(str(tmp_path / "export")) == manifest
+    assert load_manifest(str(tmp_path / "other")) is None
+
+
+def test_rerendering_changed_ranges_matches_a_full_render(tmp_path):
+    clips = []
+    for index, frequency in enumerate((330, 440, 550, 660)):
+        t = np.arange(RATE // 2) / RATE
+        path = str(tmp_path / f"clip{index}.wav")
+        write_wav(path, 0.2 * np.sin(2 * np.pi * frequency * t).astype(np.float32), RATE)
+        clips.append(path)
+
+    old = [(clips[0], 0.0), (clips[1], 1.0), (clips[2], 2.0)]
+    new = [(clips[0], 0.0), (clips[3], 1.25), (clips[2], 2.0)]
+    track = str(tmp_path / "track.wav")
+    render_track(old, track, sample_rate=RATE, duration=3.0)
+
+    ranges = changed_ranges(
+        [clip(path, int(start * 1000), int(start * 1000) + 500) for path, start in old],
+        [clip(path, int(start * 1000), int(start * 1000) + 500) for path, start in new],
+    )
+    assert ranges == [(1000, 1750)]
+    assert rerender_track_ranges(track, new, [(start / 1000, end / 1000) for start, end in ranges])
+
+    expected = str(tmp_path / "expected.wav")
+    render_track(new, expected, sample_rate=RATE, duration=3.0)
+    np.testing.assert_array_equal(read_audio(track)[0], read_audio(expected)[0])
+
+
+def test_rerendering_past_the_end_of_the_track_is_refused(tmp_path):
+    track = str(tmp_path / "track.wav")
+    write_wav(track, np.zeros(RATE, dtype=np.float32), RATE)
+
+    assert not rerender_track_ranges(track, [], [(0.5, 2.0)])
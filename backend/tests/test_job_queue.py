@@ -0,0 +1,113 @@
+import time
+from itertools import takewhile
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue, WorkerPool, run_job
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.2, max_attempts=2)
+
+
+def messages(queue, job_id):
+    """
+    Messages of the events recorded so far (events yields None once it has to wait).
+    """
+    return [event.get("message") for event in takewhile(bool, queue.events(job_id, timeout=0))]
+
+
+def test_run_job_records_progress_and_result(queue):
+    def handler(payload, progress_callback, job_id):
+        progress_callback(50, "Halfway", segment={"index": 0})
+        return {"echo": payload["value"]}
+
+    job_id = queue.submit("echo", {"value": 1})
+    run_job(queue, queue.claim(), handler)
+
+    events = list(queue.events(job_id, timeout=0))
+    assert [event["status"] for event in events] == ["queued", "running", "done"]
+    assert events[1] == {"index": 1, "status": "running", "progress": 50, "message": "Halfway",
+                         "segment": {"index": 0}}
+    assert queue.status(job_id)["result"] == {"echo": 1}
+    assert queue.claim() is None
+
+
+def test_expired_lease_requeues_the_job(queue):
+    job_id = queue.submit("echo", {})
+    assert queue.claim()["attempts"] == 1
+
+    # The worker died: no heartbeats arrive until the lease expires
+    assert queue.claim() is None
+    time.sleep(0.3)
+    job = queue.claim()
+
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+    assert "Worker stopped, job queued again" in messages(queue, job_id)
+
+
+def test_heartbeats_keep_the_lease(queue):
+    queue.submit("echo", {})
+    job = queue.claim()
+    for _ in range(3):
+        time.sleep(0.1)
+        queue.heartbeat(job["id"])
+
+    assert queue.claim() is None
+
+
+def test_job_fails_after_too_many_interrupted_attempts(queue):
+    job_id = queue.submit("echo", {})
+    queue.claim()
+    time.sleep(0.3)
+    queue.claim()
+    time.sleep(0.3)
+
+    assert queue.claim() is None
+    assert queue.status(job_id)["status"] == "error"
+
+
+def test_failed_job_can_be_retried(queue):
+    attempts = []
+
+    def handler(payload, progress_callback, job_id):
+        attempts.append(job_id)
+        if len(attempts) == 1:
+            raise RuntimeError("network down")
+        return "ok"
+
+    job_id = queue.submit("flaky", {})
+    run_job(queue, queue.claim(), handler)
+    assert queue.status(job_id)["error"] == "network down"
+    assert not queue.retry(queue.submit("other", {}))  # Only failed jobs are retried
+
+    assert queue.retry(job_id)
+    job = queue.claim()
+    assert job["id"] == job_id and job["attempts"] == 1
+    run_job(queue, job, handler)
+    assert queue.status(job_id)["result"] == "ok"
+
+
+def test_find_returns_the_latest_job_for_a_key(queue):
+    first = queue.submit("echo", {"n": 1}, key="video")
+    second = queue.submit("echo", {"n": 2}, key="video")
+
+    found = queue.find("video")
+    assert found["job_id"] == second and found["payload"] == {"n": 2}
+    assert queue.status(first) is not None
+    assert queue.find("other") is None
+
+
+def test_worker_pool_starts_workers_once(monkeypatch):
+    started = []
+    monkeypatch.setattr(job_queue, "start_workers",
+                        lambda db_path, handlers, processes: started.append(processes) or ["worker"])
+    pool = WorkerPool("jobs.sqlite3", {}, 2)
+
+    assert started == []  # Nothing runs until the pool is started
+    assert pool.start() == ["worker"]
+    assert pool.start() == ["worker"]
+    assert started == [2]
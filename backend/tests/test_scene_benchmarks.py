@@ -0,0 +1,33 @@
+import pytest
+
+from benchmarks.scene_detectors import _truth_times, match_events, precision_recall
+from benchmarks.synthetic_videos import _shot_timeline, _tone_expression
+
+
+def test_shot_timeline_places_cuts_and_fade_midpoints():
+    offsets, transitions, duration = _shot_timeline([(4.0, "cut", 0.0), (3.0, "fade", 1.0), (5.0, "cut", 0.0)])
+
+    assert offsets == [None, 6.0]
+    assert transitions[0] == {"time": 4.0, "kind": "hard", "transition": "cut"}
+    assert transitions[1] == {"time": 6.5, "kind": "soft", "transition": "fade", "start": 6.0, "end": 7.0}
+    assert duration == 11.0  # The fade overlaps the two shots
+
+
+def test_tone_expression_is_silent_without_speech():
+    assert _tone_expression([]) == "0"
+    assert "between(t\\,1.0\\,2.5)" in _tone_expression([(1.0, 2.5)])
+
+
+def test_match_events_counts_each_truth_event_once():
+    assert match_events([4.1, 4.2, 9.0], [4.0, 6.5], tolerance=0.5) == (1, 2, 1)
+
+
+def test_precision_recall_treats_empty_sets_as_perfect():
+    assert precision_recall(0, 0, 0) == (1.0, 1.0)
+    assert precision_recall(1, 1, 3) == pytest.approx((0.5, 0.25))
+
+
+def test_speech_truth_skips_video_boundaries():
+    entry = {"duration": 10.0, "speech": [{"start": 0.0, "end": 2.0}, {"start": 8.0, "end": 10.0}]}
+
+    assert _truth_times(entry, "speech") == [2.0, 8.0]
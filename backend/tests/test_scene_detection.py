@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+import openAI_images.scenes_to_description_optimized_gemini as sdg
+
+FPS = 25
+
+
+def write_video(path, colors, frames_per_shot=2 * FPS):
+    """
+    Write an MJPEG video of solid-colour shots (one hard cut between consecutive shots).
+    """
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), FPS, (160, 90))
+    for color in colors:
+        frame = np.zeros((90, 160, 3), np.uint8)
+        frame[:] = color
+        for _ in range(frames_per_shot):
+            writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+@pytest.fixture
+def two_shots(tmp_path):
+    return write_video(tmp_path / "video.avi", [(0, 0, 255), (255, 255, 0)])
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_detect_scenes_finds_the_cut(two_shots, fast):
+    assert sdg.detect_scenes(two_shots, fast=fast) == [("00:00:00", "00:00:02"), ("00:00:02", "00:00:04")]
+
+
+def test_detect_scenes_reports_progress_per_chunk(two_shots, monkeypatch):
+    monkeypatch.setattr(sdg, "PROGRESS_CHUNK_SECONDS", 1.0)
+    progress = []
+
+    sdg.detect_scenes(two_shots, fast=True, progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert len(progress) >= 4
+    assert all(total == 4 * FPS for _, total in progress)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert progress[-1][0] == 4 * FPS
+
+
+def test_detect_scenes_prefers_an_existing_proxy(tmp_path, two_shots):
+    proxy = write_video(tmp_path / "proxy.avi", [(0, 0, 255), (255, 255, 0), (0, 255, 0)])
+
+    assert len(sdg.detect_scenes(two_shots, proxy_path=proxy)) == 3
+    assert len(sdg.detect_scenes(two_shots, proxy_path=str(tmp_path / "missing.avi"))) == 2
@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pytest
+
+import tts_cache
+from audio_processing import write_wav
+from tts_cache import CACHE_DIR, DURATIONS_DIR, TTSCache, make_cache_key
+
+CLIP_BYTES = 800
+
+
+def disk_bytes(folder):
+    """
+    Total size of the files below folder, counting hard-linked files once.
+    """
+    inodes = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            stat = os.stat(os.path.join(root, name))
+            inodes[(stat.st_dev, stat.st_ino)] = stat.st_size
+    return sum(inodes.values())
+
+
+def write_clip(path):
+    with open(path, "wb") as f:
+        f.write(b"\0" * CLIP_BYTES)
+
+
+def fill(cache, count, start=0):
+    """
+    Synthesize count distinct clips, oldest first, and return their keys and paths.
+    """
+    keys, paths = [], []
+    for index in range(start, start + count):
+        key = make_cache_key(f"sentence {index}", "en", "com", "gtts")
+        path = cache.get_or_create(key, write_clip)
+        # Give every clip a distinct, increasing last-used time
+        os.utime(path, (index, index))
+        os.utime(os.path.join(cache.entries_folder, os.path.basename(path)), (index, index))
+        keys.append(key)
+        paths.append(path)
+    return keys, paths
+
+
+def test_cache_key_ignores_whitespace_but_not_the_engine():
+    key = make_cache_key("A  clear\nsky.", "en", "com", "gtts")
+
+    assert key == make_cache_key("A clear sky.", "en", "com", "gtts")
+    assert key != make_cache_key("A clear sky.", "en", "com", "espeak")
+    assert key != make_cache_key("A clear sky.", "en", "com", "gtts", variant="fit:1.5")
+
+
+def test_get_or_create_synthesizes_once_and_hands_out_a_link(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10 * CLIP_BYTES)
+    calls = []
+
+    def synthesize(path):
+        calls.append(path)
+        write_clip(path)
+
+    key = make_cache_key("Hello", "en", "com", "gtts")
+    path = cache.get_or_create(key, synthesize)
+
+    assert cache.get_or_create(key, synthesize) == path
+    assert len(calls) == 1
+    assert os.path.dirname(path) == str(tmp_path)
+    entry = os.path.join(tmp_path, CACHE_DIR, os.path.basename(path))
+    assert os.path.samefile(path, entry)
+    assert cache.key_for_path(path) == key
+
+
+def test_eviction_keeps_the_disk_within_budget(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=3 * CLIP_BYTES)
+
+    keys, paths = fill(cache, 10)
+
+    assert disk_bytes(tmp_path) <= 3 * CLIP_BYTES
+    assert os.path.exists(paths[-1])  # The newest clip is never evicted
+    assert not os.path.exists(paths[0])
+    assert cache.get(keys[0]) is None
+
+
+def test_eviction_skips_referenced_clips_until_their_owner_is_deleted(tmp_path):
+    cache = TTSCache(str(tmp_path / "audio"), max_bytes=CLIP_BYTES)
+    owner = tmp_path / "manifest.json"
+    owner.write_text("{}")
+
+    keys, paths = fill(cache, 1)
+    cache.set_references(str(owner), keys)
+    _, more_paths = fill(cache, 5, start=1)
+
+    assert os.path.exists(paths[0])
+    assert os.path.exists(more_paths[-1])
+    assert not os.path.exists(more_paths[0])
+
+    owner.unlink()
+    fill(cache, 1, start=6)
+    assert not os.path.exists(paths[0])
+
+
+def test_eviction_removes_stored_durations(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=CLIP_BYTES)
+    key = make_cache_key("Hello", "en", "com", "gtts")
+    cache._write_duration(key, 1.25)
+    cache.get_or_create(key, write_clip)
+    os.utime(cache.get(key), (0, 0))
+    os.utime(os.path.join(cache.entries_folder, os.path.basename(cache.get(key, publish=False))), (0, 0))
+
+    assert cache._read_duration(key) == pytest.approx(1.25)
+    fill(cache, 2, start=1)
+    assert not os.path.exists(os.path.join(cache.entries_folder, DURATIONS_DIR, key))
+
+
+def test_durations_are_measured_once_per_key(tmp_path, monkeypatch):
+    cache = TTSCache(str(tmp_path))
+    key = make_cache_key("Hello", "en", "com", "gtts")
+    path = cache.get_or_create(key, lambda output: write_wav(output, np.zeros(8000, dtype=np.float32), 8000),
+                               extension="wav")
+
+    assert tts_cache.get_audio_durations([path]) == [pytest.approx(1.0)]
+
+    # A new process reads the stored duration instead of measuring the file again
+    monkeypatch.setattr(tts_cache, "_caches", {})
+    monkeypatch.setattr(tts_cache, "probe_audio_durations",
+                        lambda paths: pytest.fail("measured again") if paths else [])
+    assert tts_cache.get_audio_durations([path]) == [pytest.approx(1.0)]
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+from job_queue import JobQueue
+from upload_store import UploadStore, parse_sha256
+from workspaces import WorkspaceManager
+
+VIDEO = b"video content"
+VIDEO_SHA256 = hashlib.sha256(VIDEO).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / "uploads"))
+
+
+def test_parse_sha256_normalizes_and_validates():
+    assert parse_sha256(f" {VIDEO_SHA256.upper()}\n") == VIDEO_SHA256
+    assert parse_sha256(VIDEO_SHA256[:-1]) is None
+    assert parse_sha256("../" + VIDEO_SHA256[3:]) is None
+    assert parse_sha256(None) is None
+
+
+def test_same_content_is_stored_once(store):
+    first = store.save(io.BytesIO(VIDEO), "holiday.MP4")
+    second = store.save(io.BytesIO(VIDEO), "copy.mp4")
+
+    assert first == second == f"{VIDEO_SHA256}.mp4"
+    assert store.find(VIDEO_SHA256) == first
+    files = [name for name in os.listdir(store.root) if not os.path.islink(os.path.join(store.root, name))]
+    assert files == [first]
+    assert store.content_name("holiday.MP4") == store.content_name("copy.mp4") == first
+
+
+def test_reusing_a_name_moves_the_link_but_keeps_the_content(store):
+    old = store.save(io.BytesIO(VIDEO), "video.mp4")
+    new = store.save(io.BytesIO(b"other content"), "video.mp4")
+
+    assert store.content_name("video.mp4") == new
+    with open(os.path.join(store.root, old), "rb") as f:
+        assert f.read() == VIDEO
+
+
+def test_legacy_uploads_move_into_the_store(store):
+    with open(os.path.join(store.root, "legacy.mp4"), "wb") as f:
+        f.write(VIDEO)
+
+    assert store.content_name("legacy.mp4") == f"{VIDEO_SHA256}.mp4"
+    assert os.path.islink(os.path.join(store.root, "legacy.mp4"))
+    assert store.content_name("missing.mp4") is None
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "UPLOAD_FOLDER", str(tmp_path / "uploads"))
+    monkeypatch.setattr(app, "video_store", UploadStore(str(tmp_path / "uploads")))
+    monkeypatch.setattr(app, "workspaces", WorkspaceManager(str(tmp_path / "workspaces")))
+    monkeypatch.setattr(app, "process_jobs", JobQueue(str(tmp_path / "jobs.sqlite3")))
+    monkeypatch.setattr(app.job_workers, "start", lambda: [])
+    return app.app.test_client()
+
+
+def start_processing(client, **form):
+    """
+    Post to /process-video and return its first NDJSON update, without following the job.
+    """
+    response = client.post("/process-video", data={"action": "new_gemini", **form})
+    assert response.status_code == 200
+    first = json.loads(next(iter(response.response)))
+    response.close()
+    return first
+
+
+def test_check_video_by_hash(client):
+    import app
+
+    app.video_store.save(io.BytesIO(VIDEO), "video.mp4")
+
+    found = client.get(f"/check-video?sha256={VIDEO_SHA256.upper()}")
+    assert found.status_code == 200 and found.json["video_name"] == f"{VIDEO_SHA256}.mp4"
+    assert client.get(f"/check-video?sha256={'0' * 64}").status_code == 404
+    assert client.get("/check-video?sha256=not-a-hash").status_code == 400
+
+
+def test_process_video_rejects_invalid_and_unknown_hashes(client):
+    assert client.post("/process-video", data={"sha256": "../../etc/passwd"}).status_code == 400
+    assert client.post("/process-video", data={"sha256": "0" * 64}).status_code == 404
+
+
+def test_processed_video_is_replayed_while_its_audio_exists(client, tmp_path):
+    import app
+
+    first = start_processing(client, video=(io.BytesIO(VIDEO), "video.mp4"))
+    assert first["video_name"] == f"{VIDEO_SHA256}.mp4"
+
+    # A worker finishes the job
+    audio = tmp_path / "tts_audio.mp3"
+    audio.write_bytes(b"audio")
+    job = app.process_jobs.claim()
+    app.process_jobs.finish(job["id"], {"status": "done", "progress": 100,
+                                        "result": {"data": {"audio_files": [str(audio)]}}})
+
+    replayed = start_processing(client, sha256=VIDEO_SHA256.upper())
+    assert replayed["job_id"] == first["job_id"]
+
+    audio.unlink()  # Evicted from the TTS cache: the video is processed again
+    assert start_processing(client, sha256=VIDEO_SHA256)["job_id"] != first["job_id"]
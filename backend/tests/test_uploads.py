@@ -0,0 +1,150 @@
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import uploads
+from upload_store import UploadStore
+from uploads import OffsetMismatch, UploadSessions
+
+MEDIA = {"duration": 4.0, "video_codec": "h264", "audio_codec": "aac"}
+COPY_STDIN = "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[1], 'wb'))"
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "probe_media", lambda path: MEDIA)
+    monkeypatch.setattr(uploads, "PROXY_POLL_SECONDS", 0.01)
+    # Stand-in for the ffmpeg proxy encoder: copies the streamed bytes to the proxy file
+    monkeypatch.setattr(uploads, "start_analysis_proxy", lambda output_path: subprocess.Popen(
+        [sys.executable, "-c", COPY_STDIN, output_path], stdin=subprocess.PIPE))
+    return UploadSessions(str(tmp_path / "sessions"), UploadStore(str(tmp_path / "uploads")),
+                          str(tmp_path / "proxies"))
+
+
+def wait_for_proxy(sessions, upload_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        proxy = sessions.status(upload_id)["proxy"]
+        if proxy and proxy["status"] in ("done", "error"):
+            return proxy
+        time.sleep(0.02)
+    pytest.fail("The proxy was not finished in time")
+
+
+def test_create_validates_the_upload(sessions):
+    with pytest.raises(ValueError):
+        sessions.create("../", 10)
+    with pytest.raises(ValueError):
+        sessions.create("video.mp4", 0)
+    with pytest.raises(ValueError):
+        sessions.create("video.mp4", sessions.max_bytes + 1)
+
+    status = sessions.create("my video.mp4", 10)
+    assert status["filename"] == "my_video.mp4"
+    assert status["offset"] == 0 and not status["complete"]
+    assert sessions.status("not-an-upload") is None
+
+
+def test_resumed_upload_must_continue_at_its_offset(sessions, tmp_path):
+    data = os.urandom(3 * uploads.READ_BLOCK_SIZE + 123)
+    upload_id = sessions.create("video.mp4", len(data))["upload_id"]
+    sessions.write(upload_id, 0, io.BytesIO(data[:1000]))
+
+    # After a server restart the upload continues where its file ends
+    restarted = UploadSessions(sessions.root, sessions.store, sessions.proxy_folder)
+    with pytest.raises(OffsetMismatch) as error:
+        restarted.write(upload_id, 0, io.BytesIO(data))
+    assert error.value.offset == 1000
+    assert restarted.status(upload_id)["offset"] == 1000
+
+    status = restarted.write(upload_id, 1000, io.BytesIO(data[1000:]))
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert status["complete"] and status["offset"] == len(data)
+    assert status["sha256"] == sha256
+    assert status["video_name"] == f"{sha256}.mp4"
+    assert (tmp_path / "uploads" / status["video_name"]).read_bytes() == data
+    assert status["media"] == MEDIA
+    with pytest.raises(OffsetMismatch):
+        restarted.write(upload_id, len(data), io.BytesIO(b"more"))
+
+
+def test_chunk_beyond_the_announced_size_is_rejected(sessions):
+    upload_id = sessions.create("video.mp4", 10)["upload_id"]
+
+    with pytest.raises(ValueError):
+        sessions.write(upload_id, 0, io.BytesIO(b"x" * 11))
+
+
+def test_media_is_probed_before_the_upload_completes(sessions):
+    data = os.urandom(2 * uploads.PROBE_MIN_BYTES)
+    upload_id = sessions.create("video.mp4", len(data))["upload_id"]
+
+    status = sessions.write(upload_id, 0, io.BytesIO(data[:uploads.PROBE_MIN_BYTES]))
+
+    assert status["media"] == MEDIA and not status["complete"]
+
+
+def test_proxy_is_encoded_while_the_upload_streams(sessions):
+    data = os.urandom(3 * uploads.PROBE_MIN_BYTES)
+    upload_id = sessions.create("video.mp4", len(data))["upload_id"]
+    sessions.write(upload_id, 0, io.BytesIO(data[:uploads.PROBE_MIN_BYTES]))
+    assert sessions.status(upload_id)["proxy"]["status"] in ("running", "done")
+
+    sessions.write(upload_id, uploads.PROBE_MIN_BYTES, io.BytesIO(data[uploads.PROBE_MIN_BYTES:]))
+
+    proxy = wait_for_proxy(sessions, upload_id)
+    assert proxy["status"] == "done"
+    with open(proxy["path"], "rb") as f:
+        assert f.read() == data
+
+
+def test_proxy_falls_back_to_the_stored_video(sessions, monkeypatch):
+    # An encoder that cannot read the container as a stream exits early
+    monkeypatch.setattr(uploads, "start_analysis_proxy", lambda output_path: subprocess.Popen(
+        [sys.executable, "-c", "import sys; sys.exit(1)"], stdin=subprocess.PIPE))
+    converted = []
+
+    def create_analysis_proxy(video_path, output_path):
+        converted.append(video_path)
+        with open(output_path, "wb") as f:
+            f.write(b"proxy")
+        return output_path
+
+    monkeypatch.setattr(uploads, "create_analysis_proxy", create_analysis_proxy)
+    data = os.urandom(2 * uploads.PROBE_MIN_BYTES)
+    upload_id = sessions.create("video.mp4", len(data))["upload_id"]
+    sessions.write(upload_id, 0, io.BytesIO(data[:uploads.PROBE_MIN_BYTES]))
+    sessions.write(upload_id, uploads.PROBE_MIN_BYTES, io.BytesIO(data[uploads.PROBE_MIN_BYTES:]))
+
+    proxy = wait_for_proxy(sessions, upload_id)
+    status = sessions.status(upload_id)
+    assert proxy["status"] == "done"
+    assert converted == [os.path.join(sessions.store.root, status["video_name"])]
+
+
+def test_upload_routes_report_the_offset_to_resume_from(sessions, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "uploads", sessions)
+    monkeypatch.setattr(app.job_workers, "start", lambda: [])
+    client = app.app.test_client()
+
+    created = client.post("/uploads", json={"filename": "video.mp4", "size": 6})
+    assert created.status_code == 201
+    upload_url = created.json["upload_url"]
+
+    assert client.patch(upload_url, data=b"abc", headers={"Upload-Offset": "0"}).json["offset"] == 3
+    conflict = client.patch(upload_url, data=b"abc", headers={"Upload-Offset": "0"})
+    assert conflict.status_code == 409 and conflict.json["offset"] == 3
+    assert client.patch(upload_url, data=b"abc").status_code == 400
+
+    done = client.patch(upload_url, data=b"def", headers={"Upload-Offset": "3"})
+    assert done.json["complete"] and done.json["sha256"] == hashlib.sha256(b"abcdef").hexdigest()
+    assert client.get(upload_url).json["offset"] == 6
+    assert client.get("/uploads/unknown").status_code == 404
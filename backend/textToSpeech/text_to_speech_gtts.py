@@ -1,6 +1,7 @@
-from flask import Flask, request, send_file, jsonify
+import os
+import subprocess
+from flask import Flask, request, jsonify, Response, stream_with_context
 from gtts import gTTS
-import tempfile
 from flask_cors import CORS  # Import CORS
 
 # Create Flask app
@@ -9,17 +10,77 @@ app = Flask(__name__)
 # Enable CORS for all routes
 CORS(app)
 
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")  # Default engine: gtts (online) or espeak (offline)
+ESPEAK_VOICE = "en-us"
+ESPEAK_WORDS_PER_MINUTE = 175
+STREAM_CHUNK_SIZE = 16384
+
+
+def stream_gtts(text):
+    """
+    Synthesize speech with gTTS, yielding the MP3 frames of each ~100 character token as
+    soon as it has been fetched.
+
+    Args:
+        text (str): The text to convert to speech.
+
+    Yields:
+        bytes: Consecutive chunks of the MP3 file.
+    """
+    yield from gTTS(text, lang='en', slow=False, tld='com').stream()
+
+
+def stream_espeak(text):
+    """
+    Synthesize speech with eSpeak NG on the local CPU, yielding the WAV file as it is written.
+
+    Args:
+        text (str): The text to convert to speech.
+
+    Yields:
+        bytes: Consecutive chunks of the WAV file.
+
+    Raises:
+        RuntimeError: If espeak-ng fails.
+    """
+    process = subprocess.Popen(
+        ["espeak-ng", "-v", ESPEAK_VOICE, "-s", str(ESPEAK_WORDS_PER_MINUTE), "--stdout", "--stdin"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        process.stdin.write(text.encode("utf-8"))
+        process.stdin.close()
+        for chunk in iter(lambda: process.stdout.read(STREAM_CHUNK_SIZE), b""):
+            yield chunk
+        if process.wait() != 0:
+            raise RuntimeError(f"espeak-ng error: {process.stderr.read().decode()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+# Engine name -> (streaming synthesizer, file extension, MIME type)
+ENGINES = {
+    "gtts": (stream_gtts, "mp3", "audio/mpeg"),
+    "espeak": (stream_espeak, "wav", "audio/wav"),
+}
+
 @app.route('/text_to_speech', methods=['POST'])
 def text_to_speech():
     """
-    Convert input text to speech using gTTS and return the generated audio file.
+    Convert input text to speech and return the generated audio file.
 
-    This endpoint accepts a POST request with a JSON payload that contains a 'text' key.
-    The text is converted to speech using Google Text-to-Speech (gTTS), saved as an MP3 file
-    in a temporary location, and then sent back to the client as a downloadable attachment.
+    This endpoint accepts a POST request with a JSON payload that contains a 'text' key and an
+    optional 'engine' key ("gtts" or the offline "espeak"; defaults to the TTS_ENGINE setting).
+    The text is converted to speech with the selected engine entirely in memory, and the audio
+    is streamed to the client as a downloadable attachment while later chunks are still being
+    synthesized. Nothing is written to disk.
 
     Returns:
-        Response: A Flask response containing the audio file if successful,
+        Response: A streaming Flask response containing the audio if successful,
                   or a JSON error message with the appropriate HTTP status code if an error occurs.
     """
     try:
@@ -30,17 +91,26 @@ def text_to_speech():
         if not text:
             return jsonify({"error": "No text provided"}), 400
 
-        # Initialize gTTS with the provided text for conversion
-        speech = gTTS(text, lang='en', slow=False, tld='com')
+        engine = data.get('engine') or TTS_ENGINE
+        if engine not in ENGINES:
+            return jsonify({"error": f"Unknown TTS engine '{engine}'. Available engines: {', '.join(ENGINES)}"}), 400
+        synthesize, extension, mimetype = ENGINES[engine]
+
+        # Synthesize the first chunk before responding, so that synthesis errors still
+        # produce a proper error response instead of a truncated stream
+        chunks = synthesize(text)
+        first_chunk = next(chunks, b"")
 
-        # Save the audio file to a temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-        speech_file = temp_file.name
-        speech.save(speech_file)
-        temp_file.close()
+        def generate():
+            yield first_chunk
+            yield from chunks
 
-        # Send the generated audio file back to the client
-        return send_file(speech_file, as_attachment=True, download_name="speech.mp3", mimetype="audio/mpeg")
+        # Stream the generated audio back to the client as it is synthesized
+        return Response(
+            stream_with_context(generate()),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f'attachment; filename="speech.{extension}"'}
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -0,0 +1,460 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import unicodedata
+
+from audio_processing import probe_audio_durations
+from config import TTS_CACHE_MAX_BYTES
+from workspaces import file_lock
+
+CACHE_FILE_PREFIX = "tts_"
+CACHE_DIR = ".tts_cache"  # Cache entries, inside the folder the audio files are handed out in
+CACHE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+LOCK_FILE = ".lock"
+DURATIONS_DIR = "durations"  # Measured duration of each key, inside CACHE_DIR
+REFERENCES_DIR = "references"  # Keys referenced by other files, inside CACHE_DIR
+
+
+def normalize_text(text):
+    """
+    Normalize text before it is used as part of a cache key.
+
+    Unicode is normalized to NFC and all runs of whitespace are collapsed, so that
+    descriptions differing only in spacing or line breaks share the same audio.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The normalized text.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_cache_key(text, lang, tld, engine, variant=None):
+    """
+    Build the content-addressed cache key for a synthesis request.
+
+    Args:
+        text (str): The text to synthesize.
+        lang (str): The language code (e.g. "en").
+        tld (str): The voice/accent selector (the gTTS top-level domain, e.g. "com").
+        engine (str): The name of the TTS engine.
+        variant (str, optional): Identifies post-processed audio derived from the same
+            synthesis (e.g. a clip fitted to a duration). Defaults to None.
+
+    Returns:
+        str: A SHA-256 hex digest identifying the audio.
+    """
+    fields = [normalize_text(text), lang, tld, engine]
+    if variant is not None:
+        fields.append(variant)
+    payload = json.dumps(fields, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed store for synthesized speech with LRU eviction under a disk budget.
+
+    Cache entries are stored as <cache_folder>/.tts_cache/tts_<key>.<extension>. The files
+    handed out are hard links to the entries (copies where linking is not possible) under the
+    same name in cache_folder itself. Both count against the budget, and eviction removes the
+    entry and the clip of a key together, except for keys that are referenced: files such as
+    export and workspace manifests record the clips they use (see record_references), and
+    their clips are kept for as long as the referencing file exists.
+
+    Recency is the modification time of the files, and eviction scans them under a file lock,
+    so all processes sharing a folder (the web server and the job workers) keep within one
+    budget. The duration of each key is stored next to the entries once measured, so it is
+    shared as well and survives restarts. All methods are safe to call from multiple threads.
+    """
+
+    def __init__(self, cache_folder, max_bytes=TTS_CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_folder (str): Directory where the audio files are handed out.
+            max_bytes (int, optional): Disk budget of the cache entries and the clips handed
+                out, in bytes. Referenced clips may exceed it. Defaults to TTS_CACHE_MAX_BYTES.
+        """
+        self.cache_folder = cache_folder
+        self.entries_folder = os.path.join(cache_folder, CACHE_DIR)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._durations = {}  # key -> duration in seconds, read from DURATIONS_DIR or measured
+        for folder in (DURATIONS_DIR, REFERENCES_DIR):
+            os.makedirs(os.path.join(self.entries_folder, folder), exist_ok=True)
+
+    def get(self, key, extension="mp3", publish=True):
+        """
+        Look up cached audio and mark it as recently used.
+
+        Args:
+            key (str): The cache key.
+            extension (str, optional): File extension of the audio. Defaults to "mp3".
+            publish (bool, optional): Return a clip in cache_folder rather than the entry itself.
+                Defaults to True.
+
+        Returns:
+            str or None: The path to the audio file, or None on a miss.
+        """
+        name = f"{CACHE_FILE_PREFIX}{key}.{extension}"
+        entry = os.path.join(self.entries_folder, name)
+        published = os.path.join(self.cache_folder, name)
+        found = None
+        for path in (entry, published):
+            try:
+                os.utime(path)
+                found = found or path
+            except OSError:
+                pass  # Not cached, evicted or not handed out
+
+        if found is None:
+            return None
+        if not publish:
+            return entry if found == entry else None
+        if os.path.exists(published):
+            return published
+        return self._publish(entry)
+
+    def get_or_create(self, key, synthesize, extension="mp3", publish=True):
+        """
+        Return the cached audio for a key, synthesizing it on a miss.
+
+        Concurrent requests for the same key synthesize only once per process. The audio is
+        written to a temporary file and moved into place, so readers never see partial files.
+
+        Args:
+            key (str): The cache key.
+            synthesize (callable): Called as synthesize(output_path) to write the audio.
+            extension (str, optional): File extension of the audio. Defaults to "mp3".
+            publish (bool, optional): Return a clip in cache_folder (see get). Defaults to True.
+
+        Returns:
+            str: The path to the audio file.
+        """
+        path = self.get(key, extension, publish)
+        if path:
+            return path
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            path = self.get(key, extension, publish)
+            if path:
+                return path
+
+            entry = os.path.join(self.entries_folder, f"{CACHE_FILE_PREFIX}{key}.{extension}")
+            temp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.part"
+            try:
+                synthesize(temp_path)
+                os.replace(temp_path, entry)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            path = self._publish(entry) if publish else entry
+            self._evict()
+
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return path
+
+    def key_for_path(self, path):
+        """
+        Return the cache key of a cached audio file path.
+
+        Args:
+            path (str): Path to an audio file.
+
+        Returns:
+            str or None: The key, or None if the path is not named like an audio file of this cache.
+        """
+        name = os.path.basename(path)
+        key = os.path.splitext(name)[0][len(CACHE_FILE_PREFIX):]
+        if not name.startswith(CACHE_FILE_PREFIX) or not CACHE_KEY_PATTERN.match(key):
+            return None
+        return key
+
+    def get_durations(self, keys, paths):
+        """
+        Return the durations of cached audio files, measuring each key only once.
+
+        Cached audio never changes, so a duration is measured the first time it is requested
+        (all missing ones together, see audio_processing.probe_audio_durations) and stored in a
+        file named after the key, which is removed when the key is evicted.
+
+        Args:
+            keys (list): Cache keys of the files.
+            paths (list): Paths to the files (entries or handed out clips), in the order of keys.
+
+        Returns:
+            list: Durations in seconds, in the order of keys; None where none could be determined.
+        """
+        with self._lock:
+            durations = [self._durations.get(key) for key in keys]
+        for index, key in enumerate(keys):
+            if durations[index] is None:
+                durations[index] = self._read_duration(key)
+        missing = [index for index, duration in enumerate(durations) if duration is None]
+
+        measured = probe_audio_durations([paths[index] for index in missing])
+        for index, duration in zip(missing, measured):
+            durations[index] = duration
+            if duration is not None:
+                self._write_duration(keys[index], duration)
+        with self._lock:
+            for key, duration in zip(keys, durations):
+                if duration is not None:
+                    self._durations[key] = duration
+        return durations
+
+    def _read_duration(self, key):
+        """
+        Read the stored duration of a key.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            float or None: The duration in seconds, or None if it has not been measured yet.
+        """
+        try:
+            with open(os.path.join(self.entries_folder, DURATIONS_DIR, key)) as f:
+                return float(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_duration(self, key, duration):
+        """
+        Store the measured duration of a key, atomically.
+
+        Args:
+            key (str): The cache key.
+            duration (float): The duration in seconds.
+
+        Returns:
+            None
+        """
+        path = os.path.join(self.entries_folder, DURATIONS_DIR, key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(temp_path, "w") as f:
+            f.write(repr(duration))
+        os.replace(temp_path, path)
+
+    def _publish(self, entry):
+        """
+        Hand out a cache entry as a clip in cache_folder, linking it unless it is there already.
+
+        Args:
+            entry (str): The path to the cache entry.
+
+        Returns:
+            str: The path to the clip.
+        """
+        published = os.path.join(self.cache_folder, os.path.basename(entry))
+        if os.path.exists(published):
+            return published
+        temp_path = f"{published}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            try:
+                os.link(entry, temp_path)
+            except OSError:
+                shutil.copyfile(entry, temp_path)  # File system without hard links
+            os.replace(temp_path, published)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return published
+
+    def set_references(self, owner, keys):
+        """
+        Record the keys whose clips a file refers to, replacing what it referred to before.
+
+        The clips are not evicted while the owner file exists.
+
+        Args:
+            owner (str): Path of the referencing file (e.g. an export manifest).
+            keys (iterable): The cache keys it refers to.
+
+        Returns:
+            None
+        """
+        owner = os.path.abspath(owner)
+        name = hashlib.sha256(owner.encode("utf-8")).hexdigest()
+        path = os.path.join(self.entries_folder, REFERENCES_DIR, f"{name}.json")
+        keys = sorted(set(keys))
+        if not keys:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(temp_path, "w") as f:
+            json.dump({"owner": owner, "keys": keys}, f)
+        os.replace(temp_path, path)
+
+    def _referenced_keys(self):
+        """
+        Collect the keys referenced by existing files, dropping the records of deleted ones.
+
+        Returns:
+            set: The referenced cache keys.
+        """
+        referenced = set()
+        folder = os.path.join(self.entries_folder, REFERENCES_DIR)
+        for name in os.listdir(folder):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                with open(path) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.exists(record["owner"]):
+                referenced.update(record["keys"])
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return referenced
+
+    def _evict(self):
+        """
+        Remove least recently used keys (entry, clip and duration) until the cache fits its budget.
+
+        The files on disk are the index, so the budget is shared by every process using the
+        cache folder. Referenced keys and the most recently used key are always kept. Stored
+        durations of keys whose audio is gone are removed as well.
+
+        Returns:
+            None
+        """
+        with file_lock(os.path.join(self.entries_folder, LOCK_FILE)):
+            keys = {}  # key -> [last used, {(device, inode): size}, paths]
+            for folder in (self.cache_folder, self.entries_folder):
+                for name in os.listdir(folder):
+                    key = self.key_for_path(name)
+                    if key is None:
+                        continue
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue  # Evicted concurrently
+                    item = keys.setdefault(key, [0, {}, []])
+                    item[0] = max(item[0], stat.st_mtime)
+                    item[1][(stat.st_dev, stat.st_ino)] = stat.st_size  # Hard links count once
+                    item[2].append(path)
+
+            total_bytes = sum(sum(sizes.values()) for _, sizes, _ in keys.values())
+            referenced = self._referenced_keys() if total_bytes > self.max_bytes else set()
+            for key, (_, sizes, paths) in sorted(keys.items(), key=lambda item: item[1][0])[:-1]:
+                if total_bytes <= self.max_bytes:
+                    break
+                if key in referenced:
+                    continue
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                del keys[key]
+                total_bytes -= sum(sizes.values())
+
+            durations_folder = os.path.join(self.entries_folder, DURATIONS_DIR)
+            for name in os.listdir(durations_folder):
+                if CACHE_KEY_PATTERN.match(name) and name not in keys:
+                    try:
+                        os.remove(os.path.join(durations_folder, name))
+                    except OSError:
+                        pass
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_tts_cache(cache_folder):
+    """
+    Return the shared TTSCache instance for a folder, creating it on first use.
+
+    Args:
+        cache_folder (str): Directory where the cached audio files are stored.
+
+    Returns:
+        TTSCache: The cache for the folder.
+    """
+    folder = os.path.abspath(cache_folder)
+    with _caches_lock:
+        if folder not in _caches:
+            _caches[folder] = TTSCache(cache_folder)
+        return _caches[folder]
+
+
+def get_audio_durations(paths):
+    """
+    Get the durations of audio files, cached against their TTS cache entries.
+
+    Files stored in a TTS cache are measured once per entry. Other files are measured on
+    every call. Either way, WAV and MP3 headers are parsed in-process and all remaining
+    files are probed in a single batch.
+
+    Args:
+        paths (list): Paths to the audio files.
+
+    Returns:
+        list: Durations in seconds, in the order of paths; None where none could be determined.
+    """
+    durations = [None] * len(paths)
+    by_cache = {}
+    uncached = []
+    for index, path in enumerate(paths):
+        key = None
+        if os.path.basename(path).startswith(CACHE_FILE_PREFIX) and os.path.isfile(path):
+            cache = get_tts_cache(os.path.dirname(path) or ".")
+            key = cache.key_for_path(path)
+        if key is None:
+            uncached.append(index)
+        else:
+            by_cache.setdefault(cache, []).append((index, key))
+
+    for cache, items in by_cache.items():
+        keys = [key for _, key in items]
+        for (index, _), duration in zip(items, cache.get_durations(keys, [paths[index] for index, _ in items])):
+            durations[index] = duration
+    for index, duration in zip(uncached, probe_audio_durations([paths[index] for index in uncached])):
+        durations[index] = duration
+    return durations
+
+
+def record_references(owner, paths):
+    """
+    Record the TTS clips a file refers to, so that they are not evicted while the file exists.
+
+    Args:
+        owner (str): Path of the referencing file (e.g. an export or workspace manifest).
+        paths (iterable): Paths of the audio files it refers to; files that are not TTS clips
+            are ignored.
+
+    Returns:
+        None
+    """
+    keys_by_cache = {}
+    for path in paths:
+        if path and os.path.basename(path).startswith(CACHE_FILE_PREFIX):
+            cache = get_tts_cache(os.path.dirname(path) or ".")
+            key = cache.key_for_path(path)
+            if key is not None:
+                keys_by_cache.setdefault(cache, []).append(key)
+    for cache, keys in keys_by_cache.items():
+        cache.set_references(owner, keys)
@@ -0,0 +1,294 @@
+import base64
+import re
+import subprocess
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from gtts import gTTS, gTTSError
+
+from clients import get_http_session
+from config import GTTS_CHUNK_WORKERS, TTS_ENGINE
+from tts_cache import normalize_text
+
+
+class TTSEngine:
+    """
+    Base class for text-to-speech engines.
+
+    An engine turns text into an audio file. Subclasses set a unique name (used in
+    requests, configuration and cache keys), the extension of the files they write,
+    a typical speaking rate used to predict durations, and whether they can change
+    their speaking rate natively.
+    """
+
+    name = None
+    extension = None
+    characters_per_second = 15.0
+    supports_speed = False
+
+    def synthesize(self, text, output_path, lang="en", tld="com", speed=1.0, parallel_chunks=False):
+        """
+        Synthesize speech for the given text into output_path.
+
+        Args:
+            text (str): The text to convert to speech.
+            output_path (str): The path of the audio file to write.
+            lang (str, optional): The language of the speech. Defaults to "en".
+            tld (str, optional): The voice/accent selector, as a gTTS top-level domain. Defaults to "com".
+            speed (float, optional): Speaking rate relative to the engine default. Only honored by
+                engines with supports_speed. Defaults to 1.0.
+            parallel_chunks (bool, optional): Fetch the chunks of long texts concurrently. Only
+                honored by network engines that split texts into chunks. Defaults to False.
+
+        Returns:
+            None
+        """
+        raise NotImplementedError
+
+    def stream(self, text, lang="en", tld="com"):
+        """
+        Synthesize speech for the given text and yield the encoded audio as it is produced.
+
+        Args:
+            text (str): The text to convert to speech.
+            lang (str, optional): The language of the speech. Defaults to "en".
+            tld (str, optional): The voice/accent selector, as a gTTS top-level domain. Defaults to "com".
+
+        Yields:
+            bytes: Consecutive chunks of the audio file.
+        """
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """
+    Google Translate text-to-speech (network based, writes MP3).
+    """
+
+    name = "gtts"
+    extension = "mp3"
+    characters_per_second = 14.0
+
+    AUDIO_PATTERN = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+    def synthesize(self, text, output_path, lang="en", tld="com", speed=1.0, parallel_chunks=False):
+        tts = gTTS(text=text, lang=lang, tld=tld)
+        # Speed up the speech by setting the rate (this parameter is not officially supported in gTTS)
+        tts.rate = 100
+
+        # gTTS splits long texts into ~100 character tokens. They are fetched over the shared
+        # keep-alive session (concurrently with parallel_chunks) and the MP3 frames are
+        # concatenated in the original order. _prepare_requests is not public API, so the
+        # gtts version is pinned in requirements.txt
+        prepared_requests = tts._prepare_requests()
+        if not parallel_chunks or len(prepared_requests) == 1:
+            chunks = [self._fetch_chunk(tts, prepared_request) for prepared_request in prepared_requests]
+        else:
+            workers = min(GTTS_CHUNK_WORKERS, len(prepared_requests))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                chunks = list(executor.map(lambda request: self._fetch_chunk(tts, request), prepared_requests))
+
+        with open(output_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+    def _fetch_chunk(self, tts, prepared_request):
+        """
+        Send one prepared gTTS request and decode the MP3 frames from its response.
+
+        Args:
+            tts (gTTS): The gTTS object the request was prepared by.
+            prepared_request (requests.PreparedRequest): The request for one text token.
+
+        Returns:
+            bytes: The MP3 frames of the token.
+
+        Raises:
+            gTTSError: If the request fails or the response contains no audio.
+        """
+        try:
+            response = get_http_session().send(
+                prepared_request, proxies=urllib.request.getproxies(), timeout=tts.timeout
+            )
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            raise gTTSError(tts=tts, response=response)
+        except requests.exceptions.RequestException:
+            raise gTTSError(tts=tts)
+
+        audio = []
+        for line in response.iter_lines(chunk_size=1024):
+            decoded_line = line.decode("utf-8")
+            if "jQ1olc" in decoded_line:
+                audio_search = self.AUDIO_PATTERN.search(decoded_line)
+                if not audio_search:
+                    raise gTTSError(tts=tts, response=response)
+                audio.append(base64.b64decode(audio_search.group(1).encode("ascii")))
+        return b"".join(audio)
+
+    def stream(self, text, lang="en", tld="com"):
+        # gTTS fetches the text in ~100 character tokens; each token's MP3 frames are
+        # yielded as soon as it has been fetched
+        tts = gTTS(text=text, lang=lang, tld=tld)
+        for prepared_request in tts._prepare_requests():
+            yield self._fetch_chunk(tts, prepared_request)
+
+
+class EspeakEngine(TTSEngine):
+    """
+    eSpeak NG text-to-speech (runs fully on the local CPU, writes 16-bit PCM WAV).
+    """
+
+    name = "espeak"
+    extension = "wav"
+    characters_per_second = 16.5
+    supports_speed = True
+    words_per_minute = 175
+    max_words_per_minute = 450
+
+    # (lang, tld) -> eSpeak NG voice, mirroring the accents selected by gTTS domains
+    VOICES = {
+        ("en", "com"): "en-us",
+        ("en", "us"): "en-us",
+        ("en", "co.uk"): "en-gb",
+        ("en", "com.au"): "en-gb",
+        ("en", "ca"): "en-us",
+        ("en", "co.in"): "en-gb-x-rp",
+        ("en", "ie"): "en-gb",
+        ("en", "co.za"): "en-gb",
+        ("pt", "com.br"): "pt-br",
+        ("pt", "pt"): "pt",
+        ("es", "com.mx"): "es-419",
+        ("es", "es"): "es",
+        ("fr", "ca"): "fr",
+        ("fr", "fr"): "fr",
+    }
+
+    def synthesize(self, text, output_path, lang="en", tld="com", speed=1.0, parallel_chunks=False):
+        voice = self.VOICES.get((lang, tld), lang)
+        words_per_minute = min(self.max_words_per_minute, int(round(self.words_per_minute * speed)))
+        result = subprocess.run(
+            ["espeak-ng", "-v", voice, "-s", str(words_per_minute), "-w", output_path, "--stdin"],
+            input=text.encode("utf-8"),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"espeak-ng error: {result.stderr.decode()}")
+
+    def stream(self, text, lang="en", tld="com", chunk_size=16384):
+        voice = self.VOICES.get((lang, tld), lang)
+        process = subprocess.Popen(
+            ["espeak-ng", "-v", voice, "-s", str(self.words_per_minute), "--stdout", "--stdin"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            process.stdin.write(text.encode("utf-8"))
+            process.stdin.close()
+            while True:
+                chunk = process.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            if process.wait() != 0:
+                raise RuntimeError(f"espeak-ng error: {process.stderr.read().decode()}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+
+class SpeechRateStats:
+    """
+    Running estimate of the speaking rate of each engine, in characters per second.
+
+    The estimate starts at the engine's characters_per_second and is refined with an
+    exponential moving average of the (silence-trimmed) durations actually produced.
+    """
+
+    def __init__(self, smoothing=0.2):
+        """
+        Initialize the statistics.
+
+        Args:
+            smoothing (float, optional): Weight of each new observation. Defaults to 0.2.
+        """
+        self.smoothing = smoothing
+        self._rates = {}
+        self._lock = threading.Lock()
+
+    def rate(self, engine):
+        """
+        Return the current speaking rate estimate of an engine.
+
+        Args:
+            engine (TTSEngine): The engine.
+
+        Returns:
+            float: Characters per second at speed 1.0.
+        """
+        with self._lock:
+            return self._rates.get(engine.name, engine.characters_per_second)
+
+    def predict_duration(self, engine, text, speed=1.0):
+        """
+        Predict how long the engine takes to speak a text.
+
+        Args:
+            engine (TTSEngine): The engine.
+            text (str): The text to be spoken.
+            speed (float, optional): Speaking rate relative to the engine default. Defaults to 1.0.
+
+        Returns:
+            float: The predicted duration in seconds, without leading or trailing silence.
+        """
+        return len(normalize_text(text)) / (self.rate(engine) * speed)
+
+    def update(self, engine, text, duration, speed=1.0):
+        """
+        Record the duration of a synthesized text.
+
+        Args:
+            engine (TTSEngine): The engine that synthesized the text.
+            text (str): The synthesized text.
+            duration (float): Duration of the speech in seconds, without leading or trailing silence.
+            speed (float, optional): Speaking rate the text was synthesized at. Defaults to 1.0.
+
+        Returns:
+            None
+        """
+        characters = len(normalize_text(text))
+        if characters == 0 or duration <= 0:
+            return
+        observed = characters / (duration * speed)
+        with self._lock:
+            current = self._rates.get(engine.name, engine.characters_per_second)
+            self._rates[engine.name] = current + self.smoothing * (observed - current)
+
+
+SPEECH_RATES = SpeechRateStats()
+
+TTS_ENGINES = {engine.name: engine for engine in (GTTSEngine(), EspeakEngine())}
+
+
+def get_tts_engine(name=None):
+    """
+    Look up a text-to-speech engine by name.
+
+    Args:
+        name (str, optional): The engine name. Defaults to the TTS_ENGINE setting.
+
+    Returns:
+        TTSEngine: The engine instance.
+
+    Raises:
+        ValueError: If no engine with the given name exists.
+    """
+    name = name or TTS_ENGINE
+    if name not in TTS_ENGINES:
+        raise ValueError(f"Unknown TTS engine '{name}'. Available engines: {', '.join(TTS_ENGINES)}")
+    return TTS_ENGINES[name]
@@ -0,0 +1,168 @@
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import uuid
+
+HASH_BLOCK_SIZE = 1024 * 1024
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadStore:
+    """
+    Content-addressed store of uploaded videos.
+
+    Every video is stored once, as "<sha256><extension>" in the upload folder, however often
+    and under whichever names it is uploaded. The client's file name becomes a symlink to the
+    content, so routes that take a video name keep working; uploading a different video under
+    the same name moves the link but never overwrites the content an earlier upload (or a job
+    still processing it) refers to.
+    """
+
+    def __init__(self, root):
+        """
+        Initialize the store.
+
+        Args:
+            root (str): The upload folder.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def find(self, sha256):
+        """
+        Look up a stored video by the hash of its content.
+
+        Args:
+            sha256 (str): The hex SHA-256 digest of the video.
+
+        Returns:
+            str or None: The video's content name in the store, or None if it is not stored.
+        """
+        if not SHA256_PATTERN.match(sha256 or ""):
+            return None
+        for path in glob.glob(os.path.join(self.root, f"{sha256}*")):
+            name = os.path.basename(path)
+            if os.path.splitext(name)[0] == sha256 and not os.path.islink(path):
+                return name
+        return None
+
+    def save(self, stream, filename):
+        """
+        Store an uploaded video, hashing it while it is written to disk.
+
+        Args:
+            stream (file-like): The video, read until EOF (e.g. an uploaded file's stream).
+            filename (str): The client's file name.
+
+        Returns:
+            str: The video's content name in the store.
+        """
+        fd, temp_path = tempfile.mkstemp(prefix=".upload_", dir=self.root)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b""):
+                    f.write(block)
+                    digest.update(block)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return self.add(temp_path, filename, digest.hexdigest())
+
+    def add(self, path, filename, sha256=None):
+        """
+        Move a video file into the store (or drop it if its content is stored already) and
+        link the client's file name to it.
+
+        Args:
+            path (str): The video file; it is moved or removed. It must be on the store's file system.
+            filename (str): The client's file name.
+            sha256 (str, optional): The hex SHA-256 digest of the file, if already known.
+                Defaults to hashing the file.
+
+        Returns:
+            str: The video's content name in the store.
+        """
+        sha256 = sha256 or _hash_file(path)
+        name = self.find(sha256)
+        if name is None:
+            name = f"{sha256}{os.path.splitext(filename)[1].lower()}"
+            os.replace(path, os.path.join(self.root, name))
+        else:
+            os.remove(path)
+        self._link(os.path.basename(filename), name)
+        return name
+
+    def content_name(self, video_name):
+        """
+        Return the content name of a video that was uploaded under a name.
+
+        Videos uploaded before the store existed are plain files under their client's name;
+        they are moved into the store on first use.
+
+        Args:
+            video_name (str): The client's file name, or a content name.
+
+        Returns:
+            str or None: The video's content name in the store, or None if no such video exists.
+        """
+        path = os.path.join(self.root, os.path.basename(video_name))
+        if os.path.islink(path):
+            target = os.path.basename(os.readlink(path))
+            return target if os.path.isfile(os.path.join(self.root, target)) else None
+        if not os.path.isfile(path):
+            return None
+        name = os.path.basename(path)
+        if SHA256_PATTERN.match(os.path.splitext(name)[0]):
+            return name
+        return self.add(path, name)
+
+    def _link(self, alias, name):
+        """
+        Point a file name at a stored video, atomically replacing what the name referred to.
+
+        Args:
+            alias (str): The file name.
+            name (str): The content name.
+
+        Returns:
+            None
+        """
+        if not alias or alias == name:
+            return
+        temp_link = os.path.join(self.root, f".link_{uuid.uuid4().hex}")
+        os.symlink(name, temp_link)
+        os.replace(temp_link, os.path.join(self.root, alias))
+
+
+def parse_sha256(value):
+    """
+    Normalize a client-supplied SHA-256 digest.
+
+    Args:
+        value (str): The hex digest, in either case, with surrounding whitespace allowed.
+
+    Returns:
+        str or None: The lowercase hex digest, or None if value is not a SHA-256 digest.
+    """
+    sha256 = (value or "").strip().lower()
+    return sha256 if SHA256_PATTERN.match(sha256) else None
+
+
+def _hash_file(path):
+    """
+    Compute the SHA-256 of a file.
+
+    Args:
+        path (str): The file.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
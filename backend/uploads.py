@@ -0,0 +1,455 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from common_functions import create_analysis_proxy, probe_media, start_analysis_proxy
+from config import UPLOAD_MAX_BYTES, UPLOAD_SESSION_RETENTION_SECONDS
+
+DATA_FILE = "data.part"
+STATE_FILE = "state.json"
+READ_BLOCK_SIZE = 1024 * 1024
+PROBE_MIN_BYTES = 1024 * 1024  # Bytes needed before the first probe attempt
+PROBE_INTERVAL_BYTES = 8 * 1024 * 1024  # Bytes between further attempts while probing fails
+PROXY_POLL_SECONDS = 0.5  # How often the proxy encoder checks the partial file for new chunks
+PROXY_STALL_SECONDS = 300  # Give up following an upload that has not grown for this long
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class OffsetMismatch(Exception):
+    """
+    Raised when a chunk does not start where the upload currently ends.
+    """
+
+    def __init__(self, offset):
+        """
+        Initialize the error.
+
+        Args:
+            offset (int): The number of bytes received so far, where the next chunk must start.
+        """
+        super().__init__(f"Chunk must start at offset {offset}")
+        self.offset = offset
+
+
+class _Progress:
+    """
+    In-memory state of an upload in this process: the running content hash.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hasher = None
+        self.hashed = 0
+        self.next_probe = PROBE_MIN_BYTES
+
+
+class UploadSessions:
+    """
+    Chunked, resumable video uploads.
+
+    Every upload streams its chunks straight to a file in its session directory. While the
+    chunks arrive, the SHA-256 of the content is computed and the partial file is probed
+    (codecs and duration, available as soon as the container headers have arrived). Once
+    the probe succeeds, a background thread encodes the analysis proxy from the partial
+    file as it grows, so chunk writes never wait for the encoder; if the container cannot
+    be read as a stream (or the upload stalls), the proxy is made from the stored video
+    once the upload is complete. The offset of an upload is the size of its file, so after
+    a broken connection (or a server restart) the client asks for the offset and sends the
+    rest.
+    """
+
+    def __init__(self, root, store, proxy_folder, max_bytes=UPLOAD_MAX_BYTES,
+                 retention_seconds=UPLOAD_SESSION_RETENTION_SECONDS):
+        """
+        Initialize the upload sessions.
+
+        Args:
+            root (str): Directory for the session directories.
+            store (UploadStore): The store completed uploads are moved to.
+            proxy_folder (str): Directory for the analysis proxies.
+            max_bytes (int, optional): Largest accepted upload. Defaults to UPLOAD_MAX_BYTES.
+            retention_seconds (int, optional): How long sessions are kept. Defaults to
+                UPLOAD_SESSION_RETENTION_SECONDS.
+        """
+        self.root = root
+        self.store = store
+        self.proxy_folder = proxy_folder
+        self.max_bytes = max_bytes
+        self.retention_seconds = retention_seconds
+        self._progress = {}
+        self._proxies = {}
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        for folder in (root, proxy_folder):
+            os.makedirs(folder, exist_ok=True)
+
+    def create(self, filename, size):
+        """
+        Start an upload.
+
+        Args:
+            filename (str): The client's file name.
+            size (int): The total size of the file in bytes.
+
+        Returns:
+            dict: The upload status (see status).
+
+        Raises:
+            ValueError: If the file name is empty or the size is invalid or too large.
+        """
+        video_name = secure_filename(filename or "")
+        if not video_name:
+            raise ValueError("Invalid file name")
+        if not isinstance(size, int) or size <= 0 or size > self.max_bytes:
+            raise ValueError(f"Size must be between 1 and {self.max_bytes} bytes")
+
+        self._prune()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._path(upload_id))
+        open(self._path(upload_id, DATA_FILE), "wb").close()
+        self._save_state(upload_id, {
+            "upload_id": upload_id,
+            "filename": video_name,
+            "size": size,
+            "created_at": time.time(),
+            "complete": False,
+            "media": None,
+            "proxy": None,
+        })
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """
+        Return the state of an upload.
+
+        Args:
+            upload_id (str): The upload id.
+
+        Returns:
+            dict or None: The upload id, file name, total size, bytes received ("offset"),
+                "complete", probed "media" (once known), the analysis "proxy" ("status" and,
+                once written, "path") and, when complete, "sha256" and "video_name"; None
+                for an unknown upload.
+        """
+        state = self._load_state(upload_id)
+        if state is None:
+            return None
+        data_path = self._path(upload_id, DATA_FILE)
+        state["offset"] = state["size"] if state["complete"] else os.path.getsize(data_path)
+        return state
+
+    def write(self, upload_id, offset, stream):
+        """
+        Append a chunk to an upload.
+
+        Args:
+            upload_id (str): The upload id.
+            offset (int): Where the chunk starts in the file; must equal the bytes received so far.
+            stream (file-like): The chunk, read until EOF (e.g. the request body stream).
+
+        Returns:
+            dict or None: The upload status after the chunk, or None for an unknown upload.
+
+        Raises:
+            OffsetMismatch: If offset is not the current end of the upload.
+            ValueError: If the chunk goes beyond the announced size.
+        """
+        state = self._load_state(upload_id)
+        if state is None:
+            return None
+        progress = self._get_progress(upload_id)
+        data_path = self._path(upload_id, DATA_FILE)
+
+        with progress.lock:
+            current = state["size"] if state["complete"] else os.path.getsize(data_path)
+            if offset != current or state["complete"]:
+                raise OffsetMismatch(current)
+            self._resume_hash(progress, data_path, current)
+
+            with open(data_path, "ab") as f:
+                while True:
+                    block = stream.read(READ_BLOCK_SIZE)
+                    if not block:
+                        break
+                    if current + len(block) > state["size"]:
+                        raise ValueError("Chunk exceeds the announced upload size")
+                    f.write(block)
+                    current += len(block)
+                    progress.hasher.update(block)
+                    progress.hashed = current
+
+            if state["media"] is None and current >= min(progress.next_probe, state["size"]):
+                progress.next_probe = current + PROBE_INTERVAL_BYTES
+                state = self._update_state(upload_id, media=self._probe(data_path))
+            if state["media"] is not None:
+                self._start_proxy(upload_id, state, data_path)
+
+            if current == state["size"]:
+                self._complete(upload_id, progress, state)
+        return self.status(upload_id)
+
+    def _resume_hash(self, progress, data_path, offset):
+        """
+        Make sure the running hash covers the first offset bytes of the upload, re-reading
+        them after a restart (or a chunk that failed halfway).
+
+        Args:
+            progress (_Progress): The upload's in-memory state.
+            data_path (str): Path of the partial file.
+            offset (int): Bytes received so far.
+
+        Returns:
+            None
+        """
+        if progress.hasher is not None and progress.hashed == offset:
+            return
+        progress.hasher = hashlib.sha256()
+        with open(data_path, "rb") as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+                progress.hasher.update(block)
+        progress.hashed = offset
+
+    def _probe(self, data_path):
+        """
+        Probe a (possibly partial) upload.
+
+        Args:
+            data_path (str): Path of the file.
+
+        Returns:
+            dict or None: The result of probe_media, or None if the headers are not readable yet.
+        """
+        try:
+            return probe_media(data_path)
+        except (RuntimeError, OSError, ValueError):
+            return None
+
+    def _complete(self, upload_id, progress, state):
+        """
+        Finish an upload: record its hash, move it into the upload store and make sure its
+        analysis proxy is (being) created.
+
+        Args:
+            upload_id (str): The upload id.
+            progress (_Progress): The upload's in-memory state.
+            state (dict): The upload state.
+
+        Returns:
+            None
+        """
+        sha256 = progress.hasher.hexdigest()
+        video_name = self.store.add(self._path(upload_id, DATA_FILE), state["filename"], sha256)
+        video_path = os.path.join(self.store.root, video_name)
+        media = state["media"] if state["media"] is not None else self._probe(video_path)
+        state = self._update_state(upload_id, complete=True, sha256=sha256,
+                                   video_name=video_name, media=media)
+        if media is not None:
+            self._start_proxy(upload_id, state, video_path)
+
+        with self._lock:
+            self._progress.pop(upload_id, None)
+
+    def _start_proxy(self, upload_id, state, source_path):
+        """
+        Start encoding the analysis proxy of an upload in a background thread, unless it is
+        done or already being encoded.
+
+        Args:
+            upload_id (str): The upload id.
+            state (dict): The upload state.
+            source_path (str): The partial file, or the stored video once the upload is complete.
+
+        Returns:
+            None
+        """
+        if (state.get("proxy") or {}).get("status") == "done":
+            return
+        with self._lock:
+            thread = self._proxies.get(upload_id)
+            if thread is not None and thread.is_alive():
+                return
+            try:
+                # Opened here so the thread keeps reading the same file after it is moved to the store
+                source = open(source_path, "rb")
+            except OSError:
+                return
+            thread = threading.Thread(target=self._build_proxy,
+                                      args=(upload_id, source, state["size"]), daemon=True)
+            self._proxies[upload_id] = thread
+        self._update_state(upload_id, proxy={"status": "running", "path": None})
+        thread.start()
+
+    def _build_proxy(self, upload_id, source, size):
+        """
+        Encode the analysis proxy of an upload, following the file while it is uploaded.
+
+        If ffmpeg cannot read the file as a stream or the upload stalls, the proxy is made
+        from the stored video if the upload is complete by then; otherwise the proxy is
+        marked "pending" and the next chunk (or the completion) starts a new attempt.
+
+        Args:
+            upload_id (str): The upload id.
+            source (file): The open upload file.
+            size (int): The total size of the upload in bytes.
+
+        Returns:
+            None
+        """
+        proxy_path = os.path.join(self.proxy_folder, f"{upload_id}.mp4")
+        with source:
+            streamed = self._stream_proxy(source, size, proxy_path)
+
+        if not streamed:
+            with self._lock:
+                state = self._load_state(upload_id)
+                if state is None or not state["complete"]:
+                    self._proxies.pop(upload_id, None)
+                    self._update_state(upload_id, proxy={"status": "pending", "path": None})
+                    return
+            try:
+                create_analysis_proxy(os.path.join(self.store.root, state["video_name"]), proxy_path)
+            except (RuntimeError, OSError) as e:
+                print(f"Error creating the analysis proxy of upload {upload_id}: {e}")
+                self._update_state(upload_id, proxy={"status": "error", "path": None})
+                return
+        self._update_state(upload_id, proxy={"status": "done", "path": proxy_path})
+
+    def _stream_proxy(self, source, size, proxy_path):
+        """
+        Feed an upload file to a streaming proxy encoder, waiting for chunks that have not
+        arrived yet.
+
+        Args:
+            source (file): The open upload file.
+            size (int): The total size of the upload in bytes.
+            proxy_path (str): The output path for the proxy.
+
+        Returns:
+            bool: Whether the whole file was encoded into the proxy.
+        """
+        try:
+            process = start_analysis_proxy(proxy_path)
+        except OSError:
+            return False
+        received = 0
+        last_growth = time.monotonic()
+        try:
+            while received < size:
+                block = source.read(READ_BLOCK_SIZE)
+                if block:
+                    process.stdin.write(block)
+                    received += len(block)
+                    last_growth = time.monotonic()
+                elif time.monotonic() - last_growth > PROXY_STALL_SECONDS:
+                    break
+                else:
+                    time.sleep(PROXY_POLL_SECONDS)
+            process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited early: the container is not streamable
+            pass
+        if received < size:
+            process.kill()
+        return process.wait() == 0 and received >= size
+
+    def _get_progress(self, upload_id):
+        """
+        Return the in-memory state of an upload, creating it if needed.
+
+        Args:
+            upload_id (str): The upload id.
+
+        Returns:
+            _Progress: The state.
+        """
+        with self._lock:
+            return self._progress.setdefault(upload_id, _Progress())
+
+    def _path(self, upload_id, *parts):
+        """
+        Return a path inside an upload's session directory.
+
+        Args:
+            upload_id (str): The upload id.
+            *parts (str): Path components inside the session directory.
+
+        Returns:
+            str: The path.
+        """
+        return os.path.join(self.root, upload_id, *parts)
+
+    def _load_state(self, upload_id):
+        """
+        Load the persisted state of an upload.
+
+        Args:
+            upload_id (str): The upload id.
+
+        Returns:
+            dict or None: The state, or None if the id is invalid or unknown.
+        """
+        if not UPLOAD_ID_PATTERN.match(upload_id or ""):
+            return None
+        try:
+            with open(self._path(upload_id, STATE_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _update_state(self, upload_id, **fields):
+        """
+        Update fields of the persisted state of an upload, keeping the other fields as the
+        upload and proxy threads last wrote them.
+
+        Args:
+            upload_id (str): The upload id.
+            **fields: The fields to set.
+
+        Returns:
+            dict or None: The updated state, or None for an unknown upload.
+        """
+        with self._state_lock:
+            state = self._load_state(upload_id)
+            if state is None:
+                return None
+            state.update(fields)
+            self._save_state(upload_id, state)
+            return state
+
+    def _save_state(self, upload_id, state):
+        """
+        Atomically persist the state of an upload.
+
+        Args:
+            upload_id (str): The upload id.
+            state (dict): The state.
+
+        Returns:
+            None
+        """
+        path = self._path(upload_id, STATE_FILE)
+        with open(f"{path}.part", "w") as f:
+            json.dump({key: value for key, value in state.items() if key != "offset"}, f)
+        os.replace(f"{path}.part", path)
+
+    def _prune(self):
+        """
+        Delete sessions (and unfinished uploads) older than retention_seconds.
+
+        Returns:
+            None
+        """
+        cutoff = time.time() - self.retention_seconds
+        for upload_id in os.listdir(self.root):
+            state = self._load_state(upload_id)
+            if state is not None and state["created_at"] < cutoff:
+                shutil.rmtree(self._path(upload_id), ignore_errors=True)
+                with self._lock:
+                    self._progress.pop(upload_id, None)
@@ -0,0 +1,131 @@
+import os
+
+import openAI_images.revisedGemini as rg
+from tts_cache import record_references
+from tts_engines import get_tts_engine
+from workspaces import MANIFEST_FILE, Workspace
+
+
+def process_video(payload, progress_callback, job_id=None):
+    """
+    Describe an uploaded video: summarize it, detect its scenes, cut the scenes without
+    talking and generate their descriptions and audio.
+
+    This is the /process-video pipeline. It runs in a job worker process, so it continues
+    when the client disconnects.
+
+    The output of every stage is checkpointed in the workspace manifest: the summary, the raw
+    and processed segmentation, the scene clips, and the description and audio of each scene
+    as soon as it is ready. When the job runs again (after a worker restart or a retry), the
+    finished stages and scenes are skipped and the pipeline resumes with the first
+    incomplete unit of work.
+
+    Args:
+        payload (dict): The job payload with "video_path", "workspace" (the request's workspace
+            directory), "audio_folder" and "engine".
+        progress_callback (callable): Called as progress_callback(percent, message, **fields) before
+            each stage, with the boundaries of all segments once they are known ("segments", a list
+            of {"index", "start", "end", "type"}), and with every description and audio file as it
+            completes ("segment": {"index", "description", "scene_file"[, "audio_file"]}, where
+            "index" is the segment's position in "segments").
+        job_id (str, optional): The id of the job running the pipeline. Defaults to None.
+
+    Returns:
+        dict: The response "data" (see revisedGemini.format_response_data, with scene files
+            relative to /scene_files), the "workspace_id" and the "waveform_image".
+    """
+    video_path = payload["video_path"]
+    engine = payload.get("engine")
+    workspace_dir = os.path.normpath(payload["workspace"])
+    workspace = Workspace(os.path.dirname(workspace_dir), os.path.basename(workspace_dir))
+    checkpoint = workspace.update_manifest(job_id=job_id)
+    if "result" in checkpoint:
+        return checkpoint["result"]
+
+    get_tts_engine(engine)  # Fail early on an unknown engine
+
+    # 1. Generate video summary (10%)
+    progress_callback(10, "Analyzing video content...")
+    if "summary" not in checkpoint:
+        checkpoint = workspace.update_manifest(summary=rg.get_video_summary_with_gemini(video_path))
+    video_summary = checkpoint["summary"]
+
+    # 2. Detect scene changes (20%)
+    progress_callback(20, "Detecting scene changes...")
+    if "timestamps" not in checkpoint:
+        checkpoint = workspace.update_manifest(timestamps=rg.get_video_scenes_with_gemini(video_path))
+
+    # 3. Process timestamps (30%); the segment boundaries are sent as soon as they are known
+    if "segments" not in checkpoint:
+        checkpoint = workspace.update_manifest(segments=rg.process_timestamps(checkpoint["timestamps"]))
+    combined_segments = checkpoint["segments"]
+    progress_callback(30, "Processing scene timestamps...", segments=[
+        {"index": index, "start": segment["start"], "end": segment["end"], "type": segment["type"]}
+        for index, segment in enumerate(combined_segments)
+    ])
+
+    # 4. Cut video into scenes (50%); cutting is local, so missing clips mean cutting them all again
+    progress_callback(50, "Extracting video scenes...")
+    scene_ids = checkpoint["scenes"][1] if "scenes" in checkpoint else None
+    if scene_ids is None or not all(
+        os.path.exists(os.path.join(workspace.scenes_dir, f"scene_{scene_id}.mp4")) for scene_id in scene_ids
+    ):
+        scene_output = rg.cut_video_by_no_talking(video_path, combined_segments, workspace.scenes_dir)
+        checkpoint = workspace.update_manifest(scenes=scene_output, scene_descriptions={})
+    scene_numbers, scene_ids = checkpoint["scenes"]
+
+    # 5. Generate descriptions (70%), checkpointing and sending every description and audio file as it arrives
+    message = "Generating scene descriptions..."
+    progress_callback(70, message)
+    scene_descriptions = checkpoint.get("scene_descriptions", {})
+    pending = [
+        (scene_number, scene_id) for scene_number, scene_id in zip(scene_numbers, scene_ids)
+        if not os.path.exists(scene_descriptions.get(scene_id, {}).get("audio") or "")
+    ]
+    if pending:
+        known = {
+            scene_id: scene_descriptions[scene_id]["description"]
+            for _, scene_id in pending if scene_id in scene_descriptions
+        }
+        events = rg.iter_segment_descriptions(
+            workspace.scenes_dir, tuple(map(list, zip(*pending))), combined_segments,
+            payload["audio_folder"], video_summary, tts_engine=engine, descriptions=known,
+        )
+        for completed, event in enumerate(events, start=1):
+            stage, scene_number, scene_id, description, segment_file, description_audio = event
+            entry = scene_descriptions.setdefault(scene_id, {})
+            entry.update(scene_number=scene_number, segment_file=segment_file, description=description)
+            segment = {
+                "index": scene_number - 1,
+                "description": description,
+                "scene_file": f"{workspace.id}/{segment_file}",
+            }
+            if stage == "audio":
+                entry["audio"] = segment["audio_file"] = description_audio
+            workspace.update_manifest(scene_descriptions=scene_descriptions)
+            if stage == "audio":
+                # The workspace keeps its audio files from being evicted from the TTS cache
+                record_references(workspace.file(MANIFEST_FILE),
+                                  [entry.get("audio") for entry in scene_descriptions.values()])
+            # Two events (description and audio) per pending scene
+            progress_callback(70 + 20 * completed / (2 * len(pending)), message, segment=segment)
+
+    descriptions = [
+        (entry["scene_number"], scene_id, entry["description"], entry["segment_file"], entry["audio"])
+        for scene_id, entry in scene_descriptions.items()
+    ]
+
+    # 6. Format final response (90%)
+    progress_callback(90, "Finalizing results...")
+    response_data = rg.format_response_data(combined_segments, descriptions)
+    response_data["scene_files"] = [
+        f"{workspace.id}/{scene_file}" for scene_file in response_data["scene_files"]
+    ]
+
+    result = {
+        "data": response_data,
+        "workspace_id": workspace.id,
+        "waveform_image": "./waveforms/waveform.png",
+    }
+    workspace.update_manifest(result=result)
+    return result
@@ -0,0 +1,184 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from config import WORKSPACE_RETENTION_SECONDS
+
+MANIFEST_FILE = "manifest.json"
+WORKSPACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class Workspace:
+    """
+    A private directory tree for one request or job.
+
+    Every stage writes its files into the workspace and records them in the workspace
+    manifest, so later stages read the manifest instead of scanning shared folders.
+    """
+
+    def __init__(self, root, workspace_id):
+        """
+        Initialize the workspace. Use WorkspaceManager.create to create a new one on disk.
+
+        Args:
+            root (str): Directory containing all workspaces.
+            workspace_id (str): The workspace id (32 hex digits).
+        """
+        self.id = workspace_id
+        self.path = os.path.join(root, workspace_id)
+        self._lock = threading.Lock()
+
+    @property
+    def scenes_dir(self):
+        """
+        str: Directory for the scene clips cut from the video.
+        """
+        return os.path.join(self.path, "scenes")
+
+    def file(self, *parts):
+        """
+        Return the path of a file inside the workspace.
+
+        Args:
+            *parts (str): Path components relative to the workspace.
+
+        Returns:
+            str: The path.
+        """
+        return os.path.join(self.path, *parts)
+
+    def read_manifest(self):
+        """
+        Read the workspace manifest.
+
+        Returns:
+            dict: The manifest entries recorded so far.
+        """
+        try:
+            with open(self.file(MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def update_manifest(self, **entries):
+        """
+        Add or replace entries of the workspace manifest, atomically.
+
+        Args:
+            **entries: JSON-serializable values to record.
+
+        Returns:
+            dict: The updated manifest.
+        """
+        with self._lock:
+            manifest = self.read_manifest()
+            manifest.update(entries)
+            path = self.file(MANIFEST_FILE)
+            with open(f"{path}.part", "w") as f:
+                json.dump(manifest, f)
+            os.replace(f"{path}.part", path)
+            return manifest
+
+    def remove(self):
+        """
+        Delete the workspace and everything in it.
+
+        Returns:
+            None
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class WorkspaceManager:
+    """
+    Creates and finds per-request workspaces under a common root directory.
+
+    Workspaces older than the retention period are deleted whenever a new one is created.
+    """
+
+    def __init__(self, root, retention_seconds=WORKSPACE_RETENTION_SECONDS):
+        """
+        Initialize the manager.
+
+        Args:
+            root (str): Directory containing all workspaces.
+            retention_seconds (int, optional): How long workspaces are kept. Defaults to
+                WORKSPACE_RETENTION_SECONDS.
+        """
+        self.root = os.path.abspath(root)
+        self.retention_seconds = retention_seconds
+        os.makedirs(root, exist_ok=True)
+
+    def create(self, kind, **entries):
+        """
+        Create a new, empty workspace.
+
+        Args:
+            kind (str): What the workspace is for (e.g. "process-video"); recorded in its manifest.
+            **entries: Further entries for the initial manifest.
+
+        Returns:
+            Workspace: The new workspace.
+        """
+        self.prune()
+        workspace = Workspace(self.root, uuid.uuid4().hex)
+        os.makedirs(workspace.scenes_dir)
+        workspace.update_manifest(kind=kind, created_at=time.time(), **entries)
+        return workspace
+
+    def get(self, workspace_id):
+        """
+        Look up an existing workspace.
+
+        Args:
+            workspace_id (str): The workspace id.
+
+        Returns:
+            Workspace or None: The workspace, or None if the id is invalid or unknown.
+        """
+        if not WORKSPACE_ID_PATTERN.match(workspace_id or ""):
+            return None
+        workspace = Workspace(self.root, workspace_id)
+        return workspace if os.path.isdir(workspace.path) else None
+
+    def prune(self):
+        """
+        Delete workspaces created more than retention_seconds ago.
+
+        Returns:
+            None
+        """
+        cutoff = time.time() - self.retention_seconds
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if WORKSPACE_ID_PATTERN.match(name) and os.stat(path).st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass  # Removed concurrently
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on a lock file, shared by all threads and processes on the host.
+
+    Args:
+        path (str): Path of the lock file; it is created if needed.
+
+    Yields:
+        None
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
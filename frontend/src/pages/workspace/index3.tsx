@@ -334,13 +334,16 @@ const Workspace3: React.FC = () => {
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
       let videoDescriptionItems: VideoDescriptionItem[] = [];
+      let buffer = "";
 
       while (true) {
         const { done, value } = await reader.read();
-        if (done) break;
 
-        // Process each chunk of data
-        const chunks = decoder.decode(value).split("\n");
+        // Process each complete line; a line split across reads waits in the
+        // buffer until the rest of it arrives
+        buffer += done ? decoder.decode() : decoder.decode(value, { stream: true });
+        const chunks = buffer.split("\n");
+        buffer = done ? "" : chunks.pop() ?? "";
         for (const chunk of chunks) {
           if (!chunk) continue;
 
@@ -352,6 +355,33 @@ const Workspace3: React.FC = () => {
               setProcessingProgress(data.progress);
               setProcessingMessage(data.message || "");
 
+              // Show the segments as soon as they are known, and fill in each
+              // description and audio file as it completes
+              if (data.segments) {
+                videoDescriptionItems = data.segments.map(
+                  (segment: { start: number; end: number; type: string }) => ({
+                    startTime: segment.start,
+                    endTime: segment.end,
+                    description: segment.type === "TALKING" ? "TALKING" : "",
+                    audioFile: undefined,
+                    isEdited: true,
+                  })
+                );
+                setVideoDescriptions(videoDescriptionItems);
+              }
+              if (data.segment && videoDescriptionItems[data.segment.index]) {
+                videoDescriptionItems = videoDescriptionItems.map((item, index) =>
+                  index === data.segment.index
+                    ? {
+                        ...item,
+                        description: data.segment.description,
+                        audioFile: data.segment.audio_file ?? item.audioFile,
+                      }
+                    : item
+                );
+                setVideoDescriptions(videoDescriptionItems);
+              }
+
               if (data.progress === 100 && data.data) {
                 // Final processing complete
                 videoDescriptionItems = data.data.timestamps.map(
@@ -375,6 +405,7 @@ const Workspace3: React.FC = () => {
             console.error("Error parsing JSON chunk:", e);
           }
         }
+        if (done) break;
       }
 
       // Update state with final results